@@ -163,6 +163,9 @@ def parse_input_args(input_args):
         help=f"Export serializer context, default value: '{default_params}'",
         default=default_params,
     )
+    export_project.add_argument(
+        '--workers', type=int, default=1, help='Number of threads serializing tasks in parallel', dest='workers'
+    )
 
     subparsers.add_parser(
         'annotations_fill_updated_by', help='Fill the updated_by field for Annotations', parents=[root_parser]
@@ -1,8 +1,11 @@
 """This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
 """
+import copy
+import hashlib
 import json
 import logging
 import re
+import threading
 from collections import OrderedDict, defaultdict
 from typing import Tuple, Union
 from urllib.parse import urlencode
@@ -13,7 +16,9 @@ import numpy as np
 import pandas as pd
 import xmljson
 from django.conf import settings
+from django.core.cache import cache
 from label_studio_sdk._extensions.label_studio_tools.core import label_config
+from label_studio_sdk.label_interface import LabelInterface
 from rest_framework.exceptions import ValidationError
 
 from label_studio.core.utils.io import find_file
@@ -31,6 +36,93 @@ _NOT_CONTROL_TAGS = {
 _LABEL_CONFIG_SCHEMA = find_file('label_config_schema.json')
 with open(_LABEL_CONFIG_SCHEMA) as f:
     _LABEL_CONFIG_SCHEMA_DATA = json.load(f)
+# jsonschema.validate() checks the schema itself and builds a new validator on every call
+_LABEL_CONFIG_VALIDATOR = jsonschema.validators.validator_for(_LABEL_CONFIG_SCHEMA_DATA)(_LABEL_CONFIG_SCHEMA_DATA)
+
+_MISSING = object()
+
+
+class LabelConfigCache:
+    """Process-wide LRU cache of artifacts derived from label configs (parsed config, data types, LabelInterface, etc).
+
+    Entries are keyed by sha256 of the config string, so every distinct config is parsed once per worker
+    regardless of how many projects and requests use it. Picklable artifacts can also be shared
+    between workers via the default Django cache when LABEL_CONFIG_CACHE_SHARED is enabled.
+    Cached values are shared, use the public helpers below which return copies of mutable artifacts.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(config_string):
+        return hashlib.sha256(config_string.encode()).hexdigest()
+
+    def get(self, config_string, artifact, factory, shared=False):
+        """Get artifact of config_string from cache or build it with factory(config_string).
+        Exceptions raised by factory are not cached.
+        """
+        if not isinstance(config_string, str) or settings.LABEL_CONFIG_CACHE_SIZE <= 0:
+            return factory(config_string)
+
+        key = self.get_key(config_string)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                value = entry.get(artifact, _MISSING)
+                if value is not _MISSING:
+                    return value
+
+        shared = shared and settings.LABEL_CONFIG_CACHE_SHARED
+        value = self._shared_get(key, artifact) if shared else _MISSING
+        if value is _MISSING:
+            value = factory(config_string)
+            if shared:
+                self._shared_set(key, artifact, value)
+
+        with self._lock:
+            self._entries.setdefault(key, {})[artifact] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.LABEL_CONFIG_CACHE_SIZE:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def _shared_key(key, artifact):
+        return f'label_config:{key}:{artifact}'
+
+    def _shared_get(self, key, artifact):
+        try:
+            return cache.get(self._shared_key(key, artifact), _MISSING)
+        except Exception as e:
+            logger.debug(f"Can't get label config {artifact} from cache: {e}")
+            return _MISSING
+
+    def _shared_set(self, key, artifact, value):
+        try:
+            cache.set(self._shared_key(key, artifact), value, settings.LABEL_CONFIG_CACHE_SHARED_TTL)
+        except Exception as e:
+            logger.debug(f"Can't save label config {artifact} to cache: {e}")
+
+
+label_config_cache = LabelConfigCache()
+
+
+def cached_parse_config(config_string):
+    """Same as label_studio_tools parse_config, but the config is parsed once per distinct config string"""
+    parsed = label_config_cache.get(config_string, 'parsed_config', label_config.parse_config, shared=True)
+    return copy.deepcopy(parsed)
+
+
+def get_label_interface(config_string) -> LabelInterface:
+    """Cached LabelInterface for config_string. It's shared between callers, so don't modify it"""
+    return label_config_cache.get(config_string, 'label_interface', LabelInterface)
 
 
 def parse_config(config_string):
@@ -49,7 +141,7 @@ def parse_config(config_string):
     }
     """
     logger.warning('Using deprecated method - switch to label_studio.tools.label_config.parse_config!')
-    return label_config.parse_config(config_string)
+    return cached_parse_config(config_string)
 
 
 def _fix_choices(config):
@@ -103,10 +195,17 @@ def parse_config_to_json(config_string: Union[str, None]) -> Tuple[Union[Ordered
 
 
 def validate_label_config(config_string: Union[str, None]) -> None:
+    # only successful validations are cached, invalid configs raise ValidationError every time
+    label_config_cache.get(config_string, 'validated', _validate_label_config)
+
+
+def _validate_label_config(config_string: Union[str, None]) -> bool:
     # xml and schema
     try:
         config, cleaned_config_string = parse_config_to_json(config_string)
-        jsonschema.validate(config, _LABEL_CONFIG_SCHEMA_DATA)
+        error = jsonschema.exceptions.best_match(_LABEL_CONFIG_VALIDATOR.iter_errors(config))
+        if error is not None:
+            raise error
     except (etree.ParseError, ValueError) as exc:
         raise ValidationError(str(exc))
     except jsonschema.exceptions.ValidationError as exc:
@@ -131,9 +230,14 @@ def validate_label_config(config_string: Union[str, None]) -> None:
         for toName in toName_.split(','):
             if toName not in names:
                 raise ValidationError(f'toName="{toName}" not found in names: {sorted(names)}')
+    return True
 
 
 def extract_data_types(label_config):
+    return dict(label_config_cache.get(label_config, 'data_types', _extract_data_types, shared=True))
+
+
+def _extract_data_types(label_config):
     # load config
     xml = parse_config_to_xml(label_config)
     if xml is None:
@@ -169,7 +273,7 @@ def extract_data_types(label_config):
 
 
 def get_all_labels(label_config):
-    outputs = parse_config(label_config)
+    outputs = cached_parse_config(label_config)
     labels = defaultdict(list)
     dynamic_labels = defaultdict(bool)
     for control_name in outputs:
@@ -187,11 +291,15 @@ def get_annotation_tuple(from_name, to_name, type):
 
 
 def get_all_control_tag_tuples(label_config):
-    outputs = parse_config(label_config)
+    return list(label_config_cache.get(label_config, 'control_tag_tuples', _get_all_control_tag_tuples))
+
+
+def _get_all_control_tag_tuples(label_config):
+    outputs = cached_parse_config(label_config)
     out = []
     for control_name, info in outputs.items():
         out.append(get_annotation_tuple(control_name, info['to_name'], info['type']))
-    return out
+    return tuple(out)
 
 
 def get_all_object_tag_names(label_config):
@@ -390,8 +498,8 @@ def get_sample_task(label_config, secure_mode=False):
 
 def config_essential_data_has_changed(new_config_str, old_config_str):
     """Detect essential changes of the labeling config"""
-    new_config = parse_config(new_config_str)
-    old_config = parse_config(old_config_str)
+    new_config = cached_parse_config(new_config_str)
+    old_config = cached_parse_config(old_config_str)
 
     for tag, new_info in new_config.items():
         if tag not in old_config:
@@ -418,7 +526,7 @@ def check_control_in_config_by_regex(config_string, control_type, filter=None):
     """
     Check if control type is in config including regex filter
     """
-    c = parse_config(config_string)
+    c = cached_parse_config(config_string)
     if filter is not None and len(filter) == 0:
         return False
     if filter:
@@ -440,7 +548,7 @@ def check_toname_in_config_by_regex(config_string, to_name, control_type=None):
     Check if to_name is in config including regex filter
     :return: True if to_name is fullmatch to some pattern ion config
     """
-    c = parse_config(config_string)
+    c = cached_parse_config(config_string)
     if control_type:
         check_list = [control_type]
     else:
@@ -462,7 +570,7 @@ def get_original_fromname_by_regex(config_string, fromname):
     """
     Get from_name from config on from_name key from data after applying regex search or original fromname
     """
-    c = parse_config(config_string)
+    c = cached_parse_config(config_string)
     for control in c:
         item = c[control].get('regex', {})
         expression = control
@@ -479,7 +587,7 @@ def get_all_types(label_config):
     """
     Get all types from label_config
     """
-    outputs = parse_config(label_config)
+    outputs = cached_parse_config(label_config)
     out = []
     for control_name, info in outputs.items():
         out.append(info['type'].lower())
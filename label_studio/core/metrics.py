@@ -0,0 +1,274 @@
+"""This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
+
+Prometheus metrics exporter.
+
+Histograms are stored in Redis hashes, so observations made by all gunicorn workers and rq workers
+are aggregated in one place and any web worker can serve /metrics. If Redis is not connected,
+observations are kept in the process memory (fine for a single process and for tests).
+Every observation costs one pipelined round trip: only the matching bucket, _count and _sum
+are incremented, cumulative buckets are calculated while rendering.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+JOB_DURATION_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 180, 600, 1800, 3600)
+
+LABEL_SEPARATOR = '\x1f'
+INF = float('inf')
+
+
+def _format_value(value):
+    if value == INF:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+class MetricsStorage:
+    """Counters storage: Redis hash per metric or in-process dict if Redis is not connected"""
+
+    redis_key = 'metrics:{name}'
+
+    def __init__(self):
+        self._local = defaultdict(lambda: defaultdict(float))
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _get_redis():
+        # core.redis reports job metrics, so it's imported here
+        from core.redis import get_redis_connection
+
+        return get_redis_connection()
+
+    def increment(self, name, increments):
+        """Increment several fields of metric hash at once, increments is a dict {field: value}"""
+        redis = self._get_redis()
+        if redis is not None:
+            try:
+                with redis.pipeline(transaction=False) as pipe:
+                    for field, value in increments.items():
+                        pipe.hincrbyfloat(self.redis_key.format(name=name), field, value)
+                    pipe.execute()
+                return
+            except Exception as e:
+                logger.debug(f"Can't save metric {name} to redis: {e}")
+
+        with self._lock:
+            values = self._local[name]
+            for field, value in increments.items():
+                values[field] += value
+
+    def get(self, name):
+        redis = self._get_redis()
+        values = {}
+        if redis is not None:
+            try:
+                values = {
+                    field.decode(): float(value)
+                    for field, value in redis.hgetall(self.redis_key.format(name=name)).items()
+                }
+            except Exception as e:
+                logger.debug(f"Can't get metric {name} from redis: {e}")
+        with self._lock:
+            for field, value in self._local.get(name, {}).items():
+                values[field] = values.get(field, 0) + value
+        return values
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+        redis = self._get_redis()
+        if redis is not None:
+            try:
+                keys = list(redis.scan_iter(self.redis_key.format(name='*')))
+                if keys:
+                    redis.delete(*keys)
+            except Exception as e:
+                logger.debug(f"Can't clear metrics in redis: {e}")
+
+
+storage = MetricsStorage()
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (INF,)
+        REGISTRY.append(self)
+
+    def _label_key(self, labels):
+        assert set(labels) == set(self.labelnames), f'{self.name} expects labels {self.labelnames}'
+        return LABEL_SEPARATOR.join(str(labels[name]) for name in self.labelnames)
+
+    def observe(self, value, **labels):
+        if not settings.METRICS_ENABLED:
+            return
+        bucket = next(bound for bound in self.buckets if value <= bound)
+        key = self._label_key(labels)
+        storage.increment(
+            self.name,
+            {
+                f'{key}{LABEL_SEPARATOR}bucket{LABEL_SEPARATOR}{_format_value(bucket)}': 1,
+                f'{key}{LABEL_SEPARATOR}count': 1,
+                f'{key}{LABEL_SEPARATOR}sum': value,
+            },
+        )
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def collect(self):
+        """Group stored values by label values: {label_values: {'buckets': {bound: n}, 'count': n, 'sum': s}}"""
+        series = defaultdict(lambda: {'buckets': defaultdict(float), 'count': 0, 'sum': 0})
+        for field, value in storage.get(self.name).items():
+            parts = field.split(LABEL_SEPARATOR)
+            label_values = tuple(parts[: len(self.labelnames)])
+            kind = parts[len(self.labelnames)]
+            if kind == 'bucket':
+                series[label_values]['buckets'][parts[-1]] += value
+            else:
+                series[label_values][kind] += value
+        return series
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for label_values, data in sorted(self.collect().items()):
+            labels = list(zip(self.labelnames, label_values))
+            cumulative = 0
+            for bound in self.buckets:
+                cumulative += data['buckets'].get(_format_value(bound), 0)
+                bucket_labels = _format_labels(labels + [('le', _format_value(bound))])
+                lines.append(f'{self.name}_bucket{bucket_labels} {_format_value(cumulative)}')
+            lines.append(f'{self.name}_count{_format_labels(labels)} {_format_value(data["count"])}')
+            lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(data["sum"])}')
+        return lines
+
+
+REGISTRY = []
+
+request_latency = Histogram(
+    'label_studio_http_request_duration_seconds',
+    'HTTP request latency by view',
+    labelnames=('view', 'method', 'status'),
+)
+request_queries = Histogram(
+    'label_studio_http_request_db_queries',
+    'Number of database queries per HTTP request by view',
+    labelnames=('view', 'method'),
+    buckets=QUERY_COUNT_BUCKETS,
+)
+operation_duration = Histogram(
+    'label_studio_operation_duration_seconds',
+    'Duration of hot path operations (next task, storage sync, export, webhooks)',
+    labelnames=('operation',),
+)
+rq_job_duration = Histogram(
+    'label_studio_rq_job_duration_seconds',
+    'RQ job execution time by queue and function',
+    labelnames=('queue', 'func', 'status'),
+    buckets=JOB_DURATION_BUCKETS,
+)
+
+
+def timed(operation):
+    """Decorator to measure function duration in label_studio_operation_duration_seconds"""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with operation_duration.time(operation=operation):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _observe_job(job, status):
+    if not job.started_at or not job.ended_at:
+        return
+    rq_job_duration.observe(
+        (job.ended_at - job.started_at).total_seconds(),
+        queue=job.origin,
+        func=job.func_name.rsplit('.', 1)[-1],
+        status=status,
+    )
+
+
+def on_job_success(job, connection, result, *args, **kwargs):
+    """RQ success callback, it runs in the worker process"""
+    _observe_job(job, 'finished')
+
+
+def on_job_failure(job, connection, type, value, traceback):
+    """RQ failure callback, it runs in the worker process"""
+    _observe_job(job, 'failed')
+
+
+def render_rq_queues():
+    """Current RQ queue depth, it's read from Redis at scrape time"""
+    from core.redis import redis_connected
+
+    lines = [
+        '# HELP label_studio_rq_queue_jobs Number of jobs in RQ queue by status',
+        '# TYPE label_studio_rq_queue_jobs gauge',
+    ]
+    if not redis_connected():
+        return lines
+
+    import django_rq
+
+    for queue_name in settings.RQ_QUEUES:
+        try:
+            queue = django_rq.get_queue(queue_name)
+            counts = {
+                'queued': queue.count,
+                'started': queue.started_job_registry.count,
+                'deferred': queue.deferred_job_registry.count,
+                'scheduled': queue.scheduled_job_registry.count,
+                'failed': queue.failed_job_registry.count,
+            }
+        except Exception as e:
+            logger.debug(f"Can't get RQ queue {queue_name} stats: {e}")
+            continue
+        for status, count in counts.items():
+            labels = _format_labels([('queue', queue_name), ('status', status)])
+            lines.append(f'label_studio_rq_queue_jobs{labels} {count}')
+    return lines
+
+
+def render():
+    """Render all metrics in Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    lines += render_rq_queues()
+    return '\n'.join(lines) + '\n'
@@ -5,12 +5,14 @@ import time
 from uuid import uuid4
 
 import ujson as json
+from core.metrics import request_latency, request_queries
 from core.utils.contextlog import ContextLog
 from csp.middleware import CSPMiddleware
 from django.conf import settings
 from django.contrib.auth import logout
 from django.core.exceptions import MiddlewareNotUsed
 from django.core.handlers.base import BaseHandler
+from django.db import connection
 from django.http import HttpResponsePermanentRedirect
 from django.middleware.common import CommonMiddleware
 from django.utils.deprecation import MiddlewareMixin
@@ -167,6 +169,36 @@ class DatabaseIsLockedRetryMiddleware(CommonMiddleware):
         return response
 
 
+class MetricsMiddleware:
+    """Measure request latency and number of database queries per view for /metrics"""
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        with connection.execute_wrapper(count_queries):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        # unresolved urls are skipped to keep labels cardinality low
+        resolver_match = getattr(request, 'resolver_match', None)
+        if resolver_match is not None:
+            view = resolver_match.view_name or resolver_match._func_path
+            request_latency.observe(duration, view=view, method=request.method, status=response.status_code)
+            request_queries.observe(queries, view=view, method=request.method)
+        return response
+
+
 class XApiKeySupportMiddleware:
     """Middleware that adds support for the X-Api-Key header, by having its value supersede
     anything that's set in the Authorization header."""
@@ -2,12 +2,16 @@
 """
 import logging
 import sys
+import time
 from datetime import timedelta
 from functools import partial
 
 import django_rq
 import redis
+from core.metrics import on_job_failure, on_job_success, rq_job_duration
+from django.conf import settings
 from django_rq import get_connection
+from rq import get_current_job
 from rq.command import send_stop_job_command
 from rq.exceptions import InvalidJobOperation
 from rq.registry import StartedJobRegistry
@@ -46,6 +50,11 @@ def redis_connected():
     return redis_healthcheck()
 
 
+def get_redis_connection():
+    """Redis connection shared by the app, None if Redis is not connected"""
+    return _redis
+
+
 def redis_get(key):
     if not redis_healthcheck():
         return
@@ -98,6 +107,10 @@ def start_job_async_or_sync(job, *args, in_seconds=0, **kwargs):
         del kwargs['job_timeout']
     if redis:
         logger.info(f'Start async job {job.__name__} on queue {queue_name}.')
+        if settings.METRICS_ENABLED:
+            # callbacks are executed by rq worker, they measure job duration
+            kwargs.setdefault('on_success', on_job_success)
+            kwargs.setdefault('on_failure', on_job_failure)
         queue = django_rq.get_queue(queue_name)
         enqueue_method = queue.enqueue
         if in_seconds > 0:
@@ -106,13 +119,68 @@ def start_job_async_or_sync(job, *args, in_seconds=0, **kwargs):
         return job
     else:
         on_failure = kwargs.pop('on_failure', None)
+        func_name = getattr(job, '__name__', str(job))
+        start = time.perf_counter()
         try:
-            return job(*args, **kwargs)
+            result = job(*args, **kwargs)
         except Exception:
+            rq_job_duration.observe(time.perf_counter() - start, queue=queue_name, func=func_name, status='failed')
             exc_info = sys.exc_info()
             if on_failure:
                 on_failure(job, *exc_info)
             raise
+        rq_job_duration.observe(time.perf_counter() - start, queue=queue_name, func=func_name, status='finished')
+        return result
+
+
+# seconds to wait for a job queued by start_job_once before the same job can be queued again
+JOB_ONCE_TTL = 600
+
+
+def _job_once_key(key):
+    return f'job_once:{key}:scheduled'
+
+
+def start_job_once(key, job, *args, delay=0, **kwargs):
+    """
+    Start job unless a job with the same key is already queued and not started yet,
+    so all calls made until the job starts are served by one job. The job must call release_job_once(key)
+    when it starts, then the next call queues a new job. Without redis the job is executed synchronously
+    :param key: Unique key of the job, e.g. f'realtime_export:{project_id}'
+    :param job: Job function
+    :param args: Function arguments
+    :param delay: Job will be delayed for delay seconds, it makes the window to collect calls longer
+    :param kwargs: start_job_async_or_sync keywords arguments
+    :return: Job, function result or None if the job is already queued
+    """
+    if not redis_connected():
+        return start_job_async_or_sync(job, *args, **kwargs)
+    if _redis.set(_job_once_key(key), 1, nx=True, ex=JOB_ONCE_TTL + delay):
+        return start_job_async_or_sync(job, *args, in_seconds=delay, **kwargs)
+
+
+def release_job_once(key):
+    """Allow start_job_once to queue the job again, it's called by the job when it starts"""
+    if _redis is not None:
+        _redis.delete(_job_once_key(key))
+
+
+def update_job_progress(**progress):
+    """
+    Save progress info into meta of the current RQ job, e.g. update_job_progress(processed=100, total=1000).
+    Does nothing except logging if the function is executed synchronously
+    :param progress: progress fields to store in job.meta['progress']
+    """
+    job = get_current_job()
+    if job is None:
+        logger.debug(f'Job progress: {progress}')
+        return
+
+    job.meta.setdefault('progress', {}).update(progress)
+    try:
+        job.save_meta()
+    except Exception as e:
+        logger.debug(f"Can't save progress for job {job.id}: {e}")
 
 
 def is_job_in_queue(queue, func_name, meta):
@@ -149,6 +149,12 @@ DJANGO_DB_POSTGRESQL = 'postgresql'
 DJANGO_DB = 'default'
 DATABASE_NAME_DEFAULT = os.path.join(BASE_DATA_DIR, 'label_studio.sqlite3')
 DATABASE_NAME = get_env('DATABASE_NAME', DATABASE_NAME_DEFAULT)
+# Seconds to keep a database connection open between requests: 0 closes it after every request, "none" never does.
+# Persistent connections are checked before reuse, so connections dropped by the server or a proxy are reopened.
+# Enable them for WSGI workers only, under ASGI (core.asgi) persistent connections leak and Django recommends 0
+DATABASE_CONN_MAX_AGE = get_env('DATABASE_CONN_MAX_AGE', '0')
+DATABASE_CONN_MAX_AGE = None if DATABASE_CONN_MAX_AGE.lower() == 'none' else int(DATABASE_CONN_MAX_AGE)
+DATABASE_CONN_HEALTH_CHECKS = get_bool_env('DATABASE_CONN_HEALTH_CHECKS', True)
 DATABASES_ALL = {
     DJANGO_DB_POSTGRESQL: {
         'ENGINE': 'django.db.backends.postgresql',
@@ -157,6 +163,8 @@ DATABASES_ALL = {
         'NAME': get_env('POSTGRE_NAME', 'postgres'),
         'HOST': get_env('POSTGRE_HOST', 'localhost'),
         'PORT': int(get_env('POSTGRE_PORT', '5432')),
+        'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DATABASE_CONN_HEALTH_CHECKS,
     },
     DJANGO_DB_MYSQL: {
         'ENGINE': 'django.db.backends.mysql',
@@ -165,6 +173,8 @@ DATABASES_ALL = {
         'NAME': get_env('MYSQL_NAME', 'labelstudio'),
         'HOST': get_env('MYSQL_HOST', 'localhost'),
         'PORT': int(get_env('MYSQL_PORT', '3306')),
+        'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DATABASE_CONN_HEALTH_CHECKS,
     },
     DJANGO_DB_SQLITE: {
         'ENGINE': 'django.db.backends.sqlite3',
@@ -174,6 +184,16 @@ DATABASES_ALL = {
         },
     },
 }
+# Connection pool (Django 5.1+, requires psycopg 3 with psycopg-pool), replaces persistent connections for PostgreSQL
+if get_bool_env('DATABASE_POOL', False):
+    DATABASES_ALL[DJANGO_DB_POSTGRESQL]['CONN_MAX_AGE'] = 0
+    DATABASES_ALL[DJANGO_DB_POSTGRESQL]['OPTIONS'] = {
+        'pool': {
+            'min_size': int(get_env('DATABASE_POOL_MIN_SIZE', 2)),
+            'max_size': int(get_env('DATABASE_POOL_MAX_SIZE', 10)),
+            'timeout': int(get_env('DATABASE_POOL_TIMEOUT', 10)),
+        }
+    }
 DATABASES_ALL['default'] = DATABASES_ALL[DJANGO_DB_POSTGRESQL]
 DATABASES = {'default': DATABASES_ALL.get(get_env('DJANGO_DB', 'default'))}
 
@@ -234,6 +254,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -408,6 +429,7 @@ SENTRY_IGNORED_EXCEPTIONS = [
 
 ROOT_URLCONF = 'core.urls'
 WSGI_APPLICATION = 'core.wsgi.application'
+ASGI_APPLICATION = 'core.asgi.application'
 GRAPHIQL = True
 
 # Internationalization
@@ -519,6 +541,11 @@ TASKS_MAX_NUMBER = 1000000
 TASKS_MAX_FILE_SIZE = DATA_UPLOAD_MAX_MEMORY_SIZE
 
 TASK_LOCK_TTL = int(get_env('TASK_LOCK_TTL', default=86400))
+# Seconds to keep resolved user roles in cache, invalidated on role changes.
+# Used with a shared CACHE_BACKEND only, otherwise roles are memoized within a request
+USER_ROLES_CACHE_TTL = int(get_env('USER_ROLES_CACHE_TTL', default=300))
+# Seconds between bulk writes of buffered user activity timestamps, 0 writes them on every request
+USER_ACTIVITY_FLUSH_INTERVAL = int(get_env('USER_ACTIVITY_FLUSH_INTERVAL', default=60))
 
 LABEL_STREAM_HISTORY_LIMIT = int(get_env('LABEL_STREAM_HISTORY_LIMIT', default=100))
 
@@ -533,6 +560,8 @@ EMAIL_BACKEND = get_env('EMAIL_BACKEND', 'django.core.mail.backends.dummy.EmailB
 ENABLE_LOCAL_FILES_STORAGE = get_bool_env('ENABLE_LOCAL_FILES_STORAGE', default=True)
 LOCAL_FILES_SERVING_ENABLED = get_bool_env('LOCAL_FILES_SERVING_ENABLED', default=False)
 LOCAL_FILES_DOCUMENT_ROOT = get_env('LOCAL_FILES_DOCUMENT_ROOT', default=os.path.abspath(os.sep))
+# Local storage sync reads only files modified or created since the previous complete sync
+LOCAL_FILES_INCREMENTAL_SCAN = get_bool_env('LOCAL_FILES_INCREMENTAL_SCAN', default=False)
 
 SYNC_ON_TARGET_STORAGE_CREATION = get_bool_env('SYNC_ON_TARGET_STORAGE_CREATION', default=True)
 
@@ -671,6 +700,13 @@ COLLECT_ANALYTICS = get_bool_env('COLLECT_ANALYTICS', get_bool_env('collect_anal
 SVG_SECURITY_CLEANUP = get_bool_env('SVG_SECURITY_CLEANUP', False)
 
 ML_BLOCK_LOCAL_IP = get_bool_env('ML_BLOCK_LOCAL_IP', False)
+# Seconds to reuse ML backend state (health and setup) in requests, 0 checks backends on every request.
+# Stale state is refreshed by a background job with Redis, see also refresh_ml_backends_state command
+ML_BACKEND_STATE_TTL = int(get_env('ML_BACKEND_STATE_TTL', 60))
+# Seconds to keep serialized task payloads of interactive annotating requests, 0 disables the cache.
+# Payloads are invalidated when the task, its annotations, drafts or predictions are saved or deleted,
+# so they are cached with a shared CACHE_BACKEND only: worker local caches of other workers can't be invalidated
+ML_INTERACTIVE_PAYLOAD_CACHE_TTL = int(get_env('ML_INTERACTIVE_PAYLOAD_CACHE_TTL', 60))
 
 RQ_LONG_JOB_TIMEOUT = int(get_env('RQ_LONG_JOB_TIMEOUT', 36000))
 
@@ -682,6 +718,12 @@ FUTURE_SAVE_TASK_TO_STORAGE = get_bool_env('FUTURE_SAVE_TASK_TO_STORAGE', defaul
 FUTURE_SAVE_TASK_TO_STORAGE_JSON_EXT = get_bool_env('FUTURE_SAVE_TASK_TO_STORAGE_JSON_EXT', default=True)
 STORAGE_IN_PROGRESS_TIMER = float(get_env('STORAGE_IN_PROGRESS_TIMER', 5.0))
 STORAGE_EXPORT_CHUNK_SIZE = int(get_env('STORAGE_EXPORT_CHUNK_SIZE', 100))
+# Seconds to collect annotation saves before realtime export job runs, saves of the same annotation are merged.
+# Values > 0 need rq worker running with --with-scheduler
+REALTIME_EXPORT_DELAY = int(get_env('REALTIME_EXPORT_DELAY', 0))
+# Seconds to collect draft saves before project draft labels are recalculated (with Redis only).
+# Values > 0 need rq worker running with --with-scheduler
+DRAFT_LABELS_UPDATE_DELAY = int(get_env('DRAFT_LABELS_UPDATE_DELAY', 0))
 
 USE_NGINX_FOR_EXPORT_DOWNLOADS = get_bool_env('USE_NGINX_FOR_EXPORT_DOWNLOADS', False)
 
@@ -812,6 +854,9 @@ CLOUD_STORAGE_CHECK_FOR_RECORDS_PAGE_SIZE = get_env('CLOUD_STORAGE_CHECK_FOR_REC
 CLOUD_STORAGE_CHECK_FOR_RECORDS_TIMEOUT = get_env('CLOUD_STORAGE_CHECK_FOR_RECORDS_TIMEOUT', 60)
 
 CONTEXTLOG_SYNC = False
+# Context log events are shipped by one background thread: events are dropped if the queue is full
+CONTEXTLOG_QUEUE_SIZE = int(get_env('CONTEXTLOG_QUEUE_SIZE', 1000))
+CONTEXTLOG_BATCH_SIZE = int(get_env('CONTEXTLOG_BATCH_SIZE', 50))
 TEST_ENVIRONMENT = get_bool_env('TEST_ENVIRONMENT', False)
 DEBUG_CONTEXTLOG = get_bool_env('DEBUG_CONTEXTLOG', False)
 
@@ -848,3 +893,59 @@ RESOLVER_PROXY_GCS_DOWNLOAD_URL = get_env(
 RESOLVER_PROXY_GCS_HTTP_TIMEOUT = int(get_env('RESOLVER_PROXY_GCS_HTTP_TIMEOUT', 5))
 RESOLVER_PROXY_ENABLE_ETAG_CACHE = get_bool_env('RESOLVER_PROXY_ENABLE_ETAG_CACHE', True)
 RESOLVER_PROXY_CACHE_TIMEOUT = int(get_env('RESOLVER_PROXY_CACHE_TIMEOUT', 3600))
+# Server-side on-disk LRU cache for media proxied from cloud storages
+RESOLVER_PROXY_MEDIA_CACHE_ENABLED = get_bool_env('RESOLVER_PROXY_MEDIA_CACHE_ENABLED', False)
+RESOLVER_PROXY_MEDIA_CACHE_DIR = get_env(
+    'RESOLVER_PROXY_MEDIA_CACHE_DIR', os.path.join(BASE_DATA_DIR, 'cache', 'storage_proxy')
+)
+RESOLVER_PROXY_MEDIA_CACHE_MAX_SIZE = int(get_env('RESOLVER_PROXY_MEDIA_CACHE_MAX_SIZE', 1024 * 1024 * 1024))
+RESOLVER_PROXY_MEDIA_CACHE_MAX_OBJECT_SIZE = int(
+    get_env('RESOLVER_PROXY_MEDIA_CACHE_MAX_OBJECT_SIZE', 64 * 1024 * 1024)
+)
+# seconds after which a cached object is revalidated against the storage ETag
+RESOLVER_PROXY_MEDIA_CACHE_TTL = int(get_env('RESOLVER_PROXY_MEDIA_CACHE_TTL', 300))
+
+# Number of distinct label configs with parsed artifacts kept in memory of each worker, 0 disables the cache
+LABEL_CONFIG_CACHE_SIZE = int(get_env('LABEL_CONFIG_CACHE_SIZE', 256))
+# Share parsed label configs between workers via the default cache (makes sense with CACHE_BACKEND=redis or file)
+LABEL_CONFIG_CACHE_SHARED = get_bool_env('LABEL_CONFIG_CACHE_SHARED', False)
+LABEL_CONFIG_CACHE_SHARED_TTL = int(get_env('LABEL_CONFIG_CACHE_SHARED_TTL', 24 * 60 * 60))
+
+# Prometheus metrics on /metrics: request latency and db queries per view, rq jobs, hot path timers.
+# Metrics are aggregated in Redis if it's connected, so all gunicorn and rq workers are reported together
+METRICS_ENABLED = get_bool_env('METRICS_ENABLED', False)
+
+# Cache for lookups reused across requests (resolved user roles, parsed label configs):
+# locmem - memory of each worker, file - shared by workers on one host, redis - shared by all hosts, dummy - disabled
+CACHE_BACKEND = get_env('CACHE_BACKEND', 'locmem')
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'label-studio',
+        'OPTIONS': {'MAX_ENTRIES': int(get_env('CACHE_MAX_ENTRIES', 10000))},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': get_env('CACHE_LOCATION', os.path.join(BASE_DATA_DIR, 'cache', 'django')),
+        'OPTIONS': {'MAX_ENTRIES': int(get_env('CACHE_MAX_ENTRIES', 10000))},
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': get_env('CACHE_LOCATION', 'redis://localhost:6379/1'),
+        # don't hang requests for long if redis is unavailable
+        'OPTIONS': {'socket_connect_timeout': 1, 'socket_timeout': 1},
+    },
+    'dummy': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(f'CACHE_BACKEND must be one of {", ".join(CACHE_BACKENDS)}, got "{CACHE_BACKEND}"')
+# Only file and redis caches are shared by workers: data cached across requests and invalidated by signals
+# (user roles, storage flags, interactive payloads) can be kept in them without serving stale values
+CACHE_SHARED = CACHE_BACKEND in ('file', 'redis')
+CACHES = {
+    'default': {
+        **CACHE_BACKENDS[CACHE_BACKEND],
+        'TIMEOUT': int(get_env('CACHE_TIMEOUT', 300)),
+        'KEY_PREFIX': get_env('CACHE_KEY_PREFIX', 'ls'),
+    }
+}
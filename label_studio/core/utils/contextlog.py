@@ -1,12 +1,14 @@
 """This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
 """
 
+import atexit
 import calendar
 import io
 import json
 import logging
 import os
 import platform
+import queue
 import sys
 import threading
 from datetime import datetime
@@ -20,6 +22,8 @@ from .io import find_file, get_config_dir
 
 logger = logging.getLogger(__name__)
 
+CONTEXTLOG_URL = 'https://tele.labelstud.io'
+
 
 def _load_log_payloads():
     try:
@@ -38,6 +42,86 @@ def _load_log_payloads():
     return out
 
 
+class ContextLogSender:
+    """Ships context log payloads in background: one daemon thread per process reads a bounded queue.
+
+    Payloads are taken from the queue in batches and posted over one keep-alive session.
+    If the endpoint is slow or unavailable and the queue is full, new payloads are dropped,
+    so requests are never blocked by the context log. Queued payloads are flushed at exit.
+    """
+
+    _stop = object()
+
+    def __init__(self):
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def _ensure_started(self):
+        # the thread doesn't survive fork of gunicorn / uwsgi workers, so it's started in each process
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid is None:
+                atexit.register(self.flush)
+            self._queue = queue.Queue(maxsize=settings.CONTEXTLOG_QUEUE_SIZE)
+            self._thread = threading.Thread(target=self._run, name='contextlog-sender', daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def put(self, payload):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(payload)
+        except queue.Full:
+            self.dropped += 1
+            logger.debug(f'Context log queue is full, payload is dropped ({self.dropped} dropped in total)')
+
+    def _get_batch(self):
+        batch = [self._queue.get()]
+        while len(batch) < settings.CONTEXTLOG_BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        session = requests.Session()
+        while True:
+            batch = self._get_batch()
+            stop = self._stop in batch
+            for payload in batch:
+                if payload is not self._stop:
+                    send_payload(payload, session)
+            if stop:
+                return
+
+    def flush(self, timeout=5):
+        """Send queued payloads and stop the thread, it's called at exit"""
+        if self._pid != os.getpid() or not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(self._stop, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+def send_payload(payload, session=requests):
+    try:
+        session.post(url=CONTEXTLOG_URL, json=payload, timeout=3.0)
+    except:  # noqa: E722
+        pass
+
+
+sender = ContextLogSender()
+
+
 class ContextLog(object):
 
     _log_payloads = _load_log_payloads()
@@ -220,10 +304,9 @@ class ContextLog(object):
                 logger.debug('In DEBUG mode, contextlog is not sent.')
                 logger.debug(json.dumps(payload, indent=2))
             elif settings.CONTEXTLOG_SYNC:
-                self.send_job(request, response, body)
+                send_payload(payload)
             else:
-                thread = threading.Thread(target=self.send_job, args=(request, response, body))
-                thread.start()
+                sender.put(payload)
 
     @staticmethod
     def browser_exists(request):
@@ -321,15 +404,3 @@ class ContextLog(object):
         for key in ('json', 'response', 'values'):
             payload[key] = payload[key] or None
         return payload
-
-    def send_job(self, request, response, body):
-        try:
-            payload = self.create_payload(request, response, body)
-        except:  # noqa: E722
-            pass
-        else:
-            try:
-                url = 'https://tele.labelstud.io'
-                requests.post(url=url, json=payload, timeout=3.0)
-            except:  # noqa: E722
-                pass
@@ -1,5 +1,5 @@
 import logging
-from typing import Optional, TypeVar
+from typing import Iterator, List, Optional, TypeVar
 
 from django.db import models
 from django.db.models import Model, QuerySet, Subquery
@@ -30,3 +30,18 @@ def fast_first_or_create(model, **model_params) -> Optional[ModelType]:
     if instance := fast_first(model.objects.filter(**model_params)):
         return instance
     return model.objects.create(**model_params)
+
+
+def batch_ids(queryset: QuerySet, batch_size: int, start_after: Optional[int] = None) -> Iterator[List[int]]:
+    """Iterate over ids of queryset in ascending chunks using keyset pagination (id > last id).
+    Ids are not loaded all at once, and the last id of a chunk can be saved to continue iteration later
+    """
+    queryset = queryset.order_by('id')
+    last_id = start_after
+    while True:
+        chunk = queryset.filter(id__gt=last_id) if last_id is not None else queryset
+        ids = list(chunk.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
@@ -15,8 +15,10 @@ import requests
 import ujson as json
 import yaml
 from appdirs import user_cache_dir, user_config_dir, user_data_dir
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.core.files.temp import NamedTemporaryFile
+from django.core.handlers.asgi import ASGIRequest
 from urllib3.util import parse_url
 
 # full path import results in unit test failures
@@ -271,3 +273,26 @@ def ssrf_safe_get(url, *args, **kwargs):
         response_ip = response.raw._connection.sock.getpeername()[0]
         validate_ip(response_ip)
     return response
+
+
+def is_asgi_request(request):
+    """Check if request is served by ASGI handler, so the response can be streamed asynchronously"""
+    # unwrap DRF request
+    request = getattr(request, '_request', request)
+    return isinstance(request, ASGIRequest)
+
+
+async def iterate_in_thread(iterator):
+    """Turn a blocking iterator (cloud SDK streams, file reads) into an async one.
+
+    Every next() call runs in a thread pool, so the event loop keeps serving other streams
+    while this one waits for data.
+    """
+    iterator = iter(iterator)
+    next_item = sync_to_async(next, thread_sensitive=False)
+    sentinel = object()
+    while True:
+        item = await next_item(iterator, sentinel)
+        if item is sentinel:
+            return
+        yield item
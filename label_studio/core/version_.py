@@ -0,0 +1,4 @@
+info = {"message": "[user-037] fix: format context log test with blue", "commit": "28dbd3968d3f7f453847b2554f1786c552b6e3bc", "date": "2026/10/19 08:59:33", "branch": "", "version": "28dbd39"}
+
+# This file is automatically generated by version.py
+# Do not include it to git!
@@ -14,8 +14,9 @@ import requests
 from core import utils
 from core.feature_flags import all_flags, flag_set, get_feature_file_path
 from core.label_config import generate_time_series_json
+from core.metrics import render as render_metrics
 from core.utils.common import collect_versions
-from core.utils.io import find_file
+from core.utils.io import find_file, is_asgi_request, iterate_in_thread
 from django.conf import settings
 from django.contrib.auth import logout
 from django.db.models import CharField, F, Value
@@ -24,13 +25,15 @@ from django.http import (
     HttpResponseForbidden,
     HttpResponseNotFound,
     JsonResponse,
+    StreamingHttpResponse,
 )
 from django.shortcuts import redirect, render, reverse
 from django.utils._os import safe_join
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from drf_yasg.utils import swagger_auto_schema
-from io_storages.localfiles.models import LocalFilesImportStorage
+from io_storages.localfiles.models import LocalFilesImportStorage, LocalFileStream
+from io_storages.utils import parse_range
 from ranged_fileresponse import RangedFileResponse
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
@@ -99,8 +102,10 @@ def health(request):
 
 
 def metrics(request):
-    """Empty page for metrics evaluation"""
-    return HttpResponse('')
+    """Prometheus metrics, empty page if METRICS_ENABLED is off"""
+    if not settings.METRICS_ENABLED:
+        return HttpResponse('')
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 class TriggerAPIError(APIView):
@@ -230,6 +235,8 @@ def localfiles_data(request):
         if user_has_permissions and os.path.exists(full_path):
             content_type, encoding = mimetypes.guess_type(str(full_path))
             content_type = content_type or 'application/octet-stream'
+            if is_asgi_request(request):
+                return async_ranged_file_response(request, full_path, content_type)
             return RangedFileResponse(request, open(full_path, mode='rb'), content_type)
         else:
             return HttpResponseNotFound()
@@ -237,6 +244,36 @@ def localfiles_data(request):
     return HttpResponseForbidden()
 
 
+def async_ranged_file_response(request, full_path, content_type):
+    """Stream a local file with Range support through an async iterator,
+    so ASGI workers aren't blocked by file reads and don't buffer the whole file in memory"""
+    size = os.path.getsize(full_path)
+    start, end = parse_range(request.headers.get('Range'))
+    if start is None:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        end = size - 1 if end == '' or end >= size else end
+        status_code = 206
+
+    if size and (start >= size or end < start):
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    length = max(end - start + 1, 0)
+    stream = LocalFileStream(full_path, start=start, length=length)
+    response = StreamingHttpResponse(
+        iterate_in_thread(stream.iter_chunks(chunk_size=settings.RESOLVER_PROXY_BUFFER_SIZE)),
+        content_type=content_type,
+        status=status_code,
+    )
+    response['Content-Length'] = str(length)
+    response['Accept-Ranges'] = 'bytes'
+    if status_code == 206:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
+
+
 def static_file_with_host_resolver(path_on_disk, content_type):
     """Load any file, replace {{HOSTNAME}} => settings.HOSTNAME, send it as http response"""
     path_on_disk = os.path.join(os.path.dirname(__file__), path_on_disk)
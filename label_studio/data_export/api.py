@@ -25,6 +25,7 @@ from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from tasks.models import Task
+from users import role_resolver
 
 from .models import ConvertedFormat, DataExport, Export
 from .serializers import (
@@ -89,21 +90,7 @@ class ExportFormatsListAPI(generics.RetrieveAPIView):
     
     def _is_user_admin(self):
         """Check if user is admin (staff or has admin role)"""
-        # Check Django staff status
-        if self.request.user.is_staff:
-            return True
-            
-        # Check custom role system
-        try:
-            from users.role_models import UserRoleAssignment
-            return UserRoleAssignment.objects.filter(
-                user=self.request.user,
-                role__name__in=['admin', 'administrator'],
-                is_active=True
-            ).exists()
-        except ImportError:
-            # Fallback to staff check if role system not available
-            return False
+        return self.request.user.is_staff or role_resolver.has_role(self.request.user, ['admin', 'administrator'])
 
     def get(self, request, *args, **kwargs):
         project = self.get_object()
@@ -211,21 +198,7 @@ class ExportAPI(generics.RetrieveAPIView):
     
     def _is_user_admin(self):
         """Check if user is admin (staff or has admin role)"""
-        # Check Django staff status
-        if self.request.user.is_staff:
-            return True
-            
-        # Check custom role system
-        try:
-            from users.role_models import UserRoleAssignment
-            return UserRoleAssignment.objects.filter(
-                user=self.request.user,
-                role__name__in=['admin', 'administrator'],
-                is_active=True
-            ).exists()
-        except ImportError:
-            # Fallback to staff check if role system not available
-            return False
+        return self.request.user.is_staff or role_resolver.has_role(self.request.user, ['admin', 'administrator'])
 
     def get_task_queryset(self, queryset):
         return queryset.select_related('project').prefetch_related('annotations', 'predictions')
@@ -315,21 +288,7 @@ class ProjectExportFiles(generics.RetrieveAPIView):
     
     def _is_user_admin(self):
         """Check if user is admin (staff or has admin role)"""
-        # Check Django staff status
-        if self.request.user.is_staff:
-            return True
-            
-        # Check custom role system
-        try:
-            from users.role_models import UserRoleAssignment
-            return UserRoleAssignment.objects.filter(
-                user=self.request.user,
-                role__name__in=['admin', 'administrator'],
-                is_active=True
-            ).exists()
-        except ImportError:
-            # Fallback to staff check if role system not available
-            return False
+        return self.request.user.is_staff or role_resolver.has_role(self.request.user, ['admin', 'administrator'])
 
     def get(self, request, *args, **kwargs):
         # project permission check
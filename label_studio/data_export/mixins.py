@@ -8,6 +8,7 @@ from datetime import datetime
 from functools import reduce
 
 import django_rq
+from core.metrics import timed
 from core.redis import redis_connected
 from core.utils.common import batch
 from core.utils.io import (
@@ -251,6 +252,7 @@ class ExportMixin:
         self.md5 = md5
         self.save(update_fields=['file', 'md5', 'counters'])
 
+    @timed('export_to_file')
     def export_to_file(self, task_filter_options=None, annotation_filter_options=None, serialization_options=None):
         logger.debug(
             f'Run export for {self.id} with params:\n'
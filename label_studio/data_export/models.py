@@ -155,7 +155,14 @@ class DataExport(object):
         name = 'project-' + str(project.id) + '-at-' + now.strftime('%Y-%m-%d-%H-%M') + f'-{md5[0:8]}'
 
         input_json = DataExport.save_export_files(project, now, get_args, data, md5, name)
+        return DataExport.convert_export_file(project, input_json, name, output_format, download_resources, hostname)
 
+    @staticmethod
+    def convert_export_file(project, input_json, name, output_format, download_resources, hostname=None):
+        """Convert JSON export file to the output format and return it as an open file object.
+
+        Be sure to close the file after using it, to avoid wasting disk space.
+        """
         converter = Converter(
             config=project.get_parsed_config(),
             project_dir=None,
@@ -1,5 +1,6 @@
 """This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
 """
+import itertools
 import json
 import logging
 import mimetypes
@@ -28,8 +29,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.settings import api_settings
 from rest_framework.views import APIView
-from tasks.functions import update_tasks_counters
-from tasks.models import Prediction, Task
+from tasks.models import Task
 from users.models import User
 from webhooks.models import WebhookAction
 from webhooks.utils import emit_webhooks_for_instance
@@ -44,6 +44,7 @@ from .functions import (
     set_reimport_background_failure,
 )
 from .models import FileUpload
+from .predictions import NDJSONParser, PredictionsImport, read_uploaded_file
 from .serializers import FileUploadSerializer, ImportApiSerializer, PredictionSerializer
 from .uploader import create_file_uploads, load_tasks
 
@@ -390,39 +391,31 @@ class ImportAPI(generics.CreateAPIView):
 # Import
 class ImportPredictionsAPI(generics.CreateAPIView):
     permission_required = all_permissions.projects_change
-    parser_classes = (JSONParser, MultiPartParser, FormParser)
+    parser_classes = (JSONParser, NDJSONParser, MultiPartParser, FormParser)
     serializer_class = PredictionSerializer
     queryset = Project.objects.all()
     swagger_schema = None  # TODO: create API schema
 
+    def get_items(self, request):
+        """Predictions from JSON list, NDJSON body (application/x-ndjson) or uploaded .json/.jsonl files"""
+        if request.FILES:
+            return itertools.chain.from_iterable(read_uploaded_file(f) for f in request.FILES.values())
+        if isinstance(request.data, dict):
+            return [request.data]
+        return request.data
+
     def create(self, request, *args, **kwargs):
         # check project permissions
         project = self.get_object()
 
-        tasks_ids = set(Task.objects.filter(project=project).values_list('id', flat=True))
-
-        logger.debug(
-            f'Importing {len(self.request.data)} predictions to project {project} with {len(tasks_ids)} tasks'
-        )
-        predictions = []
-        for item in self.request.data:
-            if item.get('task') not in tasks_ids:
-                raise ValidationError(
-                    f'{item} contains invalid "task" field: corresponding task ID couldn\'t be retrieved '
-                    f'from project {project} tasks'
-                )
-            predictions.append(
-                Prediction(
-                    task_id=item['task'],
-                    project_id=project.id,
-                    result=Prediction.prepare_prediction_result(item.get('result'), project),
-                    score=item.get('score'),
-                    model_version=item.get('model_version', 'undefined'),
-                )
-            )
-        predictions_obj = Prediction.objects.bulk_create(predictions, batch_size=settings.BATCH_SIZE)
-        start_job_async_or_sync(update_tasks_counters, Task.objects.filter(id__in=tasks_ids))
-        return Response({'created': len(predictions_obj)}, status=status.HTTP_201_CREATED)
+        logger.debug(f'Importing predictions to project {project}')
+        predictions_import = PredictionsImport(project).run(self.get_items(request))
+        response = {'created': predictions_import.created}
+        if predictions_import.failed:
+            response.update({'failed': predictions_import.failed, 'errors': predictions_import.errors})
+        if predictions_import.failed and not predictions_import.created:
+            return Response(response, status=status.HTTP_400_BAD_REQUEST)
+        return Response(response, status=status.HTTP_201_CREATED)
 
 
 class TasksBulkCreateAPI(ImportAPI):
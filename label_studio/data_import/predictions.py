@@ -0,0 +1,148 @@
+"""This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
+"""
+import itertools
+import logging
+
+import ujson as json
+from core.utils.db import SQCount
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import BaseParser
+from tasks.models import Prediction, Task, update_project_counters
+
+logger = logging.getLogger(__name__)
+
+# the response contains only the first errors, the rest are counted
+MAX_REPORTED_ERRORS = 100
+
+
+class NDJSONParser(BaseParser):
+    """Newline delimited JSON: request.data is an iterator over non-empty lines,
+    the request body is read while lines are consumed, it's never loaded into memory at once
+    """
+
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if stream is None:
+            return iter(())
+        return read_lines(stream)
+
+
+def read_lines(stream):
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield line
+
+
+def read_uploaded_file(uploaded_file):
+    """Predictions from uploaded .json file (list or one object) or line by line from .jsonl/.ndjson file"""
+    if uploaded_file.name.endswith('.json'):
+        items = json.load(uploaded_file)
+        return items if isinstance(items, list) else [items]
+    return read_lines(uploaded_file)
+
+
+class PredictionsImport:
+    """Validate and bulk insert predictions into project tasks batch by batch.
+
+    Items are dicts {"task": id, "result": ..., "score": ..., "model_version": ...} or undecoded JSON lines,
+    they can be a lazy iterator of any length: only one batch is kept in memory.
+    Invalid items are skipped and reported in errors with their index in the input.
+    """
+
+    def __init__(self, project, batch_size=None):
+        self.project = project
+        self.batch_size = batch_size or settings.BATCH_SIZE
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def run(self, items):
+        # parsed config is cached in the project, so results are validated without config parsing
+        parsed_config = self.project.get_parsed_config()
+        items = enumerate(items)
+        while batch := list(itertools.islice(items, self.batch_size)):
+            self.import_batch(batch, parsed_config)
+        logger.info(f'Imported {self.created} predictions to project {self.project.id}, {self.failed} failed')
+        return self
+
+    def add_error(self, index, error):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'index': index, 'error': error})
+
+    def import_batch(self, batch, parsed_config):
+        items = []
+        for index, item in batch:
+            try:
+                items.append((index, self.decode_item(item)))
+            except (ValueError, TypeError) as exc:
+                self.add_error(index, str(exc))
+
+        # one query to check all task ids of the batch
+        task_ids = {item['task'] for _, item in items}
+        existing_task_ids = set(
+            Task.objects.filter(project=self.project, id__in=task_ids).values_list('id', flat=True)
+        )
+
+        predictions = []
+        for index, item in items:
+            if item['task'] not in existing_task_ids:
+                self.add_error(index, f'Task {item["task"]} is not found in project {self.project.id}')
+                continue
+            try:
+                result = self.prepare_result(item.get('result'), parsed_config)
+            except ValidationError as exc:
+                self.add_error(index, '; '.join(str(detail) for detail in exc.detail))
+                continue
+            predictions.append(
+                Prediction(
+                    task_id=item['task'],
+                    project_id=self.project.id,
+                    result=result,
+                    score=item.get('score'),
+                    model_version=item.get('model_version', 'undefined'),
+                )
+            )
+        if not predictions:
+            return
+
+        touched_task_ids = {prediction.task_id for prediction in predictions}
+        with transaction.atomic():
+            Prediction.objects.bulk_create(predictions, batch_size=self.batch_size)
+            # counters of touched tasks only, one statement per batch
+            task_predictions = Prediction.objects.filter(task_id=OuterRef('id')).values('id')
+            Task.objects.filter(id__in=touched_task_ids).update(total_predictions=SQCount(task_predictions))
+            update_project_counters(self.project.id, total_predictions_number=len(predictions))
+        self.created += len(predictions)
+
+    @staticmethod
+    def decode_item(item):
+        if isinstance(item, (str, bytes)):
+            item = json.loads(item)
+        if not isinstance(item, dict):
+            raise ValueError(f'Prediction must be a JSON object, got {type(item).__name__}')
+        if 'task' not in item:
+            raise ValueError('Prediction must contain "task" field with task ID')
+        # bool is int, but it's not a task ID
+        if not isinstance(item['task'], int) or isinstance(item['task'], bool):
+            raise ValueError(f'Invalid "task" field {item["task"]}, it must be an integer task ID')
+        score = item.get('score')
+        if score is not None:
+            item['score'] = float(score)
+        return item
+
+    def prepare_result(self, raw_result, parsed_config):
+        result = Prediction.prepare_prediction_result(raw_result, self.project)
+        if result is None:
+            raise ValidationError(f"Prediction result {raw_result} doesn't match any control tag from labeling config")
+        if parsed_config:
+            for region in result:
+                from_name = region.get('from_name')
+                if from_name is not None and from_name not in parsed_config:
+                    raise ValidationError(f'Control tag "{from_name}" is not found in labeling config')
+        return result
@@ -43,7 +43,7 @@ def delete_tasks(project, queryset, **kwargs):
     queryset.update(project=None)
     # delete all project tasks
     if count == project_count:
-        start_job_async_or_sync(Task.delete_tasks_without_signals_from_task_ids, tasks_ids_list)
+        start_job_async_or_sync(Task.delete_tasks_without_signals_from_task_ids, tasks_ids_list, project.id)
         logger.info(f'calling reset project_id={project.id} delete_tasks()')
         project.summary.reset()
 
@@ -129,7 +129,8 @@ def async_project_summary_recalculation(tasks_ids_list, project_id):
     project = Project.objects.get(id=project_id)
     project.summary.remove_created_annotations_and_labels(Annotation.objects.filter(task__in=queryset))
     project.summary.remove_data_columns(queryset)
-    Task.delete_tasks_without_signals(queryset)
+    # tasks are already unlinked from the project
+    Task.delete_tasks_without_signals(queryset, project_ids=[project_id])
 
 
 actions = [
@@ -2,10 +2,13 @@
 """
 
 import logging
+from collections import Counter
 
+from core.label_config import get_label_interface
 from core.permissions import AllPermissions
-from core.redis import start_job_async_or_sync
-from label_studio_sdk.label_interface import LabelInterface
+from core.redis import start_job_async_or_sync, update_job_progress
+from core.utils.common import batch
+from django.conf import settings
 from tasks.models import Annotation, Prediction, Task
 
 logger = logging.getLogger(__name__)
@@ -13,13 +16,16 @@ all_permissions = AllPermissions()
 
 
 def cache_labels_job(project, queryset, **kwargs):
+    """Cache labels in task.data chunk by chunk:
+    one query for tasks and one query for annotations (or predictions) per chunk, then a bulk update
+    """
     request_data = kwargs['request_data']
     source = request_data.get('source', 'annotations').lower()
     assert source in ['annotations', 'predictions'], 'Source must be annotations or predictions'
     source_class = Annotation if source == 'annotations' else Prediction
     control_tag = request_data.get('custom_control_tag') or request_data.get('control_tag')
     with_counters = request_data.get('with_counters', 'Yes').lower() == 'yes'
-    label_interface = LabelInterface(project.label_config)
+    label_interface = get_label_interface(project.label_config)
     label_interface_tags = {tag.name: tag for tag in label_interface.find_tags('control')}
 
     if source == 'annotations':
@@ -34,35 +40,48 @@ def cache_labels_job(project, queryset, **kwargs):
     else:
         column_name = f'{column_name}_{control_tag}'
 
-    tasks = list(queryset.only('data'))
-    logger.info(f'Cache labels for {len(tasks)} tasks and control tag {control_tag}')
+    task_ids = list(queryset.values_list('id', flat=True))
+    total = len(task_ids)
+    logger.info(f'Cache labels for {total} tasks and control tag {control_tag}')
+
+    processed = 0
+    for chunk in batch(task_ids, settings.BATCH_SIZE):
+        tasks = list(Task.objects.filter(id__in=chunk).only('id', 'data'))
+
+        task_labels = {task.id: Counter() for task in tasks}
+        results = source_class.objects.filter(task_id__in=chunk).values_list('task_id', 'result')
+        for task_id, result in results.iterator(chunk_size=settings.BATCH_SIZE):
+            task_labels[task_id].update(extract_labels_from_result(result, control_tag, label_interface_tags))
+
+        for task in tasks:
+            labels = task_labels[task.id]
+            # cache labels in separate data column
+            # with counters
+            if with_counters:
+                task.data[column_name] = ', '.join(sorted(f'{label}: {count}' for label, count in labels.items()))
+            # no counters
+            else:
+                task.data[column_name] = ', '.join(sorted(labels))
+            task.data_hash = Task.compute_data_hash(task.data, project)
+
+        Task.objects.bulk_update(tasks, fields=['data', 'data_hash'], batch_size=settings.BATCH_SIZE)
+        processed += len(tasks)
+        update_job_progress(processed=processed, total=total)
+
+    # all tasks got the same new column, so one task is enough to update project summary
+    if task_ids:
+        first_task = Task.objects.get(id=task_ids[0])
+        project.summary.update_data_columns([first_task])
+    return {'response_code': 200, 'detail': f'Updated {processed} tasks'}
 
-    for task in tasks:
-        task_labels = []
-        annotations = source_class.objects.filter(task=task).only('result')
-        for annotation in annotations:
-            labels = extract_labels(annotation, control_tag, label_interface_tags)
-            task_labels.extend(labels)
 
-        # cache labels in separate data column
-        # with counters
-        if with_counters:
-            task.data[column_name] = ', '.join(
-                sorted([f'{label}: {task_labels.count(label)}' for label in set(task_labels)])
-            )
-        # no counters
-        else:
-            task.data[column_name] = ', '.join(sorted(list(set(task_labels))))
-
-    Task.objects.bulk_update(tasks, fields=['data'], batch_size=1000)
-    first_task = Task.objects.get(id=queryset.first().id)
-    project.summary.update_data_columns([first_task])
-    return {'response_code': 200, 'detail': f'Updated {len(tasks)} tasks'}
+def extract_labels(annotation, control_tag, label_interface_tags=None):
+    return extract_labels_from_result(annotation.result, control_tag, label_interface_tags)
 
 
-def extract_labels(annotation, control_tag, label_interface_tags=None):
+def extract_labels_from_result(result, control_tag, label_interface_tags=None):
     labels = []
-    for region in annotation.result:
+    for region in result or []:
         # find regions with specific control tag name or just all regions if control tag is None
         if (control_tag is None or region['from_name'] == control_tag) and 'value' in region:
             # scan value for a field with list of strings (eg choices, textareas)
@@ -168,7 +168,7 @@ def add_data_field(project, queryset, **kwargs):
     value = cast[value_type](value)
 
     if value_type == 'Expression':
-        add_expression(queryset, size, value, value_name)
+        add_expression(queryset, size, value, value_name, project)
 
     else:
 
@@ -177,7 +177,8 @@ def add_data_field(project, queryset, **kwargs):
             tasks = list(queryset.only('data'))
             for task in tasks:
                 task.data[value_name] = value
-            Task.objects.bulk_update(tasks, fields=['data'], batch_size=1000)
+                task.data_hash = Task.compute_data_hash(task.data, project)
+            Task.objects.bulk_update(tasks, fields=['data', 'data_hash'], batch_size=1000)
 
         # postgres and other DB
         else:
@@ -187,7 +188,9 @@ def add_data_field(project, queryset, **kwargs):
                     Value([value_name]),
                     Value(value, JSONField()),
                     function='jsonb_set',
-                )
+                ),
+                # hashes will be recalculated on demand
+                data_hash=None,
             )
 
     project.summary.update_data_columns([queryset.first()])
@@ -212,7 +215,7 @@ add_data_field_examples = (
 )
 
 
-def add_expression(queryset, size, value, value_name):
+def add_expression(queryset, size, value, value_name, project=None):
     # simple parsing
     command, args = value.split('(')
     args = process_arrays(args)
@@ -267,7 +270,9 @@ def add_expression(queryset, size, value, value_name):
     else:
         raise Exception('Undefined expression, you can use: ' + add_data_field_examples)
 
-    Task.objects.bulk_update(tasks, fields=['data'], batch_size=1000)
+    for task in tasks:
+        task.data_hash = Task.compute_data_hash(task.data, project)
+    Task.objects.bulk_update(tasks, fields=['data', 'data_hash'], batch_size=1000)
 
 
 def add_data_field_form(user, project):
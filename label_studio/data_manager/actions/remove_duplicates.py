@@ -4,17 +4,17 @@
 import logging
 from collections import defaultdict
 
-import ujson as json
-from core.label_config import replace_task_data_undefined_with_config_field
 from core.permissions import AllPermissions
 from core.redis import start_job_async_or_sync
 from data_manager.actions.basic import delete_tasks
+from django.conf import settings
+from django.db.models import Count
 from io_storages.azure_blob.models import AzureBlobImportStorageLink
 from io_storages.gcs.models import GCSImportStorageLink
 from io_storages.localfiles.models import LocalFilesImportStorageLink
 from io_storages.redis.models import RedisImportStorageLink
 from io_storages.s3.models import S3ImportStorageLink
-from tasks.models import Task
+from tasks.models import Annotation, Task
 
 logger = logging.getLogger(__name__)
 all_permissions = AllPermissions()
@@ -84,24 +84,26 @@ def remove_duplicated_tasks(duplicates, project, queryset):
                 removing.append(task['id'])
 
     # get the final queryset for removing tasks
-    queryset = queryset.filter(id__in=removing, annotations__isnull=True)
-    kept = queryset.exclude(id__in=removing, annotations__isnull=True)
+    kept = Task.objects.filter(id__in=queryset.values('id')).exclude(id__in=removing)
+    queryset = Task.objects.filter(id__in=removing, annotations__isnull=True)
 
     # check that we don't remove tasks with annotations
-    if queryset.count() != len(removing):
+    removing_count = queryset.count()
+    if removing_count != len(removing):
         raise Exception(
             f'Remove duplicates failed, operation is not finished: '
-            f'queryset count {queryset.count()} != removing {len(removing)}. '
+            f'queryset count {removing_count} != removing {len(removing)}. '
             'It means that some of duplicated tasks have been annotated twice or more.'
         )
 
-    delete_tasks(project, queryset)
+    if removing:
+        delete_tasks(project, queryset)
     logger.info(f'Removed {len(removing)} duplicated tasks')
     return kept
 
 
 def move_annotations(duplicates):
-    """Move annotations to the first task from duplicated tasks"""
+    """Move annotations to the first task from duplicated tasks, one update query per duplicates group"""
     total_moved_annotations = 0
 
     for data in duplicates:
@@ -116,17 +118,21 @@ def move_annotations(duplicates):
             if task['total_annotations'] + task['cancelled_annotations'] > 0:
                 break
 
-        # move annotations to the first task
+        # move annotations from all other tasks of the group to the first task
+        source_ids = []
         for task in root[i + 1 :]:
             if task['total_annotations'] + task['cancelled_annotations'] > 0:
-                Task.objects.get(id=task['id']).annotations.update(task_id=first['id'])
+                source_ids.append(task['id'])
                 total_moved_annotations += task['total_annotations'] + task['cancelled_annotations']
-                logger.info(
-                    f"Moved {task['total_annotations']} annotations from task {task['id']} to task {first['id']}"
-                )
                 task['total_annotations'] = 0
                 task['cancelled_annotations'] = 0
 
+        if source_ids:
+            Annotation.objects.filter(task_id__in=source_ids).update(task_id=first['id'])
+            logger.info(f"Moved annotations from tasks {source_ids} to task {first['id']}")
+
+    logger.info(f'Moved {total_moved_annotations} annotations for duplicated tasks')
+
 
 def restore_storage_links_for_duplicated_tasks(duplicates) -> None:
     """Build storage links for duplicated tasks and save them to Task in DB"""
@@ -141,7 +147,7 @@ def restore_storage_links_for_duplicated_tasks(duplicates) -> None:
         # 'lse_io_storages_lses3importstoragelink'  # not supported yet
     }
 
-    total_restored_links = 0
+    new_links = defaultdict(list)
     for data in list(duplicates):
         tasks = duplicates[data]
 
@@ -174,19 +180,49 @@ def restore_storage_links_for_duplicated_tasks(duplicates) -> None:
                     key=link_instance.key,
                     row_index=link_instance.row_index,
                     row_group=link_instance.row_group,
-                    storage=link_instance.storage,
+                    storage_id=link_instance.storage_id,
                 )
-                link.save()
-                total_restored_links += 1
+                new_links[storage_link_class].append(link)
                 logger.info(
                     f"Restored storage link for task {task['id']} from source task {tasks_with_storagelinks[0]['id']}"
                 )
 
+    total_restored_links = 0
+    for storage_link_class, links in new_links.items():
+        storage_link_class.objects.bulk_create(links, batch_size=settings.BATCH_SIZE)
+        total_restored_links += len(links)
+
     logger.info(f'Restored {total_restored_links} storage links for duplicated tasks')
 
 
+def update_tasks_data_hash(project, queryset):
+    """Calculate missing task data hashes (tasks created before hashes were introduced
+    or updated with bulk operations) in chunks without loading the whole project into memory
+    """
+    first_key = next(iter(project.data_types.keys()), None)
+    tasks = Task.objects.filter(id__in=queryset.values('id'), data_hash__isnull=True).only('id', 'data')
+
+    batch, total = [], 0
+    for task in tasks.iterator(chunk_size=settings.BATCH_SIZE):
+        task.data_hash = Task.compute_data_hash(task.data, first_key=first_key)
+        batch.append(task)
+        if len(batch) >= settings.BATCH_SIZE:
+            Task.objects.bulk_update(batch, fields=['data_hash'])
+            total += len(batch)
+            batch = []
+    if batch:
+        Task.objects.bulk_update(batch, fields=['data_hash'])
+        total += len(batch)
+
+    if total:
+        logger.info(f'Calculated data hashes for {total} tasks')
+
+
 def find_duplicated_tasks_by_data(project, queryset):
-    """Find duplicated tasks by `task.data` and return them as a dict"""
+    """Find duplicated tasks by `task.data` hashes and return them as a dict {data_hash: [task, ...]},
+    grouping is done in the database, so only duplicated tasks are loaded
+    """
+    update_tasks_data_hash(project, queryset)
 
     # get io_storage_* links for tasks, we need to copy them
     storages = []
@@ -194,22 +230,26 @@ def find_duplicated_tasks_by_data(project, queryset):
         if field.startswith('io_storages_'):
             storages += [field]
 
-    groups = defaultdict(list)
-    tasks = list(queryset.values('data', 'id', 'total_annotations', 'cancelled_annotations', *storages))
-    logger.info(f'Retrieved {len(tasks)} tasks from queryset')
+    tasks = Task.objects.filter(id__in=queryset.values('id'))
+    duplicated_hashes = (
+        tasks.order_by().values('data_hash').annotate(count=Count('id')).filter(count__gt=1).values('data_hash')
+    )
+    rows = (
+        tasks.filter(data_hash__in=duplicated_hashes)
+        .values('id', 'data_hash', 'total_annotations', 'cancelled_annotations', *storages)
+        .order_by('id')
+    )
 
-    for task in list(tasks):
-        replace_task_data_undefined_with_config_field(task['data'], project)
-        task['data'] = json.dumps(task['data'])
-        groups[task['data']].append(task)
+    duplicates = defaultdict(list)
+    for task in rows:
+        duplicates[task.pop('data_hash')].append(task)
 
     # make groups of duplicated ids for info print
-    duplicates = {d: groups[d] for d in groups if len(groups[d]) > 1}
     info = {d: [task['id'] for task in duplicates[d]] for d in duplicates}
 
     logger.info(f'Found {len(duplicates)} duplicated tasks')
     logger.info(f'Duplicated tasks: {info}')
-    return duplicates
+    return dict(duplicates)
 
 
 actions = [
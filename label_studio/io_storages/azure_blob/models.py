@@ -10,12 +10,9 @@ from urllib.parse import urlparse
 
 from azure.core.exceptions import ResourceNotFoundError
 from azure.storage.blob import BlobSasPermissions, BlobServiceClient, generate_blob_sas
-from core.redis import start_job_async_or_sync
 from core.utils.params import get_env
 from django.conf import settings
 from django.db import models
-from django.db.models.signals import post_save
-from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from io_storages.base_models import (
@@ -31,7 +28,6 @@ from io_storages.utils import (
     parse_range,
     storage_can_resolve_bucket_url,
 )
-from tasks.models import Annotation
 
 from label_studio.io_storages.azure_blob.utils import AZURE
 
@@ -281,21 +277,6 @@ class AzureBlobExportStorage(AzureBlobStorageMixin, ExportStorage):  # note: ord
         AzureBlobExportStorageLink.create(annotation, self)
 
 
-def async_export_annotation_to_azure_storages(annotation):
-    project = annotation.project
-    if hasattr(project, 'io_storages_azureblobexportstorages'):
-        for storage in project.io_storages_azureblobexportstorages.all():
-            logger.debug(f'Export {annotation} to Azure Blob storage {storage}')
-            storage.save_annotation(annotation)
-
-
-@receiver(post_save, sender=Annotation)
-def export_annotation_to_azure_storages(sender, instance, **kwargs):
-    storages = getattr(instance.project, 'io_storages_azureblobexportstorages', None)
-    if storages and storages.exists():  # avoid excess jobs in rq
-        start_job_async_or_sync(async_export_annotation_to_azure_storages, instance)
-
-
 class AzureBlobImportStorageLink(ImportStorageLink):
     storage = models.ForeignKey(AzureBlobImportStorage, on_delete=models.CASCADE, related_name='links')
 
@@ -10,13 +10,14 @@ import traceback as tb
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import asdict
 from datetime import datetime
-from typing import Union
+from typing import List, Union
 from urllib.parse import urljoin
 
 import django_rq
 import rq
 import rq.exceptions
 from core.feature_flags import flag_set
+from core.metrics import timed
 from core.redis import is_job_in_queue, is_job_on_worker, redis_connected
 from core.utils.common import load_func
 from data_export.serializers import ExportDataSerializer
@@ -80,8 +81,11 @@ class StorageInfo(models.Model):
         self.last_sync_job = None
         self.status = self.Status.QUEUED
 
-        # reset and init meta
-        self.meta = {'attempts': self.meta.get('attempts', 0) + 1, 'time_queued': str(timezone.now())}
+        # reset and init meta, keep only info about the previous complete scan for incremental syncs
+        meta = {'attempts': self.meta.get('attempts', 0) + 1, 'time_queued': str(timezone.now())}
+        if 'last_scan' in self.meta:
+            meta['last_scan'] = self.meta['last_scan']
+        self.meta = meta
 
         self.save(update_fields=['last_sync_job', 'last_sync', 'last_sync_count', 'status', 'meta'])
 
@@ -329,6 +333,7 @@ class ImportStorage(Storage):
             except Exception:
                 logger.info(f"Can't resolve URI={uri}", exc_info=True)
 
+    @timed('scan_and_create_links')
     def _scan_and_create_links_v2(self):
         # Async job execution for batch of objects:
         # e.g. GCS example
@@ -409,6 +414,7 @@ class ImportStorage(Storage):
         return task
         # FIXME: add_annotation_history / post_process_annotations should be here
 
+    @timed('scan_and_create_links')
     def _scan_and_create_links(self, link_class):
         """
         TODO: deprecate this function and transform it to "pipeline" version  _scan_and_create_links_v2,
@@ -655,6 +661,30 @@ class ExportStorage(Storage, ProjectStorageMixin):
 
         self.info_set_completed(last_sync_count=annotation_exported, total_annotations=total_annotations)
 
+    def save_annotations_batch(self, annotations: List[Annotation]):
+        """Save a batch of annotations in parallel threads without touching storage sync status,
+        it's used by realtime export. The first error is raised after the whole batch is processed
+        """
+        self.cached_user = self.project.organization.created_by
+        for annotation in annotations:
+            annotation.cached_user = self.cached_user
+        if len(annotations) == 1 or self.max_workers == 1:
+            for annotation in annotations:
+                self.save_annotation(annotation)
+            return
+
+        error = None
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.save_annotation, annotation): annotation for annotation in annotations}
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    future.result()
+                except Exception as exc:
+                    logger.error(f"Can't export {futures[future]} to {self.__class__.__name__} {self}: {exc}")
+                    error = error or exc
+        if error is not None:
+            raise error
+
     def save_all_annotations(self):
         self.save_annotations(Annotation.objects.filter(project=self.project))
 
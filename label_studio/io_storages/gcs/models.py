@@ -8,11 +8,8 @@ import urllib.parse
 from typing import Union
 from urllib.parse import urlparse
 
-from core.redis import start_job_async_or_sync
 from django.conf import settings
 from django.db import models
-from django.db.models.signals import post_save
-from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from google.auth.transport.requests import AuthorizedSession
 from io_storages.base_models import (
@@ -29,7 +26,6 @@ from io_storages.utils import (
     parse_range,
     storage_can_resolve_bucket_url,
 )
-from tasks.models import Annotation
 
 logger = logging.getLogger(__name__)
 
@@ -245,21 +241,6 @@ class GCSExportStorage(GCSStorageMixin, ExportStorage):
         GCSExportStorageLink.create(annotation, self)
 
 
-def async_export_annotation_to_gcs_storages(annotation):
-    project = annotation.project
-    if hasattr(project, 'io_storages_gcsexportstorages'):
-        for storage in project.io_storages_gcsexportstorages.all():
-            logger.debug(f'Export {annotation} to GCS storage {storage}')
-            storage.save_annotation(annotation)
-
-
-@receiver(post_save, sender=Annotation)
-def export_annotation_to_gcs_storages(sender, instance, **kwargs):
-    storages = getattr(instance.project, 'io_storages_gcsexportstorages', None)
-    if storages and storages.exists():  # avoid excess jobs in rq
-        start_job_async_or_sync(async_export_annotation_to_gcs_storages, instance)
-
-
 class GCSImportStorageLink(ImportStorageLink):
     storage = models.ForeignKey(GCSImportStorage, on_delete=models.CASCADE, related_name='links')
 
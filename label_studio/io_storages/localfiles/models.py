@@ -3,15 +3,18 @@
 
 import json
 import logging
+import mimetypes
 import os
+import posixpath
 import re
+import time
+from datetime import datetime, timezone
 from pathlib import Path
-from urllib.parse import quote
+from urllib.parse import parse_qs, quote, urlparse
 
 from django.conf import settings
 from django.db import models
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.utils._os import safe_join
 from django.utils.translation import gettext_lazy as _
 from io_storages.base_models import (
     ExportStorage,
@@ -20,12 +23,15 @@ from io_storages.base_models import (
     ImportStorageLink,
     ProjectStorageMixin,
 )
-from io_storages.utils import StorageObject, load_tasks_json
+from io_storages.localfiles.utils import scan_files
+from io_storages.utils import StorageObject, load_tasks_json, parse_range
 from rest_framework.exceptions import ValidationError
-from tasks.models import Annotation
 
 logger = logging.getLogger(__name__)
 
+# seconds subtracted from the previous scan time in incremental scans
+INCREMENTAL_SCAN_MARGIN = 300
+
 
 class LocalFilesMixin(models.Model):
     path = models.TextField(_('path'), null=True, blank=True, help_text='Local path')
@@ -60,6 +66,36 @@ class LocalFilesMixin(models.Model):
             )
 
 
+class LocalFileStream:
+    """File-backed stream with the same iter_chunks/close interface as the cloud storage bodies"""
+
+    def __init__(self, path, start=0, length=None):
+        self.path = path
+        self.start = start
+        self.length = length
+        self._file = None
+
+    def iter_chunks(self, chunk_size=1024 * 1024):
+        self._file = open(self.path, mode='rb')
+        try:
+            self._file.seek(self.start)
+            remaining = self.length
+            while remaining is None or remaining > 0:
+                chunk = self._file.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
 class LocalFilesImportStorageBase(LocalFilesMixin, ImportStorage):
     url_scheme = 'https'
 
@@ -67,17 +103,22 @@ class LocalFilesImportStorageBase(LocalFilesMixin, ImportStorage):
         return False
 
     def iterkeys(self):
-        path = Path(self.path)
         regex = re.compile(str(self.regex_filter)) if self.regex_filter else None
-        # For better control of imported tasks, file reading has been changed to ascending order of filenames.
+        # files modified before the previous complete scan of the same path and filter already have tasks
+        scan = {'path': self.path, 'regex_filter': self.regex_filter, 'started': time.time()}
+        previous_scan = self.meta.get('last_scan') or {}
+        modified_since = None
+        if settings.LOCAL_FILES_INCREMENTAL_SCAN and previous_scan.get('path') == self.path:
+            if previous_scan.get('regex_filter') == self.regex_filter:
+                # margin for clock difference between this host and a network file system
+                modified_since = previous_scan['started'] - INCREMENTAL_SCAN_MARGIN
+                logger.debug(f'{self}: scan files modified since {modified_since}')
+
+        # For better control of imported tasks, files are read in ascending order of filenames.
         # In other words, the task IDs are sorted by filename order.
-        for file in sorted(path.rglob('*'), key=os.path.basename):
-            if file.is_file():
-                key = file.name
-                if regex and not regex.match(key):
-                    logger.debug(key + ' is skipped by regex filter')
-                    continue
-                yield str(file)
+        yield from scan_files(self.path, regex=regex, modified_since=modified_since)
+        # meta is saved with the storage status when sync is completed
+        self.meta['last_scan'] = scan
 
     def get_data(self, key) -> list[StorageObject]:
         path = Path(key)
@@ -101,6 +142,53 @@ class LocalFilesImportStorageBase(LocalFilesMixin, ImportStorage):
     def scan_and_create_links(self):
         return self._scan_and_create_links(LocalFilesImportStorageLink)
 
+    def get_local_path(self, uri):
+        """Convert `/data/local-files/?d=<path>` URLs (or plain relative paths) to a path inside this storage"""
+        query = parse_qs(urlparse(uri).query)
+        relative_path = query['d'][0] if 'd' in query else uri
+        relative_path = posixpath.normpath(relative_path).lstrip('/')
+        full_path = Path(safe_join(settings.LOCAL_FILES_DOCUMENT_ROOT, relative_path))
+        if Path(self.path) not in full_path.parents:
+            raise ValueError(f'Path {full_path} is outside of storage path {self.path}')
+        return full_path
+
+    def get_bytes_stream(self, uri, range_header=None):
+        """Get local file as a stream with metadata in the same format as S3/GCS/Azure storages.
+
+        Args:
+            uri: `/data/local-files/?d=<path>` URL or a path relative to LOCAL_FILES_DOCUMENT_ROOT
+            range_header: Optional HTTP Range header in format ``bytes=start-end``
+
+        Returns:
+            Tuple of (stream with iter_chunks, content_type, metadata)
+        """
+        try:
+            full_path = self.get_local_path(uri)
+            stat = full_path.stat()
+            total_size = stat.st_size
+            content_type = mimetypes.guess_type(str(full_path))[0] or 'application/octet-stream'
+
+            start, end = parse_range(range_header)
+            if start is None:
+                start, end, status_code = 0, total_size - 1, 200
+            else:
+                end = total_size - 1 if end == '' or end >= total_size else end
+                status_code = 206
+            length = max(end - start + 1, 0)
+
+            metadata = {
+                'ETag': f'"{stat.st_mtime_ns:x}-{total_size:x}"',
+                'ContentLength': length,
+                'ContentRange': f'bytes {start}-{end}/{total_size}' if status_code == 206 else None,
+                'LastModified': datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+                'StatusCode': status_code,
+            }
+            return LocalFileStream(full_path, start=start, length=length), content_type, metadata
+
+        except Exception as e:
+            logger.error(f'Error getting bytes stream from local files for uri {uri}: {e}', exc_info=True)
+            return None, None, {}
+
     class Meta:
         abstract = True
 
@@ -133,12 +221,3 @@ class LocalFilesImportStorageLink(ImportStorageLink):
 
 class LocalFilesExportStorageLink(ExportStorageLink):
     storage = models.ForeignKey(LocalFilesExportStorage, on_delete=models.CASCADE, related_name='links')
-
-
-@receiver(post_save, sender=Annotation)
-def export_annotation_to_local_files(sender, instance, **kwargs):
-    project = instance.project
-    if hasattr(project, 'io_storages_localfilesexportstorages'):
-        for storage in project.io_storages_localfilesexportstorages.all():
-            logger.debug(f'Export {instance} to Local Storage {storage}')
-            storage.save_annotation(instance)
@@ -0,0 +1,54 @@
+"""This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
+"""
+import logging
+import os
+from typing import Iterator, Optional, Pattern
+
+logger = logging.getLogger(__name__)
+
+
+def scan_files(root: str, regex: Optional[Pattern] = None, modified_since: Optional[float] = None) -> Iterator[str]:
+    """Walk the directory tree with os.scandir and yield file paths as soon as each directory is read.
+
+    Files of a directory are yielded in ascending order of their names, then its subdirectories are walked
+    in the same order. Only one directory listing and the stack of pending directories are kept in memory.
+    Symlinks to files are followed, symlinks to directories are not (as in Path.rglob).
+
+    :param root: directory to walk
+    :param regex: file names not matching regex are skipped while reading a directory
+    :param modified_since: timestamp, skip files which were not modified or created after it
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        files, subdirectories = [], []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirectories.append(entry.name)
+                        elif entry.is_file():
+                            if regex and not regex.match(entry.name):
+                                logger.debug(entry.name + ' is skipped by regex filter')
+                                continue
+                            # ctime catches files copied with preserved mtime (cp -p, rsync -a)
+                            if modified_since is not None:
+                                stat = entry.stat()
+                                if max(stat.st_mtime, stat.st_ctime) < modified_since:
+                                    continue
+                            files.append(entry.name)
+                    except OSError as exc:
+                        logger.warning(f"Can't read {entry.path}: {exc}")
+        except OSError as exc:
+            if directory == root:
+                raise
+            logger.warning(f"Can't read directory {directory}: {exc}")
+            continue
+
+        files.sort()
+        for name in files:
+            yield os.path.join(directory, name)
+        # stack is LIFO, so push subdirectories in reverse order to walk them in ascending order
+        subdirectories.sort(reverse=True)
+        stack.extend(os.path.join(directory, name) for name in subdirectories)
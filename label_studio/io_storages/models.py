@@ -42,3 +42,6 @@ def get_storage_classes(storage_type='import'):
         storage_api_class = storage_decl[f'{storage_type}_list_api']
         storage_classes.append(storage_api_class.serializer_class.Meta.model)
     return storage_classes
+
+
+from .realtime_export import export_annotation_to_storages  # noqa: F401, E402
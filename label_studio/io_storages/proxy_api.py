@@ -4,7 +4,9 @@ import time
 from typing import Union
 from urllib.parse import unquote
 
+from asgiref.sync import sync_to_async
 from core.feature_flags import flag_set
+from core.utils.io import is_asgi_request, iterate_in_thread
 from django.conf import settings
 from django.http import HttpRequest, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
 from projects.models import Project
@@ -15,6 +17,7 @@ from rest_framework.views import APIView
 from tasks.models import Task
 
 from label_studio.io_storages.functions import get_storage_by_url
+from label_studio.io_storages.proxy_cache import get_proxy_media_cache
 from label_studio.io_storages.utils import parse_range
 
 logger = logging.getLogger(__name__)
@@ -127,6 +130,28 @@ class ResolveStorageUriAPIMixin:
                 f'Stream processing finished after {elapsed:.2f}s, yielded {chunks_yielded} chunks ({total_bytes} bytes)'
             )
 
+    async def async_chunker(self, stream_body):
+        """
+        Async generator over storage stream chunks, used when Label Studio is served by ASGI.
+
+        Blocking SDK reads run in a thread pool, so one worker serves many concurrent streams
+        and there is no need to limit stream time or range sizes as time_limited_chunker does.
+        """
+        chunk_size = settings.RESOLVER_PROXY_BUFFER_SIZE
+        total_bytes = 0
+        try:
+            async for chunk in iterate_in_thread(stream_body.iter_chunks(chunk_size=chunk_size)):
+                total_bytes += len(chunk)
+                yield chunk
+        except Exception as e:
+            logger.error(f'Error during async streaming: {e}', exc_info=True)
+        finally:
+            try:
+                await sync_to_async(stream_body.close, thread_sensitive=False)()
+            except Exception as e:
+                logger.debug(f"Couldn't close stream: {e}")
+            logger.debug(f'Async stream processing finished, yielded {total_bytes} bytes')
+
     def override_range_header(self, request):
         """
         Process and override Range header to limit stream size.
@@ -222,6 +247,30 @@ class ResolveStorageUriAPIMixin:
 
         return response
 
+    def proxy_data_from_cache(self, request, uri, project, storage, media_cache):
+        """
+        Serve the data from the server-side media cache, fetching the whole object on a miss.
+
+        Returns None if the object can't be cached (e.g. it's bigger than the max cached object size),
+        then it should be proxied from storage directly.
+        """
+        entry = media_cache.get_or_fetch(storage, uri)
+        if entry is None:
+            return None
+
+        # the whole object is on local disk, so there is no need to limit range sizes here
+        stream, metadata = media_cache.open_range(entry, request.headers.get('Range'))
+        if is_asgi_request(request):
+            stream = iterate_in_thread(stream)
+        response = StreamingHttpResponse(stream, content_type=entry.content_type, status=metadata['StatusCode'])
+        response = self.prepare_headers(response, metadata, request, project)
+
+        if settings.RESOLVER_PROXY_ENABLE_ETAG_CACHE and 'Range' not in request.headers:
+            if request.headers.get('If-None-Match') == response.headers.get('ETag'):
+                return HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+
+        return response
+
     def proxy_data_from_storage(self, request, uri, project, storage):
         """
         Proxy the data using iter_chunks directly from storage streaming object.
@@ -229,10 +278,20 @@ class ResolveStorageUriAPIMixin:
         This implementation forwards Range headers to cloud storages and streams the response
         directly using StreamingHttpResponse. It avoids any intermediate buffering
         but doesn't support backward seeking.
+        If RESOLVER_PROXY_MEDIA_CACHE_ENABLED is on, objects are served from the server-side media cache.
+        Under ASGI the stream is consumed asynchronously and Range headers are forwarded as is.
         """
         try:
-            # Process and limit the range header for downloaded files
-            range_header = self.override_range_header(request)
+            media_cache = get_proxy_media_cache()
+            if media_cache is not None:
+                response = self.proxy_data_from_cache(request, uri, project, storage, media_cache)
+                if response is not None:
+                    return response
+
+            use_async = is_asgi_request(request)
+            # Process and limit the range header for downloaded files,
+            # ASGI workers are not pinned by long streams, so they don't need the limit
+            range_header = request.headers.get('Range') if use_async else self.override_range_header(request)
 
             # Use the storage-specific method to get data stream and content type
             stream, content_type, metadata = storage.get_bytes_stream(uri, range_header=range_header)
@@ -244,13 +303,13 @@ class ResolveStorageUriAPIMixin:
                     status=status.HTTP_424_FAILED_DEPENDENCY,
                 )
 
-            # Create time-limited stream
-            time_limited_stream = self.time_limited_chunker(stream)
+            # Create async or time-limited stream
+            chunked_stream = self.async_chunker(stream) if use_async else self.time_limited_chunker(stream)
 
             # Set up streaming response with storage's status code
             status_code = metadata['StatusCode']
             response = StreamingHttpResponse(
-                time_limited_stream, content_type=content_type or 'application/octet-stream', status=status_code
+                chunked_stream, content_type=content_type or 'application/octet-stream', status=status_code
             )
 
             # Prepare response headers
@@ -0,0 +1,270 @@
+"""This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Optional
+
+from django.conf import settings
+from io_storages.utils import parse_range
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProxyCacheEntry:
+    """Metadata of one cached storage object, stored next to the data file as json"""
+
+    data_file: str
+    size: int
+    content_type: str
+    etag: str
+    last_modified: Optional[str]
+    validated_at: float
+
+
+class ProxyMediaCache:
+    """On-disk LRU cache for media objects proxied from import storages.
+
+    Objects are keyed by (storage, uri, ETag): every (storage, uri) pair has a json entry file
+    that points to the data file of the ETag it was fetched with. Entries are revalidated
+    against the storage ETag every `ttl` seconds with a 1-byte range request, so changed
+    objects are refetched instead of being served stale.
+
+    The cache directory can be shared between gunicorn workers: files are written to temp files
+    and atomically renamed, the LRU order is kept in file mtimes (touched on every hit),
+    and the total size is capped by evicting least recently used data files.
+    """
+
+    def __init__(self, cache_dir, max_size, max_object_size, ttl):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.max_object_size = max_object_size
+        self.ttl = ttl
+        self.stats = {'hits': 0, 'misses': 0, 'revalidations': 0, 'evictions': 0, 'bypasses': 0}
+        self._stats_lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _count(self, name, value=1):
+        with self._stats_lock:
+            self.stats[name] += value
+
+    @staticmethod
+    def _hash(value):
+        return hashlib.sha256(value.encode()).hexdigest()
+
+    def _entry_id(self, storage, uri):
+        return self._hash(f'{storage.__class__.__name__}:{storage.pk}:{uri}')
+
+    def _entry_path(self, entry_id):
+        return os.path.join(self.cache_dir, f'{entry_id}.json')
+
+    def _write_atomic(self, path, write):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _load_entry(self, entry_id) -> Optional[ProxyCacheEntry]:
+        try:
+            with open(self._entry_path(entry_id)) as f:
+                entry = ProxyCacheEntry(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+        if not os.path.exists(entry.data_file):
+            return None
+        return entry
+
+    def _save_entry(self, entry_id, entry: ProxyCacheEntry):
+        data = json.dumps(asdict(entry)).encode()
+        self._write_atomic(self._entry_path(entry_id), lambda f: f.write(data))
+
+    def _remove(self, *paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _close(stream):
+        try:
+            stream.close()
+        except Exception as e:
+            logger.debug(f"Couldn't close stream: {e}")
+
+    def _get_etag(self, storage, uri):
+        """Read the current object ETag from storage using a 1-byte range request"""
+        stream, _, metadata = storage.get_bytes_stream(uri, range_header='bytes=0-0')
+        if stream is not None:
+            self._close(stream)
+        return metadata.get('ETag')
+
+    def get(self, storage, uri) -> Optional[ProxyCacheEntry]:
+        """Return a valid cache entry for storage uri or None if it's not cached or outdated"""
+        entry_id = self._entry_id(storage, uri)
+        entry = self._load_entry(entry_id)
+        if entry is None:
+            return None
+
+        if time.time() - entry.validated_at > self.ttl:
+            self._count('revalidations')
+            etag = self._get_etag(storage, uri)
+            if not etag or etag != entry.etag:
+                logger.debug(f'Proxy cache entry for {uri} is outdated: {entry.etag} != {etag}')
+                self._remove(self._entry_path(entry_id), entry.data_file)
+                return None
+            entry.validated_at = time.time()
+            self._save_entry(entry_id, entry)
+
+        # keep LRU order in mtime
+        os.utime(entry.data_file)
+        return entry
+
+    def fetch(self, storage, uri) -> Optional[ProxyCacheEntry]:
+        """Download the whole object from storage into the cache.
+
+        Returns None when the object can't be cached (no ETag, too big or storage error),
+        the caller should proxy it from storage directly in this case.
+        """
+        stream, content_type, metadata = storage.get_bytes_stream(uri)
+        if stream is None:
+            return None
+
+        etag = metadata.get('ETag')
+        size = metadata.get('ContentLength')
+        if not etag or size is None or size > self.max_object_size:
+            logger.debug(f'Proxy cache bypass for {uri}: etag={etag}, size={size}')
+            self._close(stream)
+            self._count('bypasses')
+            return None
+
+        entry_id = self._entry_id(storage, uri)
+        data_file = os.path.join(self.cache_dir, f'{entry_id}-{self._hash(etag)[:16]}.bin')
+
+        def write(f):
+            for chunk in stream.iter_chunks(chunk_size=settings.RESOLVER_PROXY_BUFFER_SIZE):
+                f.write(chunk)
+
+        try:
+            self._write_atomic(data_file, write)
+        finally:
+            self._close(stream)
+
+        previous = self._load_entry(entry_id)
+        last_modified = metadata.get('LastModified')
+        entry = ProxyCacheEntry(
+            data_file=data_file,
+            size=os.path.getsize(data_file),
+            content_type=content_type or 'application/octet-stream',
+            etag=etag,
+            last_modified=last_modified.isoformat() if last_modified else None,
+            validated_at=time.time(),
+        )
+        self._save_entry(entry_id, entry)
+        if previous and previous.data_file != data_file:
+            self._remove(previous.data_file)
+
+        self.evict()
+        return entry
+
+    def get_or_fetch(self, storage, uri) -> Optional[ProxyCacheEntry]:
+        entry = self.get(storage, uri)
+        if entry is not None:
+            self._count('hits')
+            return entry
+
+        self._count('misses')
+        return self.fetch(storage, uri)
+
+    def evict(self):
+        """Remove least recently used data files until the cache fits into max_size"""
+        files = []
+        with os.scandir(self.cache_dir) as it:
+            for item in it:
+                if item.name.endswith('.bin'):
+                    stat = item.stat()
+                    files.append((stat.st_mtime, stat.st_size, item.path))
+
+        total = sum(size for _, size, _ in files)
+        if total <= self.max_size:
+            return
+
+        for _, size, path in sorted(files):
+            if total <= self.max_size:
+                break
+            # entry json is left behind and will be ignored on the next lookup because the data file is gone
+            self._remove(path)
+            total -= size
+            self._count('evictions')
+            logger.debug(f'Proxy cache evicted {path} ({size} bytes)')
+
+    def open_range(self, entry: ProxyCacheEntry, range_header=None):
+        """Prepare a chunk iterator and S3-like metadata for a (ranged) read of the cached file"""
+        start, end = parse_range(range_header)
+        last_byte = entry.size - 1
+
+        if start is None:
+            start, end, status_code = 0, last_byte, 200
+        else:
+            end = last_byte if end == '' or end > last_byte else end
+            status_code = 206
+
+        if start > last_byte or end < start:
+            metadata = {'ContentRange': f'bytes */{entry.size}', 'StatusCode': 416}
+            return iter(()), metadata
+
+        length = end - start + 1
+        metadata = {
+            'ETag': entry.etag,
+            'ContentLength': length,
+            'ContentRange': f'bytes {start}-{end}/{entry.size}' if status_code == 206 else None,
+            'LastModified': datetime.fromisoformat(entry.last_modified) if entry.last_modified else None,
+            'StatusCode': status_code,
+        }
+        return self._iter_file(entry.data_file, start, length), metadata
+
+    @staticmethod
+    def _iter_file(path, start, length):
+        chunk_size = settings.RESOLVER_PROXY_BUFFER_SIZE
+        with open(path, mode='rb') as f:
+            f.seek(start)
+            while length > 0:
+                chunk = f.read(min(chunk_size, length))
+                if not chunk:
+                    break
+                length -= len(chunk)
+                yield chunk
+
+
+_proxy_media_cache = None
+
+
+def get_proxy_media_cache() -> Optional[ProxyMediaCache]:
+    """Get the process-wide proxy media cache, None if RESOLVER_PROXY_MEDIA_CACHE_ENABLED is off"""
+    global _proxy_media_cache
+
+    if not settings.RESOLVER_PROXY_MEDIA_CACHE_ENABLED:
+        return None
+
+    config = (
+        settings.RESOLVER_PROXY_MEDIA_CACHE_DIR,
+        settings.RESOLVER_PROXY_MEDIA_CACHE_MAX_SIZE,
+        settings.RESOLVER_PROXY_MEDIA_CACHE_MAX_OBJECT_SIZE,
+        settings.RESOLVER_PROXY_MEDIA_CACHE_TTL,
+    )
+    cache = _proxy_media_cache
+    if cache is None or (cache.cache_dir, cache.max_size, cache.max_object_size, cache.ttl) != config:
+        cache = _proxy_media_cache = ProxyMediaCache(*config)
+    return cache
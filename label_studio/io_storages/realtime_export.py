@@ -0,0 +1,149 @@
+"""This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
+
+Realtime export of saved annotations to target (export) storages.
+
+Annotation saves are coalesced when Redis is connected:
+* saved annotation ids are collected in a Redis set per project when the transaction is committed, so repeated
+  saves of the same annotation before the export job starts result in one upload of its latest version
+* only one export job per project is queued at a time, REALTIME_EXPORT_DELAY makes the collecting window longer
+* the job loads pending annotations in bulk and saves them to all export storages of the project
+  in parallel threads
+Without Redis annotations are exported synchronously on save.
+"""
+import logging
+from functools import reduce
+from operator import or_
+
+from core.redis import get_redis_connection, redis_connected, release_job_once, start_job_once
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from io_storages.azure_blob.models import AzureBlobExportStorage
+from io_storages.gcs.models import GCSExportStorage
+from io_storages.localfiles.models import LocalFilesExportStorage
+from io_storages.redis.models import RedisExportStorage
+from io_storages.s3.models import S3ExportStorage
+from projects.models import Project
+from tasks.models import Annotation
+
+logger = logging.getLogger(__name__)
+
+EXPORT_STORAGE_CLASSES = [
+    S3ExportStorage,
+    GCSExportStorage,
+    AzureBlobExportStorage,
+    RedisExportStorage,
+    LocalFilesExportStorage,
+]
+
+
+def _pending_key(project_id):
+    return f'realtime_export:{project_id}:pending'
+
+
+def _job_key(project_id):
+    return f'realtime_export:{project_id}'
+
+
+def _has_storages_key(project_id):
+    return f'realtime_export:{project_id}:has_storages'
+
+
+def has_export_storages(project_id):
+    """Check if project has any export storage with one query. The result is cached only in a shared cache,
+    storage signals can't reset worker local caches of other workers
+    """
+    result = cache.get(_has_storages_key(project_id)) if settings.CACHE_SHARED else None
+    if result is None:
+        storages = reduce(
+            or_,
+            [
+                Exists(storage_class.objects.filter(project_id=OuterRef('id')))
+                for storage_class in EXPORT_STORAGE_CLASSES
+            ],
+        )
+        result = Project.objects.filter(storages, id=project_id).exists()
+        if settings.CACHE_SHARED:
+            cache.set(_has_storages_key(project_id), result)
+    return result
+
+
+def get_export_storages(project):
+    storages = []
+    for storage_class in EXPORT_STORAGE_CLASSES:
+        for storage in storage_class.objects.filter(project=project):
+            # share project with organization and its creator between all storages
+            storage.project = project
+            storages.append(storage)
+    return storages
+
+
+def export_annotations(project, annotations):
+    """Save annotations to all export storages of the project"""
+    annotations = list(annotations)
+    if not annotations:
+        return
+    for annotation in annotations:
+        annotation.project = project
+    for storage in get_export_storages(project):
+        logger.debug(f'Export {len(annotations)} annotations to {storage.__class__.__name__} {storage}')
+        storage.save_annotations_batch(annotations)
+
+
+def _pop_pending(project_id):
+    with get_redis_connection().pipeline() as pipe:
+        pipe.smembers(_pending_key(project_id))
+        pipe.delete(_pending_key(project_id))
+        annotation_ids, _ = pipe.execute()
+    return sorted(int(annotation_id) for annotation_id in annotation_ids)
+
+
+def export_pending_annotations(project_id):
+    """RQ job: export all annotations of the project saved since the previous job"""
+    # saves coming after this point queue a new job
+    release_job_once(_job_key(project_id))
+    annotation_ids = _pop_pending(project_id)
+    project = Project.objects.filter(id=project_id).select_related('organization__created_by').first()
+    if project is None or not annotation_ids:
+        return
+
+    logger.debug(f'Realtime export of {len(annotation_ids)} annotations of project {project_id}')
+    for i in range(0, len(annotation_ids), settings.STORAGE_EXPORT_CHUNK_SIZE):
+        chunk = annotation_ids[i : i + settings.STORAGE_EXPORT_CHUNK_SIZE]
+        export_annotations(
+            project, Annotation.objects.filter(project_id=project_id, id__in=chunk).select_related('task')
+        )
+
+
+def schedule_annotation_export(annotation):
+    if not redis_connected():
+        export_annotations(annotation.project, [annotation])
+        return
+
+    # the job reads annotations from the database, so they are queued only after they are committed
+    transaction.on_commit(lambda: _queue_annotation_export(annotation.project_id, annotation.id))
+
+
+def _queue_annotation_export(project_id, annotation_id):
+    get_redis_connection().sadd(_pending_key(project_id), annotation_id)
+    start_job_once(_job_key(project_id), export_pending_annotations, project_id, delay=settings.REALTIME_EXPORT_DELAY)
+
+
+@receiver(post_save, sender=Annotation)
+def export_annotation_to_storages(sender, instance, **kwargs):
+    if instance.project_id and has_export_storages(instance.project_id):
+        schedule_annotation_export(instance)
+
+
+def reset_has_export_storages(sender, instance, **kwargs):
+    cache.delete(_has_storages_key(instance.project_id))
+
+
+for storage_class in EXPORT_STORAGE_CLASSES:
+    post_save.connect(reset_has_export_storages, sender=storage_class, dispatch_uid=f'{storage_class.__name__}_save')
+    post_delete.connect(
+        reset_has_export_storages, sender=storage_class, dispatch_uid=f'{storage_class.__name__}_delete'
+    )
@@ -6,8 +6,6 @@ import logging
 
 import redis
 from django.db import models
-from django.db.models.signals import post_save
-from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from io_storages.base_models import (
     ExportStorage,
@@ -17,7 +15,6 @@ from io_storages.base_models import (
     ProjectStorageMixin,
 )
 from io_storages.utils import StorageObject, load_tasks_json
-from tasks.models import Annotation
 
 logger = logging.getLogger(__name__)
 
@@ -137,15 +134,6 @@ class RedisExportStorage(RedisStorageMixin, ExportStorage):
         client.ping()
 
 
-@receiver(post_save, sender=Annotation)
-def export_annotation_to_redis_storages(sender, instance, **kwargs):
-    project = instance.project
-    if hasattr(project, 'io_storages_redisexportstorages'):
-        for storage in project.io_storages_redisexportstorages.all():
-            logger.debug(f'Export {instance} to Redis storage {storage}')
-            storage.save_annotation(instance)
-
-
 class RedisImportStorageLink(ImportStorageLink):
     storage = models.ForeignKey(RedisImportStorage, on_delete=models.CASCADE, related_name='links')
 
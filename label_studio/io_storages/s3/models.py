@@ -9,10 +9,9 @@ from urllib.parse import urlparse
 
 import boto3
 from core.feature_flags import flag_set
-from core.redis import start_job_async_or_sync
 from django.conf import settings
 from django.db import models
-from django.db.models.signals import post_save, pre_delete
+from django.db.models.signals import pre_delete
 from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from io_storages.base_models import (
@@ -305,21 +304,6 @@ class S3ExportStorage(S3StorageMixin, ExportStorage):
         S3ExportStorageLink.objects.filter(storage=self, annotation=annotation).delete()
 
 
-def async_export_annotation_to_s3_storages(annotation):
-    project = annotation.project
-    if hasattr(project, 'io_storages_s3exportstorages'):
-        for storage in project.io_storages_s3exportstorages.all():
-            logger.debug(f'Export {annotation} to S3 storage {storage}')
-            storage.save_annotation(annotation)
-
-
-@receiver(post_save, sender=Annotation)
-def export_annotation_to_s3_storages(sender, instance, **kwargs):
-    storages = getattr(instance.project, 'io_storages_s3exportstorages', None)
-    if storages and storages.exists():  # avoid excess jobs in rq
-        start_job_async_or_sync(async_export_annotation_to_s3_storages, instance)
-
-
 @receiver(pre_delete, sender=Annotation)
 def delete_annotation_from_s3_storages(sender, instance, **kwargs):
     links = S3ExportStorageLink.objects.filter(annotation=instance)
@@ -0,0 +1,71 @@
+import os
+import re
+import time
+
+import pytest
+from io_storages.localfiles.models import INCREMENTAL_SCAN_MARGIN, LocalFilesImportStorage
+from io_storages.localfiles.utils import scan_files
+
+
+@pytest.fixture
+def files(tmp_path):
+    for name in ['b.json', 'a.json', 'c.txt', 'sub/b/2.json', 'sub/a/1.json', 'sub/a/0.txt', 'z.json']:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('{}')
+    return tmp_path
+
+
+def relative(root, paths):
+    return [os.path.relpath(path, root) for path in paths]
+
+
+def test_scan_files_order_and_regex(files):
+    # files of a directory go first, then subdirectories in ascending order
+    assert relative(files, scan_files(str(files))) == [
+        'a.json',
+        'b.json',
+        'c.txt',
+        'z.json',
+        'sub/a/0.txt',
+        'sub/a/1.json',
+        'sub/b/2.json',
+    ]
+    assert relative(files, scan_files(str(files), regex=re.compile(r'.*\.txt'))) == ['c.txt', 'sub/a/0.txt']
+
+    with pytest.raises(FileNotFoundError):
+        list(scan_files(str(files / 'missing')))
+
+
+def test_scan_files_modified_since(files):
+    old = time.time() - 3600
+    os.utime(files / 'a.json', (old, old))
+    # ctime of an existing file can't be moved back, so only files from the future are skipped
+    assert relative(files, scan_files(str(files), modified_since=time.time() + 3600)) == []
+    assert 'a.json' in relative(files, scan_files(str(files), modified_since=old + 60))
+
+
+def test_local_files_incremental_scan(files, settings):
+    settings.LOCAL_FILES_DOCUMENT_ROOT = str(files)
+    storage = LocalFilesImportStorage(path=str(files), regex_filter=r'.*\.json')
+    # previous scan started after all files were written
+    storage.meta = {
+        'last_scan': {
+            'path': storage.path,
+            'regex_filter': storage.regex_filter,
+            'started': time.time() + INCREMENTAL_SCAN_MARGIN + 60,
+        }
+    }
+
+    settings.LOCAL_FILES_INCREMENTAL_SCAN = False
+    assert len(list(storage.iterkeys())) == 5
+
+    settings.LOCAL_FILES_INCREMENTAL_SCAN = True
+    storage.meta['last_scan']['started'] = time.time() + INCREMENTAL_SCAN_MARGIN + 60
+    assert list(storage.iterkeys()) == []
+    assert storage.meta['last_scan']['started'] <= time.time()
+
+    # the previous scan is ignored when the filter is changed
+    storage.meta['last_scan']['started'] = time.time() + INCREMENTAL_SCAN_MARGIN + 60
+    storage.regex_filter = r'.*\.txt'
+    assert len(list(storage.iterkeys())) == 2
@@ -1,3 +1,4 @@
+import asyncio
 import base64
 import io
 import unittest
@@ -267,6 +268,38 @@ class TestResolveStorageUriAPIMixin(unittest.TestCase):
             assert chunks == []
             assert mock_stream.close.called
 
+    def test_async_chunker(self):
+        """Test async_chunker yields all chunks and closes the stream"""
+        mock_stream = MagicMock()
+        mock_stream.iter_chunks.return_value = iter([b'chunk1', b'chunk2', b'chunk3'])
+
+        async def consume():
+            return [chunk async for chunk in self.mixin.async_chunker(mock_stream)]
+
+        assert asyncio.run(consume()) == [b'chunk1', b'chunk2', b'chunk3']
+        assert mock_stream.close.called
+
+    @patch('io_storages.proxy_api.is_asgi_request', return_value=True)
+    def test_proxy_data_from_storage_asgi(self, mock_is_asgi):
+        """Under ASGI the range header is forwarded unchanged and the stream is async"""
+        mock_storage = MagicMock()
+        mock_stream = MagicMock()
+        mock_stream.iter_chunks.return_value = iter([b'test data'])
+        mock_metadata = {'StatusCode': 206, 'ContentLength': 9, 'ContentRange': 'bytes 100-108/50000000'}
+        mock_storage.get_bytes_stream.return_value = (mock_stream, 'video/mp4', mock_metadata)
+        self.request.headers = {'Range': 'bytes=100-'}
+
+        result = self.mixin.proxy_data_from_storage(self.request, 'uri', self.project, mock_storage)
+
+        mock_storage.get_bytes_stream.assert_called_once_with('uri', range_header='bytes=100-')
+        assert result.status_code == 206
+        assert result.is_async
+
+        async def consume():
+            return [chunk async for chunk in result.streaming_content]
+
+        assert asyncio.run(consume()) == [b'test data']
+
     def test_override_range_header_no_header(self):
         """Test override_range_header when no Range header is present"""
         self.request.headers = {}
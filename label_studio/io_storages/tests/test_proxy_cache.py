@@ -0,0 +1,131 @@
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+from io_storages.localfiles.models import LocalFilesImportStorage
+from io_storages.proxy_api import ResolveStorageUriAPIMixin
+from io_storages.proxy_cache import ProxyMediaCache
+
+DATA = b'0123456789' * 100
+
+
+@pytest.fixture
+def storage(tmp_path, settings):
+    """Local files storage is used as a stand-in for cloud storages, no database is needed"""
+    settings.LOCAL_FILES_DOCUMENT_ROOT = str(tmp_path)
+    media_dir = tmp_path / 'media'
+    media_dir.mkdir()
+    (media_dir / 'image.jpg').write_bytes(DATA)
+    (media_dir / 'big.jpg').write_bytes(DATA * 10)
+    return LocalFilesImportStorage(id=1, path=str(media_dir))
+
+
+@pytest.fixture
+def media_cache(tmp_path):
+    return ProxyMediaCache(str(tmp_path / 'cache'), max_size=5000, max_object_size=2000, ttl=300)
+
+
+def read(media_cache, entry, range_header=None):
+    stream, metadata = media_cache.open_range(entry, range_header)
+    return b''.join(stream), metadata
+
+
+def test_local_files_get_bytes_stream(storage):
+    stream, content_type, metadata = storage.get_bytes_stream('/data/local-files/?d=media/image.jpg')
+    assert content_type == 'image/jpeg'
+    assert b''.join(stream.iter_chunks(chunk_size=64)) == DATA
+    assert metadata['StatusCode'] == 200
+    assert metadata['ContentLength'] == len(DATA)
+
+    stream, _, metadata = storage.get_bytes_stream('media/image.jpg', range_header='bytes=10-19')
+    assert b''.join(stream.iter_chunks()) == DATA[10:20]
+    assert metadata['StatusCode'] == 206
+    assert metadata['ContentRange'] == f'bytes 10-19/{len(DATA)}'
+
+    stream, _, _ = storage.get_bytes_stream('media/../../etc/passwd')
+    assert stream is None
+
+
+def test_proxy_cache_miss_then_hit(storage, media_cache):
+    with patch.object(storage, 'get_bytes_stream', wraps=storage.get_bytes_stream) as get_bytes_stream:
+        entry = media_cache.get_or_fetch(storage, 'media/image.jpg')
+        assert read(media_cache, entry)[0] == DATA
+
+        entry = media_cache.get_or_fetch(storage, 'media/image.jpg')
+        assert read(media_cache, entry)[0] == DATA
+
+    get_bytes_stream.assert_called_once_with('media/image.jpg')
+    assert media_cache.stats['misses'] == 1
+    assert media_cache.stats['hits'] == 1
+
+
+def test_proxy_cache_range_requests(storage, media_cache):
+    entry = media_cache.get_or_fetch(storage, 'media/image.jpg')
+
+    data, metadata = read(media_cache, entry, 'bytes=100-199')
+    assert data == DATA[100:200]
+    assert metadata['StatusCode'] == 206
+    assert metadata['ContentRange'] == f'bytes 100-199/{len(DATA)}'
+
+    data, metadata = read(media_cache, entry, 'bytes=900-')
+    assert data == DATA[900:]
+    assert metadata['ContentLength'] == 100
+
+    _, metadata = read(media_cache, entry, 'bytes=5000-')
+    assert metadata['StatusCode'] == 416
+
+
+def test_proxy_cache_revalidates_etag(storage, media_cache):
+    media_cache.get_or_fetch(storage, 'media/image.jpg')
+
+    new_data = b'new content'
+    path = os.path.join(storage.path, 'image.jpg')
+    with open(path, 'wb') as f:
+        f.write(new_data)
+    os.utime(path, ns=(1, 1))
+
+    # entry is still considered fresh within ttl
+    entry = media_cache.get_or_fetch(storage, 'media/image.jpg')
+    assert read(media_cache, entry)[0] == DATA
+
+    media_cache.ttl = -1
+    entry = media_cache.get_or_fetch(storage, 'media/image.jpg')
+    assert read(media_cache, entry)[0] == new_data
+    assert media_cache.stats['revalidations'] == 1
+    assert len([name for name in os.listdir(media_cache.cache_dir) if name.endswith('.bin')]) == 1
+
+
+def test_proxy_cache_bypasses_big_objects(storage, media_cache):
+    assert media_cache.get_or_fetch(storage, 'media/big.jpg') is None
+    assert media_cache.stats['bypasses'] == 1
+
+
+def test_proxy_cache_evicts_least_recently_used(storage, media_cache, tmp_path):
+    media_dir = tmp_path / 'media'
+    for i in range(6):
+        (media_dir / f'{i}.jpg').write_bytes(DATA)
+        entry = media_cache.get_or_fetch(storage, f'media/{i}.jpg')
+        os.utime(entry.data_file, (i, i))
+
+    assert media_cache.stats['evictions'] == 1
+    assert media_cache.get(storage, 'media/0.jpg') is None
+    assert media_cache.get(storage, 'media/5.jpg') is not None
+
+
+def test_proxy_data_from_storage_uses_media_cache(storage, settings, tmp_path):
+    settings.RESOLVER_PROXY_MEDIA_CACHE_ENABLED = True
+    settings.RESOLVER_PROXY_MEDIA_CACHE_DIR = str(tmp_path / 'cache')
+
+    mixin = ResolveStorageUriAPIMixin()
+    request = MagicMock()
+    request.headers = {'Range': 'bytes=0-9'}
+    project = MagicMock()
+
+    with patch.object(storage, 'get_bytes_stream', wraps=storage.get_bytes_stream) as get_bytes_stream:
+        for _ in range(2):
+            response = mixin.proxy_data_from_storage(request, 'media/image.jpg', project, storage)
+            assert response.status_code == 206
+            assert b''.join(response.streaming_content) == DATA[:10]
+            assert response.headers['Content-Range'] == f'bytes 0-9/{len(DATA)}'
+
+    get_bytes_stream.assert_called_once_with('media/image.jpg')
@@ -1,6 +1,7 @@
 import logging
 
 from core.permissions import ViewClassPermission, all_permissions
+from core.redis import redis_connected, start_job_async_or_sync
 from django.db.models import CharField, Count, Q
 from django.db.models.functions import Cast
 from django.utils.decorators import method_decorator
@@ -12,7 +13,7 @@ from labels_manager.serializers import (
     LabelLinkSerializer,
     LabelSerializer,
 )
-from rest_framework import views, viewsets
+from rest_framework import status, views, viewsets
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from webhooks.utils import api_webhook, api_webhook_for_delete
@@ -217,6 +218,8 @@ class LabelLinkAPI(viewsets.ModelViewSet):
         operation_summary='Bulk update labels',
         operation_description="""
         If you want to update the labels in saved annotations, use this endpoint.
+        When background workers are available, annotations are updated in a background job
+        and the response contains its job_id.
         """,
     ),
 )
@@ -230,10 +233,16 @@ class LabelBulkUpdateAPI(views.APIView):
         if project is not None:
             self.check_object_permissions(self.request, project)
 
-        updated_count = bulk_update_label(
+        kwargs = dict(
             old_label=serializer.validated_data['old_label'],
             new_label=serializer.validated_data['new_label'],
-            organization=self.request.user.active_organization,
-            project=project,
+            organization=self.request.user.active_organization_id,
+            project=project.id if project is not None else None,
         )
+        # renaming in a large organization takes long, so it's a background job with progress in job meta
+        if redis_connected():
+            job = start_job_async_or_sync(bulk_update_label, **kwargs, queue_name='low', job_timeout=3600 * 24)
+            return Response({'job_id': job.id}, status=status.HTTP_202_ACCEPTED)
+
+        updated_count = bulk_update_label(**kwargs)
         return Response({'annotations_updated': updated_count})
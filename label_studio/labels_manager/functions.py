@@ -1,34 +1,108 @@
+import json
+import logging
+from collections import defaultdict
+
+from core.redis import update_job_progress
+from django.conf import settings
 from django.db import transaction
+from django.db.models import TextField
+from django.db.models.functions import Cast
+from projects.models import ProjectSummary
 from tasks.models import Annotation
 
+logger = logging.getLogger(__name__)
+
 
 def bulk_update_label(old_label, new_label, organization, project=None):
-    annotations = Annotation.objects.filter(project__organization=organization)
-    if project is not None:
-        annotations = annotations.filter(project=project)
+    """Rename label in annotation results of organization (or one project) chunk by chunk.
+
+    Only id, project and result of annotations are loaded. Every chunk is updated together with
+    ProjectSummary.created_labels in one transaction, renamed regions don't match old_label anymore,
+    so the job can be safely re-run after interruption.
+    :param organization: Organization or its ID
+    :param project: Project or its ID, all organization projects are updated if None
+    :return: Count of updated regions
+    """
+    organization_id = getattr(organization, 'id', organization)
+    project_id = getattr(project, 'id', project)
+
+    annotations = Annotation.objects.filter(project__organization_id=organization_id)
+    if project_id is not None:
+        annotations = annotations.filter(project_id=project_id)
+    annotations = filter_by_label_text(annotations, old_label)
+    total = annotations.count()
+    logger.info(f'Rename label {old_label} to {new_label} in {total} annotations of organization {organization_id}')
 
     updated_count = 0
-    with transaction.atomic():
-        update_annotations = []
-        for annotation in annotations.only('result').all():
-            result = annotation.result
-
-            updated_result = []
-            need_update = False
-            for region in result:
-                result_type = region.get('type')
-                if result_type is not None:
-                    label = region['value'].get(result_type)
-                    if label is not None and label == old_label:
-                        region['value'][result_type] = new_label
-                        updated_count += 1
-                        need_update = True
-                updated_result.append(region)
-
-            if need_update:
-                annotation.result = updated_result
-                update_annotations.append(annotation)
-
-        if update_annotations:
-            Annotation.objects.bulk_update(update_annotations, ['result'])
+    processed = 0
+    last_annotation_id = 0
+    while True:
+        with transaction.atomic():
+            chunk = list(
+                annotations.filter(id__gt=last_annotation_id)
+                .order_by('id')
+                .values_list('id', 'project_id', 'result')[: settings.BATCH_SIZE]
+            )
+            if not chunk:
+                break
+
+            update_annotations = []
+            renamed_regions = defaultdict(list)
+            for annotation_id, annotation_project_id, result in chunk:
+                renamed = rename_label_in_result(result, old_label, new_label)
+                if renamed:
+                    updated_count += len(renamed)
+                    update_annotations.append(Annotation(id=annotation_id, result=result))
+                    renamed_regions[annotation_project_id].extend(renamed)
+
+            Annotation.objects.bulk_update(update_annotations, ['result'], batch_size=settings.BATCH_SIZE)
+            for summary in ProjectSummary.objects.filter(project_id__in=renamed_regions):
+                summary.replace_created_labels(renamed_regions[summary.project_id])
+
+        last_annotation_id = chunk[-1][0]
+        processed += len(chunk)
+        update_job_progress(processed=processed, total=total, updated=updated_count)
+
     return updated_count
+
+
+def rename_label_in_result(result, old_label, new_label):
+    """Replace old_label with new_label in regions of annotation result in place
+    :return: List of renamed regions as (region before renaming, region after renaming)
+    """
+    if not isinstance(result, list):
+        return []
+
+    renamed = []
+    for region in result:
+        result_type = region.get('type')
+        if result_type is None or not isinstance(region.get('value'), dict):
+            continue
+        label = region['value'].get(result_type)
+        if label is not None and label == old_label:
+            old_region = {**region, 'value': dict(region['value'])}
+            region['value'][result_type] = new_label
+            renamed.append((old_region, region))
+    return renamed
+
+
+def filter_by_label_text(annotations, label):
+    """Skip annotations without label strings in JSON text of result, so they are not loaded at all.
+    JSON text of non-ASCII strings depends on the database, such labels are matched in Python only
+    """
+    strings = list(iterate_strings(label))
+    if not strings or not all(string.isascii() for string in strings):
+        return annotations
+
+    annotations = annotations.annotate(result_text=Cast('result', output_field=TextField()))
+    for string in set(strings):
+        annotations = annotations.filter(result_text__contains=json.dumps(string))
+    return annotations
+
+
+def iterate_strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, list):
+        for item in value:
+            yield from iterate_strings(item)
@@ -183,7 +183,7 @@ class MLBackendDetailAPI(generics.RetrieveUpdateDestroyAPIView):
 
     def get_object(self):
         ml_backend = super(MLBackendDetailAPI, self).get_object()
-        ml_backend.update_state()
+        ml_backend.refresh_state()
         return ml_backend
 
     def perform_update(self, serializer):
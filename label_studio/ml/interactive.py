@@ -0,0 +1,128 @@
+"""
+Interactive annotating helpers: cached task payloads and coalesced ML backend requests.
+
+Smart tools call the ML backend on every annotator event, the serialized task (with annotations,
+drafts and predictions) is cached per task and user until anything of the task changes,
+and identical requests running at the same time share one ML backend call.
+Payloads are cached only with a shared cache (CACHE_SHARED), invalidation must reach all workers.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import uuid
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from tasks.models import Annotation, AnnotationDraft, Prediction, Task
+
+logger = logging.getLogger(__name__)
+
+
+def _version_key(task_id):
+    return f'ml_interactive:{task_id}:version'
+
+
+def _payload_key(task_id, version, user_id):
+    return f'ml_interactive:{task_id}:{version}:{user_id}:payload'
+
+
+def get_payload_version(task_id):
+    """Random token of the current task state, it's dropped on any task change,
+    so payloads cached with the previous token are never used again
+    """
+    key = _version_key(task_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, settings.ML_INTERACTIVE_PAYLOAD_CACHE_TTL):
+            version = cache.get(key) or version
+    return version
+
+
+def payload_cache_enabled():
+    return settings.CACHE_SHARED and settings.ML_INTERACTIVE_PAYLOAD_CACHE_TTL > 0
+
+
+def invalidate_task_payloads(task_id):
+    if payload_cache_enabled():
+        cache.delete(_version_key(task_id))
+
+
+def get_task_payload(task, user, serialize):
+    """Serialized task for interactive annotating
+    :param serialize: function without arguments returning serialized task, it's called on cache miss only
+    :return: (payload, version of task state)
+    """
+    if not payload_cache_enabled():
+        return serialize(), None
+
+    version = get_payload_version(task.id)
+    key = _payload_key(task.id, version, getattr(user, 'id', None))
+    payload = cache.get(key)
+    if payload is None:
+        payload = serialize()
+        cache.set(key, payload, settings.ML_INTERACTIVE_PAYLOAD_CACHE_TTL)
+    return payload, version
+
+
+def get_request_key(*parts):
+    """Key of identical requests, context is compared by its JSON"""
+    data = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.md5(data.encode()).hexdigest()  # nosec
+
+
+class RequestCoalescer:
+    """Requests with the same key started while the first one is running get its result
+    instead of doing the same work again. Works within one process
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = {}
+
+    def run(self, key, func):
+        with self._lock:
+            future = self._running.get(key)
+            leader = future is None
+            if leader:
+                future = self._running[key] = Future()
+
+        if not leader:
+            logger.debug(f'Reuse running request {key}')
+            return future.result()
+
+        try:
+            result = func()
+        except Exception as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._running.pop(key, None)
+
+
+interactive_requests = RequestCoalescer()
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_payloads_on_task_change(sender, instance, **kwargs):
+    invalidate_task_payloads(instance.id)
+
+
+@receiver(post_save, sender=Annotation)
+@receiver(post_delete, sender=Annotation)
+@receiver(post_save, sender=AnnotationDraft)
+@receiver(post_delete, sender=AnnotationDraft)
+@receiver(post_save, sender=Prediction)
+@receiver(post_delete, sender=Prediction)
+def invalidate_payloads_on_task_items_change(sender, instance, **kwargs):
+    invalidate_task_payloads(instance.task_id)
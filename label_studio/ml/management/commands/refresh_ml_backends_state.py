@@ -0,0 +1,30 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Check health and setup of ML backends and save their state, run it periodically (e.g. by cron) '
+        'with ML_BACKEND_STATE_TTL and a shared CACHE_BACKEND, so requests always use the cached state'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, default=None, help='Project ID, all projects if not set')
+
+    def handle(self, *args, **options):
+        from ml.models import MLBackend
+
+        ml_backends = MLBackend.objects.order_by('id')
+        if options['project'] is not None:
+            ml_backends = ml_backends.filter(project_id=options['project'])
+
+        for ml_backend in ml_backends.iterator():
+            try:
+                ml_backend.update_state()
+            except Exception as e:
+                logger.error(f"Can't update state of ML backend {ml_backend.id}: {e}", exc_info=True)
+                continue
+            logger.debug(f'ML backend {ml_backend.id} state: {ml_backend.state}')
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-19 08:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml', '0007_auto_20240314_1957'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mlbackend',
+            name='setup_model_version',
+            field=models.TextField(blank=True, default=None, help_text='Model version returned by the last ML backend setup', null=True, verbose_name='setup model version'),
+        ),
+    ]
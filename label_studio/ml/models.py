@@ -3,14 +3,17 @@
 import logging
 from typing import Dict, List
 
+from core.redis import redis_connected, start_job_async_or_sync
 from core.utils.common import conditional_atomic, db_is_not_sqlite, load_func
 from django.conf import settings
+from django.core.cache import cache
 from django.db import models, transaction
 from django.db.models import Count, JSONField, Q
 from django.db.models.signals import post_save, pre_delete
 from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from ml.api_connector import PREDICT_URL, TIMEOUT_PREDICT, MLApi
+from ml.interactive import get_request_key, get_task_payload, interactive_requests
 from projects.models import Project
 from tasks.serializers import PredictionSerializer, TaskSimpleSerializer
 from webhooks.serializers import Webhook, WebhookSerializer
@@ -109,6 +112,13 @@ class MLBackend(models.Model):
         default='',
         help_text='Current model version associated with this machine learning backend',
     )
+    setup_model_version = models.TextField(
+        _('setup model version'),
+        blank=True,
+        null=True,
+        default=None,
+        help_text='Model version returned by the last ML backend setup',
+    )
     timeout = models.FloatField(
         _('timeout'),
         blank=True,
@@ -217,9 +227,36 @@ class MLBackend(models.Model):
                     logger.debug(f'Changing model version: {self.model_version} -> {model_version}')
                     self.model_version = model_version
                 self.error_message = None
-        self.save()
+        self.setup_model_version = model_version
+        self.save(update_fields=['state', 'error_message', 'model_version', 'setup_model_version', 'updated_at'])
+        if settings.ML_BACKEND_STATE_TTL > 0:
+            cache.set(self._state_key(), {'model_version': model_version}, settings.ML_BACKEND_STATE_TTL)
         return model_version
 
+    def _state_key(self):
+        return f'ml_backend:{self.id}:state'
+
+    def refresh_state(self):
+        """Cached update_state() for request paths: backend is probed only if its state is older than
+        ML_BACKEND_STATE_TTL. With Redis the probe is done by a background job and the current state is used
+        meanwhile, so a slow or dead backend doesn't add its timeouts to requests
+        :return: Model version returned by the last setup
+        """
+        if settings.ML_BACKEND_STATE_TTL <= 0:
+            return self.update_state()
+
+        cached_state = cache.get(self._state_key())
+        if cached_state is not None:
+            return cached_state['model_version']
+
+        if not redis_connected():
+            return self.update_state()
+        # one refresh job per TTL, even if it fails
+        if cache.add(f'ml_backend:{self.id}:state_refresh', True, settings.ML_BACKEND_STATE_TTL):
+            start_job_async_or_sync(update_ml_backend_state, self.id, queue_name='high')
+        # model_version is pinned by the user if auto_update is off, use the version from the last setup
+        return self.setup_model_version
+
     def train(self):
         train_response = self.api.train(self.project)
         if train_response.is_error:
@@ -231,6 +268,8 @@ class MLBackend(models.Model):
             if current_train_job:
                 MLBackendTrainJob.objects.create(job_id=current_train_job, ml_backend=self)
         self.save()
+        # training state is temporary, the next request checks the backend again
+        cache.delete(self._state_key())
 
     def _predict(self, task):
         """This is low level prediction method that is used for debugging"""
@@ -340,7 +379,7 @@ class MLBackend(models.Model):
         return predictions
 
     def predict_tasks(self, tasks):
-        model_version = self.update_state()
+        model_version = self.refresh_state()
         if self.not_ready:
             logger.debug(f'ML backend {self} is not ready')
             return
@@ -374,13 +413,24 @@ class MLBackend(models.Model):
             result['errors'] = ['Model is not set to be used for interactive preannotations']
             return result
 
-        tasks_ser = InteractiveAnnotatingDataSerializer(
-            [task], many=True, expand=['drafts', 'predictions', 'annotations'], context=options
-        ).data
-        ml_api_result = self.api.make_predictions(
-            tasks=tasks_ser,
-            project=self.project,
-            context=context,
+        tasks_ser, version = get_task_payload(
+            task,
+            user,
+            lambda: list(
+                InteractiveAnnotatingDataSerializer(
+                    [task], many=True, expand=['drafts', 'predictions', 'annotations'], context=options
+                ).data
+            ),
+        )
+        # rapid identical requests (e.g. repeated smart tool events) share one ML backend call
+        request_key = get_request_key(self.id, task.id, getattr(user, 'id', None), version, context)
+        ml_api_result = interactive_requests.run(
+            request_key,
+            lambda: self.api.make_predictions(
+                tasks=tasks_ser,
+                project=self.project,
+                context=context,
+            ),
         )
         if ml_api_result.is_error:
             logger.info(f'Prediction not created for project {self}: {ml_api_result.error_message}')
@@ -492,6 +542,13 @@ def _validate_ml_api_result(ml_api_result, tasks, curr_logger):
     return True
 
 
+def update_ml_backend_state(ml_backend_id):
+    ml_backend = MLBackend.objects.filter(id=ml_backend_id).first()
+    if ml_backend is None:
+        return
+    ml_backend.update_state()
+
+
 @receiver(pre_delete, sender=MLBackend)
 def modify_project_model_version(sender, instance, **kwargs):
     project = instance.project
@@ -1,6 +1,7 @@
+from core.redis import start_job_async_or_sync
 from django.contrib import admin
 
-from .models import ModelInterface, ModelRun, ThirdPartyModelVersion
+from .models import ModelInterface, ModelRun, ThirdPartyModelVersion, delete_predictions_background
 
 
 @admin.register(ModelInterface)
@@ -115,7 +116,9 @@ class ModelRunAdmin(admin.ModelAdmin):
 
     def delete_model_run_predictions(self, request, queryset):
         for model_run in queryset:
-            model_run.delete_predictions()
-        self.message_user(request, f'Deleted predictions for {queryset.count()} model runs.')
+            start_job_async_or_sync(
+                delete_predictions_background, model_run.id, queue_name='low', job_timeout=3600 * 24
+            )
+        self.message_user(request, f'Started deleting predictions for {queryset.count()} model runs.')
 
     delete_model_run_predictions.short_description = 'Delete predictions for selected model runs'
@@ -2,13 +2,15 @@
 
 import logging
 
+from core.utils.db import SQCount
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import OuterRef
 from django.utils.translation import gettext_lazy as _
 from ml_model_providers.models import ModelProviderConnection, ModelProviders
-from projects.models import Project
+from projects.models import Project, ProjectSummary
 from rest_framework.exceptions import ValidationError
-from tasks.models import Annotation, FailedPrediction, Prediction, PredictionMeta
+from tasks.models import Annotation, FailedPrediction, Prediction, PredictionMeta, Task
 
 logger = logging.getLogger(__name__)
 
@@ -187,38 +189,77 @@ class ModelRun(models.Model):
     def has_permission(self, user):
         return user.active_organization == self.organization
 
-    def delete_predictions(self):
+    def delete_predictions(self, batch_size=None):
         """
         Deletes any predictions that have originated from a ModelRun
 
-        Executing a raw SQL query here for speed. This ignores any foreign key relationships
+        Executing raw SQL deletes here for speed. This ignores any foreign key relationships
         so if another model has a Prediction fk and set to on_delete=CASCADE for example,
         it will not take affect. The only relationship like this that currently exists
         is in Annotation.parent_prediction, which we are handling here.
+
+        Predictions are deleted in chunks of batch_size, so at most batch_size prediction ids are loaded at once
+        (MySQL doesn't support LIMIT in IN subqueries), and every chunk is committed separately together with
+        Task.total_predictions of its tasks, so an interrupted deletion can be continued by calling this method again.
+        Persisted project counters are recalculated at the end.
+        :return: Number of deleted predictions and failed predictions
         """
-        predictions = Prediction.objects.filter(model_run=self.id)
-        prediction_ids = [p.id for p in predictions]
-        # to delete all dependencies where predictions are foreign keys.
-        Annotation.objects.filter(parent_prediction__in=prediction_ids).update(parent_prediction=None)
         try:
             from stats.models import PredictionStats
-
-            prediction_stats_to_be_deleted = PredictionStats.objects.filter(prediction_to__in=prediction_ids)
-            prediction_stats_to_be_deleted.delete()
-        except Exception as e:
-            logger.info(f'PredictionStats model does not exist , exception:{e}')
+        except (ModuleNotFoundError, ImportError):
+            logger.info('PredictionStats model does not exist')
+            PredictionStats = None
+
+        batch_size = batch_size or settings.BATCH_SIZE
+        deleted = 0
+
+        while True:
+            with transaction.atomic():
+                chunk = list(
+                    Prediction.objects.filter(model_run=self.id)
+                    .order_by('id')
+                    .values_list('id', flat=True)[:batch_size]
+                )
+                if not chunk:
+                    break
+                task_ids = list(Prediction.objects.filter(id__in=chunk).values_list('task_id', flat=True).distinct())
+                # to delete all dependencies where predictions are foreign keys.
+                Annotation.objects.filter(parent_prediction__in=chunk).update(parent_prediction=None)
+                if PredictionStats is not None:
+                    PredictionStats.objects.filter(prediction_to__in=chunk).delete()
+                # delete predictions meta
+                PredictionMeta.objects.filter(prediction__in=chunk).delete()
+                # remove predictions from db
+                predictions = Prediction.objects.filter(id__in=chunk)
+                count = predictions._raw_delete(predictions.db)
+                # raw delete doesn't send signals, which maintain prediction counters
+                Task.objects.filter(id__in=task_ids).update(
+                    total_predictions=SQCount(Prediction.objects.filter(task_id=OuterRef('id')).values('id'))
+                )
+            deleted += count
+            if count < batch_size:
+                break
 
         # Delete failed predictions. Currently no other model references this, no fk relationships to remove
-        failed_predictions = FailedPrediction.objects.filter(model_run=self.id)
-        failed_predictions_ids = [p.id for p in failed_predictions]
-
-        # delete predictions meta
-        PredictionMeta.objects.filter(prediction__in=prediction_ids).delete()
-        PredictionMeta.objects.filter(failed_prediction__in=failed_predictions_ids).delete()
-
-        # remove predictions from db
-        predictions._raw_delete(predictions.db)
-        failed_predictions._raw_delete(failed_predictions.db)
+        while True:
+            with transaction.atomic():
+                chunk = list(
+                    FailedPrediction.objects.filter(model_run=self.id)
+                    .order_by('id')
+                    .values_list('id', flat=True)[:batch_size]
+                )
+                if not chunk:
+                    break
+                PredictionMeta.objects.filter(failed_prediction__in=chunk).delete()
+                failed_predictions = FailedPrediction.objects.filter(id__in=chunk)
+                count = failed_predictions._raw_delete(failed_predictions.db)
+            deleted += count
+            if count < batch_size:
+                break
+
+        ProjectSummary.recalculate_counters([self.project_id])
+        logger.info(f'Deleted {deleted} predictions of model run {self.id}')
+        return deleted
 
     def delete(self, *args, **kwargs):
         """
@@ -226,3 +267,12 @@ class ModelRun(models.Model):
         """
         self.delete_predictions()
         super().delete(*args, **kwargs)
+
+
+def delete_predictions_background(model_run_id):
+    """Background job deleting predictions of a model run, restarted job continues the deletion"""
+    model_run = ModelRun.objects.filter(id=model_run_id).first()
+    if model_run is None:
+        logger.info(f'Model run {model_run_id} is already deleted')
+        return
+    model_run.delete_predictions()
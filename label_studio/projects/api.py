@@ -54,6 +54,7 @@ from tasks.serializers import (
     TaskSimpleSerializer,
     TaskWithAnnotationsAndPredictionsAndDraftsSerializer,
 )
+from users import role_resolver
 from webhooks.models import WebhookAction
 from webhooks.utils import api_webhook, api_webhook_for_delete, emit_webhooks_for_instance
 
@@ -295,37 +296,11 @@ class ProjectListAPI(generics.ListCreateAPIView):
 
     def _is_super_admin(self, user):
         """Check if user is Super Admin"""
-        if user.email == 'superadmin@gmail.com':
-            return True
-        if getattr(user, 'is_superuser', False):
-            return True
-        try:
-            from users.role_models import UserRoleAssignment
-            return UserRoleAssignment.objects.filter(
-                user=user, 
-                role__name__in=['super-admin', 'super_admin'], 
-                is_active=True
-            ).exists()
-        except Exception:
-            return False
+        return role_resolver.is_super_admin(user)
 
     def _is_admin(self, user):
         """Check if user is Admin (includes Super Admin)"""
-        # Check for specific admin emails
-        if user.email in ['dhaneshwari.tosscss@gmail.com', 'superadmin@gmail.com']:
-            return True
-        if getattr(user, 'is_superuser', False) or getattr(user, 'is_staff', False):
-            return True
-        try:
-            from users.role_models import UserRoleAssignment
-            # Check for admin, super-admin, and administrator roles
-            return UserRoleAssignment.objects.filter(
-                user=user, 
-                role__name__in=['administrator', 'admin', 'super-admin', 'super_admin'], 
-                is_active=True
-            ).exists()
-        except Exception:
-            return False
+        return role_resolver.is_admin(user)
 
     def get_serializer_context(self):
         context = super(ProjectListAPI, self).get_serializer_context()
@@ -514,21 +489,7 @@ class ProjectAPI(generics.RetrieveUpdateDestroyAPIView):
     
     def _is_user_admin(self):
         """Check if user is admin (staff or has admin role)"""
-        # Check Django staff status
-        if self.request.user.is_staff:
-            return True
-            
-        # Check custom role system
-        try:
-            from users.role_models import UserRoleAssignment
-            return UserRoleAssignment.objects.filter(
-                user=self.request.user,
-                role__name='admin',
-                is_active=True
-            ).exists()
-        except ImportError:
-            # Fallback to staff check if role system not available
-            return False
+        return self.request.user.is_staff or role_resolver.has_role(self.request.user, ['admin'])
 
     def get(self, request, *args, **kwargs):
         return super(ProjectAPI, self).get(request, *args, **kwargs)
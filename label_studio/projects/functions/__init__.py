@@ -1,27 +1,33 @@
 from core.feature_flags import flag_set
 from core.utils.db import SQCount
 from django.db.models import Count, OuterRef, Q
+from django.db.models.functions import Coalesce
 from tasks.models import Annotation, Prediction, Task
 
 
+def _annotate_counter(queryset, field, subquery):
+    """Read the counter persisted in ProjectSummary, count it with subquery only if it's not calculated yet"""
+    return queryset.annotate(**{field: Coalesce(f'summary__{field}', SQCount(subquery))})
+
+
 def annotate_task_number(queryset):
     tasks = Task.objects.filter(project=OuterRef('id')).values_list('id')
-    return queryset.annotate(task_number=SQCount(tasks))
+    return _annotate_counter(queryset, 'task_number', tasks)
 
 
 def annotate_finished_task_number(queryset):
     tasks = Task.objects.filter(project=OuterRef('id'), is_labeled=True).values_list('id')
-    return queryset.annotate(finished_task_number=SQCount(tasks))
+    return _annotate_counter(queryset, 'finished_task_number', tasks)
 
 
 def annotate_total_predictions_number(queryset):
     predictions = Prediction.objects.filter(project=OuterRef('id')).values('id')
-    return queryset.annotate(total_predictions_number=SQCount(predictions))
+    return _annotate_counter(queryset, 'total_predictions_number', predictions)
 
 
 def annotate_total_annotations_number(queryset):
     subquery = Annotation.objects.filter(Q(project=OuterRef('pk')) & Q(was_cancelled=False)).values('id')
-    return queryset.annotate(total_annotations_number=SQCount(subquery))
+    return _annotate_counter(queryset, 'total_annotations_number', subquery)
 
 
 def annotate_num_tasks_with_annotations(queryset):
@@ -34,21 +40,21 @@ def annotate_num_tasks_with_annotations(queryset):
         .values('task__id')
         .distinct()
     )
-    return queryset.annotate(num_tasks_with_annotations=SQCount(subquery))
+    return _annotate_counter(queryset, 'num_tasks_with_annotations', subquery)
 
 
 def annotate_useful_annotation_number(queryset):
     subquery = Annotation.objects.filter(
         Q(project=OuterRef('pk')) & Q(was_cancelled=False) & Q(ground_truth=False) & Q(result__isnull=False)
     ).values('id')
-    return queryset.annotate(useful_annotation_number=SQCount(subquery))
+    return _annotate_counter(queryset, 'useful_annotation_number', subquery)
 
 
 def annotate_ground_truth_number(queryset):
     subquery = Annotation.objects.filter(Q(project=OuterRef('pk')) & Q(ground_truth=True)).values('id')
-    return queryset.annotate(ground_truth_number=SQCount(subquery))
+    return _annotate_counter(queryset, 'ground_truth_number', subquery)
 
 
 def annotate_skipped_annotations_number(queryset):
     subquery = Annotation.objects.filter(Q(project=OuterRef('pk')) & Q(was_cancelled=True)).values('id')
-    return queryset.annotate(skipped_annotations_number=SQCount(subquery))
+    return _annotate_counter(queryset, 'skipped_annotations_number', subquery)
@@ -3,6 +3,7 @@ from collections import Counter
 from typing import List, Tuple, Union
 
 from core.feature_flags import flag_set
+from core.metrics import timed
 from core.utils.common import conditional_atomic, db_is_not_sqlite, load_func
 from django.conf import settings
 from django.db.models import BooleanField, Case, Count, Exists, F, Max, OuterRef, Q, QuerySet, Value, When
@@ -312,6 +313,7 @@ def get_task_from_qs_with_sampling(
     return next_task, queue_info
 
 
+@timed('get_next_task')
 def get_next_task(
     user: User,
     prepared_tasks: QuerySet,
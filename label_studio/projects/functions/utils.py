@@ -1,7 +1,8 @@
 from logging import getLogger
 from typing import TYPE_CHECKING
 
-from tasks.models import AnnotationDraft, Task
+from core.utils.common import batch
+from tasks.models import Task
 
 logger = getLogger(__name__)
 
@@ -59,9 +60,7 @@ def recalculate_created_annotations_and_labels_from_scratch(
     summary.created_labels, summary.created_annotations = {}, {}
     summary.update_created_annotations_and_labels(project.annotations.all())
 
-    summary.created_labels_drafts = {}
-    drafts = AnnotationDraft.objects.filter(task__project=project)
-    summary.update_created_labels_drafts(drafts)
+    summary.recalculate_created_labels_drafts()
 
     logger.info(
         f'Reset cache finished for project {project.id} and organization {organization_id}:\n'
@@ -69,3 +68,28 @@ def recalculate_created_annotations_and_labels_from_scratch(
         f'created_labels = {summary.created_labels}\n'
         f'created_labels_drafts = {summary.created_labels_drafts}'
     )
+
+
+def recalculate_projects_counters(project_ids=None, organization_id=None) -> int:
+    """Recalculate persisted project counters (ProjectSummary.task_number, etc) from scratch to repair drift
+
+    :param project_ids: Project ids to recalculate, all projects if None
+    :param organization_id: Limit recalculation to organization projects
+    :return: Number of processed projects
+    """
+    from django.conf import settings
+    from projects.models import Project, ProjectSummary
+
+    projects = Project.objects.order_by('id')
+    if project_ids is not None:
+        projects = projects.filter(id__in=project_ids)
+    if organization_id is not None:
+        projects = projects.filter(organization_id=organization_id)
+
+    processed = 0
+    # recalculate in chunks to keep aggregation queries and bulk updates small
+    for chunk in batch(list(projects.values_list('id', flat=True)), settings.BATCH_SIZE):
+        ProjectSummary.recalculate_counters(chunk)
+        processed += len(chunk)
+        logger.info(f'Project counters recalculated for {processed} projects')
+    return processed
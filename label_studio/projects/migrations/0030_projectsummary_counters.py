@@ -0,0 +1,53 @@
+# Generated by Django 5.1.15 on 2026-10-19 02:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0029_alter_project_created_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectsummary',
+            name='finished_task_number',
+            field=models.IntegerField(default=None, null=True, verbose_name='finished task number'),
+        ),
+        migrations.AddField(
+            model_name='projectsummary',
+            name='ground_truth_number',
+            field=models.IntegerField(default=None, null=True, verbose_name='ground truth number'),
+        ),
+        migrations.AddField(
+            model_name='projectsummary',
+            name='num_tasks_with_annotations',
+            field=models.IntegerField(default=None, null=True, verbose_name='number of tasks with annotations'),
+        ),
+        migrations.AddField(
+            model_name='projectsummary',
+            name='skipped_annotations_number',
+            field=models.IntegerField(default=None, null=True, verbose_name='skipped annotations number'),
+        ),
+        migrations.AddField(
+            model_name='projectsummary',
+            name='task_number',
+            field=models.IntegerField(default=None, null=True, verbose_name='task number'),
+        ),
+        migrations.AddField(
+            model_name='projectsummary',
+            name='total_annotations_number',
+            field=models.IntegerField(default=None, null=True, verbose_name='total annotations number'),
+        ),
+        migrations.AddField(
+            model_name='projectsummary',
+            name='total_predictions_number',
+            field=models.IntegerField(default=None, null=True, verbose_name='total predictions number'),
+        ),
+        migrations.AddField(
+            model_name='projectsummary',
+            name='useful_annotation_number',
+            field=models.IntegerField(default=None, null=True, verbose_name='useful annotation number'),
+        ),
+    ]
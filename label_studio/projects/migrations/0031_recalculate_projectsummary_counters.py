@@ -0,0 +1,51 @@
+import logging
+
+from core.models import AsyncMigrationStatus
+from core.redis import start_job_async_or_sync
+from django.db import migrations
+from projects.functions.utils import recalculate_projects_counters
+
+logger = logging.getLogger(__name__)
+migration_name = '0031_recalculate_projectsummary_counters'
+
+
+def forward_migration(migration_name):
+    logger.info(f'Starting async migration {migration_name}')
+    migration = AsyncMigrationStatus.objects.create(
+        name=migration_name,
+        status=AsyncMigrationStatus.STATUS_STARTED,
+    )
+
+    try:
+        processed = recalculate_projects_counters()
+    except Exception as e:
+        migration.status = AsyncMigrationStatus.STATUS_FAILED
+        migration.save()
+        logger.error(f'Async migration {migration_name} failed: {e}')
+        raise
+
+    migration.status = AsyncMigrationStatus.STATUS_FINISHED
+    migration.meta = {'projects_processed': processed}
+    migration.save()
+    logger.info(f'Async migration {migration_name} complete')
+
+
+def forwards(apps, schema_editor):
+    # Dispatch migration to workers without passing unpicklable objects
+    start_job_async_or_sync(forward_migration, migration_name=migration_name)
+
+
+def backwards(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('projects', '0030_projectsummary_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -1,6 +1,7 @@
 from typing import TYPE_CHECKING, Mapping, Optional
 
 from core.redis import start_job_async_or_sync
+from django.conf import settings
 from django.db.models import QuerySet
 from django.utils.functional import cached_property
 
@@ -13,7 +14,7 @@ class ProjectMixin:
         """
         Async start rearrange overlap depending on annotation count in tasks
         """
-        start_job_async_or_sync(self._rearrange_overlap_cohort)
+        start_job_async_or_sync(self._rearrange_overlap_cohort, job_timeout=settings.RQ_LONG_JOB_TIMEOUT)
 
     def update_tasks_counters_and_is_labeled(self, tasks_queryset, from_scratch=True):
         """
@@ -72,6 +73,7 @@ class ProjectMixin:
             maximum_annotations_changed,
             overlap_cohort_percentage_changed,
             tasks_number_changed,
+            job_timeout=settings.RQ_LONG_JOB_TIMEOUT,
         )
 
     def has_permission(self, user):
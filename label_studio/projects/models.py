@@ -2,10 +2,12 @@
 """
 import json
 import logging
+from collections import Counter
 from typing import Any, Mapping, Optional
 
 from annoying.fields import AutoOneToOneField
 from core.label_config import (
+    cached_parse_config,
     check_control_in_config_by_regex,
     check_toname_in_config_by_regex,
     config_line_stipped,
@@ -19,20 +21,21 @@ from core.label_config import (
     get_sample_task,
     validate_label_config,
 )
+from core.redis import update_job_progress
 from core.utils.common import (
     create_hash,
     get_attr_or_item,
     load_func,
     merge_labels_counters,
 )
-from core.utils.db import fast_first
+from core.utils.db import SQCount, batch_ids, fast_first
 from django.conf import settings
+from django.core.cache import cache
 from django.core.validators import MaxLengthValidator, MinLengthValidator
 from django.db import models, transaction
-from django.db.models import Avg, BooleanField, Case, Count, JSONField, Max, Q, Sum, Value, When
+from django.db.models import Avg, BooleanField, Case, Count, F, JSONField, Max, OuterRef, Q, Sum, Value, When
 from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
-from label_studio_sdk._extensions.label_studio_tools.core.label_config import parse_config
 from labels_manager.models import Label
 from projects.functions import (
     annotate_finished_task_number,
@@ -51,13 +54,25 @@ from tasks.models import (
     Annotation,
     AnnotationDraft,
     Prediction,
+    Q_finished_annotations,
     Q_task_finished_annotations,
     Task,
+    TaskDeletion,
     bulk_update_stats_project_tasks,
 )
 
 logger = logging.getLogger(__name__)
 
+# seconds to keep position of chunked task updates for restarted jobs
+TASKS_CHUNKS_STATE_TTL = 24 * 60 * 60
+
+
+class ProjectQuerySet(models.QuerySet):
+    def delete(self):
+        # bulk deletion (e.g. admin "delete selected") doesn't call Project.delete()
+        with TaskDeletion():
+            return super().delete()
+
 
 class ProjectManager(models.Manager):
     COUNTER_FIELDS = [
@@ -82,6 +97,9 @@ class ProjectManager(models.Manager):
         'skipped_annotations_number': annotate_skipped_annotations_number,
     }
 
+    def get_queryset(self):
+        return ProjectQuerySet(self.model, using=self._db)
+
     def for_user(self, user):
         return self.filter(organization=user.active_organization)
 
@@ -424,22 +442,20 @@ class Project(ProjectMixin, models.Model):
             tasks_with_overlap = self.tasks.filter(overlap__gt=1) if self.maximum_annotations > 1 else self.tasks.all()
             if tasks_with_overlap.exists():
                 # if there is a part with overlapped tasks, affect only them
-                tasks_with_overlap.update(overlap=self.maximum_annotations)
+                self._update_tasks_overlap(tasks_with_overlap, self.maximum_annotations)
             elif self.overlap_cohort_percentage < 100:
                 self._rearrange_overlap_cohort()
             else:
                 # otherwise affect all tasks
-                self.tasks.update(overlap=self.maximum_annotations)
-                tasks_with_overlap = self.tasks.all()
-            # update is_labeled after change
-            bulk_update_stats_project_tasks(tasks_with_overlap, project=self)
+                self._update_tasks_overlap(self.tasks.all(), self.maximum_annotations)
+            self.recalculate_counters()
 
         # if cohort slider is tweaked
         elif overlap_cohort_percentage_changed:
             if self.maximum_annotations == 1:
                 if maximum_annotations_changed:
-                    self.tasks.update(overlap=1)
-                    bulk_update_stats_project_tasks(self.tasks.all(), project=self)
+                    self._update_tasks_overlap(self.tasks.all(), 1)
+                    self.recalculate_counters()
                 else:
                     logger.info(
                         f'Project {str(self)}: cohort percentage was changed but maximum annotations was not and is 1; taking no action'
@@ -451,51 +467,104 @@ class Project(ProjectMixin, models.Model):
         elif tasks_number_changed and self.overlap_cohort_percentage < 100 and self.maximum_annotations > 1:
             self._rearrange_overlap_cohort()
 
+    def _iterate_task_chunks(self, tasks, operation, params):
+        """
+        Iterate over task ids in chunks of BATCH_SIZE and report progress into the rq job.
+        Position is saved in cache after each chunk, so if the job is restarted with the same params
+        (e.g. worker was killed), it continues from the last processed chunk
+        :param tasks: Tasks queryset
+        :param operation: Operation name, part of the cache key
+        :param params: Operation params, saved position is used only if they are the same
+        """
+        key = f'project:{self.id}:{operation}'
+        params = {**params, 'tasks': str(tasks.query)}
+        state = cache.get(key)
+        if not state or state['params'] != params:
+            state = {'params': params, 'last_id': None, 'processed': 0}
+        elif state['last_id'] is not None:
+            logger.info(f'Project {self.id}: continue {operation} after task {state["last_id"]}')
+
+        total = tasks.count()
+        for ids in batch_ids(tasks, settings.BATCH_SIZE, start_after=state['last_id']):
+            yield ids
+            state['last_id'], state['processed'] = ids[-1], state['processed'] + len(ids)
+            cache.set(key, state, TASKS_CHUNKS_STATE_TTL)
+            update_job_progress(operation=operation, processed=state['processed'], total=total)
+        cache.delete(key)
+
+    def _update_tasks_overlap(self, tasks, overlap):
+        """
+        Set overlap and update is_labeled for tasks, chunk by chunk
+        """
+        params = {'overlap': overlap}
+        for ids in self._iterate_task_chunks(tasks, 'update_tasks_overlap', params):
+            with transaction.atomic():
+                Task.objects.filter(id__in=ids).update(overlap=overlap)
+                bulk_update_stats_project_tasks(Task.objects.filter(id__in=ids), project=self)
+
     def _rearrange_overlap_cohort(self):
         """
-        Rearrange overlap depending on annotation count in tasks
+        Rearrange overlap depending on annotation count in tasks.
+        Tasks with enough finished annotations are always in the overlap cohort, the rest of the cohort
+        is filled with tasks having the most annotations. Instead of sorting all tasks, the annotation count
+        threshold is found with a histogram, so every chunk of tasks is updated with one condition
         """
-        all_project_tasks = Task.objects.filter(project=self)
         max_annotations = self.maximum_annotations
-        must_tasks = int(self.tasks.count() * self.overlap_cohort_percentage / 100 + 0.5)
         logger.info(
             f'Starting _rearrange_overlap_cohort with params: Project {str(self)} maximum_annotations '
             f'{max_annotations} and percentage {self.overlap_cohort_percentage}'
         )
-        tasks_with_max_annotations = all_project_tasks.annotate(
-            anno=Count('annotations', filter=Q_task_finished_annotations & Q(annotations__ground_truth=False))
-        ).filter(anno__gte=max_annotations)
-
-        tasks_with_min_annotations = all_project_tasks.exclude(id__in=tasks_with_max_annotations)
+        finished_annotations = Annotation.objects.filter(
+            Q_finished_annotations, task=OuterRef('pk'), ground_truth=False
+        ).values('id')
+        tasks = Task.objects.filter(project=self).annotate(
+            finished_annotations=SQCount(finished_annotations),
+            annotations_count=SQCount(Annotation.objects.filter(task=OuterRef('pk')).values('id')),
+        )
+        must_tasks = int(self.tasks.count() * self.overlap_cohort_percentage / 100 + 0.5)
+        cohort = Q(finished_annotations__gte=max_annotations)
         # check how many tasks left to finish
-        left_must_tasks = max(must_tasks - tasks_with_max_annotations.count(), 0)
+        left_must_tasks = max(must_tasks - tasks.filter(cohort).count(), 0)
         logger.info(f'Required tasks {must_tasks} and left required tasks {left_must_tasks}')
+
+        params = {'maximum_annotations': max_annotations, 'must_tasks': must_tasks}
         if left_must_tasks > 0:
-            # if there are unfinished tasks update tasks with count(annotations) >= overlap
-            ids = list(tasks_with_max_annotations.values_list('id', flat=True))
-            all_project_tasks.filter(id__in=ids).update(overlap=max_annotations, is_labeled=True)
-            # order other tasks by count(annotations)
-            tasks_with_min_annotations = (
-                tasks_with_min_annotations.annotate(anno=Count('annotations')).order_by('-anno').distinct()
+            # other tasks are taken by annotation count: all tasks above the threshold count
+            # and the first ones (by id) with the threshold count
+            histogram = (
+                tasks.exclude(cohort)
+                .values('annotations_count')
+                .annotate(tasks_number=Count('id'))
+                .order_by('-annotations_count')
             )
-            # assign overlap depending on annotation count
-            # assign max_annotations and update is_labeled
-            ids = list(tasks_with_min_annotations[:left_must_tasks].values_list('id', flat=True))
-            all_project_tasks.filter(id__in=ids).update(overlap=max_annotations)
-            # assign 1 to left
-            ids = list(tasks_with_min_annotations[left_must_tasks:].values_list('id', flat=True))
-            min_tasks_to_update = all_project_tasks.filter(id__in=ids)
-            min_tasks_to_update.update(overlap=1)
-        else:
-            ids = list(tasks_with_max_annotations.values_list('id', flat=True))
-            all_project_tasks.filter(id__in=ids).update(overlap=max_annotations)
-            ids = list(tasks_with_min_annotations.values_list('id', flat=True))
-            all_project_tasks.filter(id__in=ids).update(overlap=1)
-        # update is labeled after tasks rearrange overlap
-        bulk_update_stats_project_tasks(all_project_tasks, project=self)
+            taken = 0
+            for row in histogram:
+                if taken + row['tasks_number'] >= left_must_tasks:
+                    threshold = row['annotations_count']
+                    last_id = (
+                        tasks.exclude(cohort)
+                        .filter(annotations_count=threshold)
+                        .order_by('id')
+                        .values_list('id', flat=True)[left_must_tasks - taken - 1]
+                    )
+                    cohort |= Q(annotations_count__gt=threshold) | Q(annotations_count=threshold, id__lte=last_id)
+                    params.update(threshold=threshold, last_id=last_id)
+                    break
+                taken += row['tasks_number']
+
+        all_project_tasks = Task.objects.filter(project=self)
+        for ids in self._iterate_task_chunks(all_project_tasks, 'rearrange_overlap_cohort', params):
+            cohort_ids = list(tasks.filter(cohort, id__in=ids).values_list('id', flat=True))
+            with transaction.atomic():
+                Task.objects.filter(id__in=cohort_ids).update(overlap=max_annotations)
+                Task.objects.filter(id__in=ids).exclude(id__in=cohort_ids).update(overlap=1)
+                # update is labeled after tasks rearrange overlap
+                bulk_update_stats_project_tasks(Task.objects.filter(id__in=ids), project=self)
+        self.recalculate_counters()
 
     def remove_tasks_by_file_uploads(self, file_upload_ids):
-        self.tasks.filter(file_upload_id__in=file_upload_ids).delete()
+        with TaskDeletion():
+            self.tasks.filter(file_upload_id__in=file_upload_ids).delete()
 
     def advance_onboarding(self):
         """Move project to next onboarding step"""
@@ -630,7 +699,7 @@ class Project(ProjectMixin, models.Model):
             labels_from_config_by_tag = set(
                 labels_from_config[get_original_fromname_by_regex(config_string, control_tag_from_data)]
             )
-            parsed_config = parse_config(config_string)
+            parsed_config = cached_parse_config(config_string)
             tag_types = [tag_info['type'] for _, tag_info in parsed_config.items()]
             # DEV-1990 Workaround for Video labels as there are no labels in VideoRectangle tag
             if 'VideoRectangle' in tag_types:
@@ -753,7 +822,7 @@ class Project(ProjectMixin, models.Model):
 
         if label_config_has_changed or project_with_config_just_created:
             self.data_types = extract_data_types(self.label_config)
-            self.parsed_label_config = parse_config(self.label_config)
+            self.parsed_label_config = cached_parse_config(self.label_config)
             self.label_config_hash = hash(str(self.parsed_label_config))
             if update_fields is not None:
                 update_fields = {'data_types', 'parsed_label_config', 'label_config_hash'}.union(update_fields)
@@ -781,6 +850,10 @@ class Project(ProjectMixin, models.Model):
             steps = ProjectOnboardingSteps.objects.all()
             objs = [ProjectOnboarding(project=self, step=step) for step in steps]
             ProjectOnboarding.objects.bulk_create(objs)
+            # new project has nothing to count, so counters are maintained incrementally from the start
+            ProjectSummary.objects.get_or_create(
+                project=self, defaults=dict.fromkeys(ProjectManager.COUNTER_FIELDS, 0)
+            )
 
         # argument for recalculate project task stats
         if recalc:
@@ -796,6 +869,7 @@ class Project(ProjectMixin, models.Model):
             bulk_update_stats_project_tasks(
                 self.tasks.filter(Q(annotations__isnull=False) & Q(annotations__ground_truth=False))
             )
+            self.recalculate_counters()
 
         if hasattr(self, 'summary'):
             with transaction.atomic():
@@ -811,6 +885,11 @@ class Project(ProjectMixin, models.Model):
                     )
                     summary.reset(tasks_data_based=False)
 
+    def delete(self, *args, **kwargs):
+        # cascade deleted tasks don't recalculate the project they belong to one by one
+        with TaskDeletion():
+            return super().delete(*args, **kwargs)
+
     def get_member_ids(self):
         if hasattr(self, 'team_link'):
             # project has defined team scope
@@ -929,7 +1008,7 @@ class Project(ProjectMixin, models.Model):
     def get_parsed_config(self):
         if self.parsed_label_config is None:
             try:
-                self.parsed_label_config = parse_config(self.label_config)
+                self.parsed_label_config = cached_parse_config(self.label_config)
                 self.save(update_fields=['parsed_label_config'])
             except Exception as e:
                 logger.error(f'Error parsing label config for project {self.id}: {e}', exc_info=True)
@@ -994,13 +1073,13 @@ class Project(ProjectMixin, models.Model):
 
     def update_ml_backends_state(self):
         """
-        Updates the state of all ml_backends associated with this instance.
+        Updates the state of all ml_backends associated with this instance, cached state is used if it's fresh.
 
         :return: List of updated MLBackend instances.
         """
         ml_backends = self.get_ml_backends()
         for mlb in ml_backends:
-            mlb.update_state()
+            mlb.refresh_state()
 
         return ml_backends
 
@@ -1056,6 +1135,10 @@ class Project(ProjectMixin, models.Model):
                 'presign_ttl': storage.presign_ttl,
             }
 
+    def recalculate_counters(self):
+        """Recalculate persisted project counters (task_number, finished_task_number, etc.) from scratch"""
+        ProjectSummary.recalculate_counters([self.id])
+
     def _update_tasks_counters_and_is_labeled(self, task_ids, from_scratch=True):
         """
         Update tasks counters and is_labeled in batches of size settings.BATCH_SIZE.
@@ -1076,6 +1159,7 @@ class Project(ProjectMixin, models.Model):
                 num_tasks_updated += update_tasks_counters(queryset, from_scratch)
                 bulk_update_stats_project_tasks(queryset, self)
             page_idx += 1
+        self.recalculate_counters()
         return num_tasks_updated
 
     def _update_tasks_counters_and_task_states(
@@ -1098,6 +1182,8 @@ class Project(ProjectMixin, models.Model):
         queryset = make_queryset_from_iterable(queryset)
         objs = update_tasks_counters(queryset, from_scratch)
         self._update_tasks_states(maximum_annotations_changed, overlap_cohort_percentage_changed, tasks_number_changed)
+        # tasks, annotations and predictions could be bulk created or deleted without signals
+        self.recalculate_counters()
 
         if recalculate_all_stats and recalculate_stats_counts:
             recalculate_all_stats(self.id, **recalculate_stats_counts)
@@ -1209,23 +1295,101 @@ class ProjectSummary(models.Model):
         _('created labels in drafts'), null=True, default=dict, help_text='Unique drafts labels'
     )
 
+    # Persisted ProjectManager.COUNTER_FIELDS, maintained incrementally by task/annotation/prediction write paths.
+    # New projects start with 0, NULL is left only in summaries of projects created before the counters were added
+    # and means counters are not calculated yet, use recalculate_counters() to initialize or repair them
+    task_number = models.IntegerField(_('task number'), null=True, default=None)
+    finished_task_number = models.IntegerField(_('finished task number'), null=True, default=None)
+    total_predictions_number = models.IntegerField(_('total predictions number'), null=True, default=None)
+    total_annotations_number = models.IntegerField(_('total annotations number'), null=True, default=None)
+    num_tasks_with_annotations = models.IntegerField(_('number of tasks with annotations'), null=True, default=None)
+    useful_annotation_number = models.IntegerField(_('useful annotation number'), null=True, default=None)
+    ground_truth_number = models.IntegerField(_('ground truth number'), null=True, default=None)
+    skipped_annotations_number = models.IntegerField(_('skipped annotations number'), null=True, default=None)
+
     def has_permission(self, user):
         user.project = self.project  # link for activity log
         return self.project.has_permission(user)
 
+    @staticmethod
+    def update_counters(project_id, **deltas):
+        """Increment persisted project counters, e.g. update_counters(project.id, task_number=1).
+        Counters that are not calculated yet (NULL) stay untouched.
+        """
+        updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+        if updates:
+            ProjectSummary.objects.filter(project_id=project_id, task_number__isnull=False).update(**updates)
+
+    @staticmethod
+    def recalculate_counters(project_ids):
+        """Calculate persisted project counters from scratch with one aggregation query per table"""
+        project_ids = [project_id for project_id in project_ids if project_id is not None]
+        if not project_ids:
+            return
+        counters = {project_id: dict.fromkeys(ProjectManager.COUNTER_FIELDS, 0) for project_id in project_ids}
+
+        useful = Q(was_cancelled=False, ground_truth=False, result__isnull=False)
+        aggregations = [
+            (
+                Task,
+                {
+                    'task_number': Count('id'),
+                    'finished_task_number': Count('id', filter=Q(is_labeled=True)),
+                },
+            ),
+            (
+                Prediction,
+                {
+                    'total_predictions_number': Count('id'),
+                },
+            ),
+            (
+                Annotation,
+                {
+                    'total_annotations_number': Count('id', filter=Q(was_cancelled=False)),
+                    'num_tasks_with_annotations': Count('task_id', filter=useful, distinct=True),
+                    'useful_annotation_number': Count('id', filter=useful),
+                    'ground_truth_number': Count('id', filter=Q(ground_truth=True)),
+                    'skipped_annotations_number': Count('id', filter=Q(was_cancelled=True)),
+                },
+            ),
+        ]
+        for model, aggregation in aggregations:
+            # order_by() drops the default ordering, otherwise it gets into GROUP BY
+            rows = (
+                model.objects.filter(project_id__in=project_ids)
+                .order_by()
+                .values('project_id')
+                .annotate(**aggregation)
+            )
+            for row in rows:
+                counters[row['project_id']].update({field: row[field] for field in aggregation})
+
+        ProjectSummary.objects.bulk_create(
+            [ProjectSummary(project_id=project_id) for project_id in project_ids], ignore_conflicts=True
+        )
+        summaries = list(ProjectSummary.objects.filter(project_id__in=project_ids))
+        for summary in summaries:
+            for field, value in counters[summary.project_id].items():
+                setattr(summary, field, value)
+        ProjectSummary.objects.bulk_update(summaries, ProjectManager.COUNTER_FIELDS, batch_size=settings.BATCH_SIZE)
+
     def reset(self, tasks_data_based=True):
         import traceback
 
         logger.info(
             f'reset summary project_id={self.project_id} {tasks_data_based=} {self.all_data_columns=} {traceback.format_stack(limit=4)=}'
         )
+        update_fields = ['created_annotations', 'created_labels', 'created_labels_drafts']
         if tasks_data_based:
             self.all_data_columns = {}
             self.common_data_columns = []
+            update_fields += ['all_data_columns', 'common_data_columns']
         self.created_annotations = {}
         self.created_labels = {}
         self.created_labels_drafts = {}
-        self.save()
+        # counters are maintained separately, don't overwrite them
+        self.save(update_fields=update_fields)
 
     def update_data_columns(self, tasks):
         common_data_columns = set()
@@ -1253,17 +1417,22 @@ class ProjectSummary(models.Model):
         self.save(update_fields=['all_data_columns', 'common_data_columns'])
 
     def remove_data_columns(self, tasks):
+        counts = Counter()
+        for task in tasks:
+            counts.update(get_attr_or_item(task, 'data').keys())
+        self.remove_data_column_counts(counts)
+
+    def remove_data_column_counts(self, counts):
+        """Reduce data column counters, counts is {column: number of removed tasks with this column}"""
         all_data_columns = dict(self.all_data_columns)
         keys_to_remove = []
 
-        for task in tasks:
-            task_data = get_attr_or_item(task, 'data')
-            for key in task_data.keys():
-                if key in all_data_columns:
-                    all_data_columns[key] -= 1
-                    if all_data_columns[key] == 0:
-                        keys_to_remove.append(key)
-                        all_data_columns.pop(key)
+        for key, count in counts.items():
+            if key in all_data_columns:
+                all_data_columns[key] -= count
+                if all_data_columns[key] <= 0:
+                    keys_to_remove.append(key)
+                    all_data_columns.pop(key)
         self.all_data_columns = all_data_columns
 
         if keys_to_remove:
@@ -1331,7 +1500,7 @@ class ProjectSummary(models.Model):
                 from_name = result['from_name']
 
                 # aggregate labels
-                if from_name not in self.created_labels:
+                if from_name not in labels:
                     labels[from_name] = dict()
 
                 for label in self._get_labels(result):
@@ -1383,6 +1552,28 @@ class ProjectSummary(models.Model):
         self.created_labels = created_labels
         self.save(update_fields=['created_annotations', 'created_labels'])
 
+    def replace_created_labels(self, renamed_regions):
+        """Update created_labels counters after annotation regions were changed in place
+        :param renamed_regions: List of (region before change, region after change)
+        """
+        labels = dict(self.created_labels)
+        for old_region, new_region in renamed_regions:
+            for region, delta in ((old_region, -1), (new_region, 1)):
+                if not self._get_annotation_key(region):
+                    continue
+                from_name_labels = dict(labels.get(region['from_name'], {}))
+                for label in self._get_labels(region):
+                    count = from_name_labels.get(label, 0) + delta
+                    if count > 0:
+                        from_name_labels[label] = count
+                    else:
+                        from_name_labels.pop(label, None)
+                labels[region['from_name']] = from_name_labels
+
+        logger.debug(f'summary.created_labels = {labels}')
+        self.created_labels = labels
+        self.save(update_fields=['created_labels'])
+
     def update_created_labels_drafts(self, drafts):
         labels = dict(self.created_labels_drafts)
         for draft in drafts:
@@ -1396,7 +1587,7 @@ class ProjectSummary(models.Model):
                 from_name = result['from_name']
 
                 # aggregate labels
-                if from_name not in self.created_labels_drafts:
+                if from_name not in labels:
                     labels[from_name] = dict()
 
                 for label in self._get_labels(result):
@@ -1406,6 +1597,12 @@ class ProjectSummary(models.Model):
         self.created_labels_drafts = labels
         self.save(update_fields=['created_labels_drafts'])
 
+    def recalculate_created_labels_drafts(self):
+        """Count draft labels from scratch, drafts are read in chunks"""
+        self.created_labels_drafts = {}
+        drafts = AnnotationDraft.objects.filter(task__project_id=self.project_id).only('result')
+        self.update_created_labels_drafts(drafts.iterator(chunk_size=settings.BATCH_SIZE))
+
     def remove_created_drafts_and_labels(self, drafts):
         # we are going to remove all drafts, so we'll reset the corresponding field on the summary
         remove_all_drafts = AnnotationDraft.objects.filter(task__project=self.project).count() == len(drafts)
@@ -325,6 +325,7 @@ def main():
                 input_args.export_format,
                 input_args.export_path,
                 serializer_context=input_args.export_serializer_context,
+                workers=input_args.workers,
             )
         except Exception as e:
             logger.exception(f'Failed to export project: {e}')
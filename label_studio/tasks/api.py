@@ -13,7 +13,6 @@ from data_manager.models import PrepareParams
 from data_manager.serializers import DataManagerTaskSerializer
 from django.db import transaction
 from django.db.models import Q
-from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg.utils import no_body, swagger_auto_schema
@@ -39,7 +38,9 @@ from tasks.serializers import (
     PredictionSerializer,
     TaskSerializer,
     TaskSimpleSerializer,
+    TaskWithAnnotationsAndPredictionsAndDraftsSerializer,
 )
+from users.activity import user_activity_buffer
 from webhooks.models import WebhookAction
 from webhooks.utils import (
     api_webhook,
@@ -263,6 +264,10 @@ class TaskAPI(generics.RetrieveUpdateDestroyAPIView):
         self.task = self.get_object()
         return super().initial(request, *args, **kwargs)
 
+    def is_editor_request(self):
+        """GET /api/tasks/<pk>?fields=editor returns only what the labeling editor needs"""
+        return self.request.method == 'GET' and self.request.query_params.get('fields') == 'editor'
+
     @staticmethod
     def prefetch(queryset):
         return queryset.prefetch_related(
@@ -293,6 +298,8 @@ class TaskAPI(generics.RetrieveUpdateDestroyAPIView):
     def get(self, request, pk):
         context = self.get_retrieve_serializer_context(request)
         context['project'] = project = self.task.project
+        if self.is_editor_request():
+            return self.get_for_editor(request, context)
 
         # get prediction
         if (
@@ -307,9 +314,25 @@ class TaskAPI(generics.RetrieveUpdateDestroyAPIView):
         data = serializer.data
         return Response(data)
 
+    def get_for_editor(self, request, context):
+        """Task data with annotations, predictions and drafts without Data Manager fields,
+        the number of queries doesn't depend on the project size
+        """
+        project = context['project']
+        if project.evaluate_predictions_automatically or project.show_collab_predictions:
+            if not self.task.predictions.exists():
+                evaluate_predictions([self.task])
+                self.task.refresh_from_db()
+
+        serializer = TaskWithAnnotationsAndPredictionsAndDraftsSerializer(self.task, context=context)
+        return Response(serializer.data)
+
     def get_queryset(self):
         task_id = self.request.parser_context['kwargs'].get('pk')
-        task = generics.get_object_or_404(Task, pk=task_id)
+        if self.is_editor_request():
+            # annotations, predictions and drafts are loaded by the serializer for the current user only
+            return Task.objects.filter(pk=task_id).select_related('project')
+
         review = bool_from_request(self.request.GET, 'review', False)
         selected = {'all': False, 'included': [self.kwargs.get('pk')]}
         if review:
@@ -318,7 +341,7 @@ class TaskAPI(generics.RetrieveUpdateDestroyAPIView):
             kwargs = {'all_fields': True}
         project = self.request.query_params.get('project') or self.request.data.get('project')
         if not project:
-            project = task.project.id
+            project = generics.get_object_or_404(Task.objects.only('project_id'), pk=task_id).project_id
         return self.prefetch(
             Task.prepared.get_queryset(
                 prepare_params=PrepareParams(project=project, selectedItems=selected, request=self.request), **kwargs
@@ -581,8 +604,7 @@ class AnnotationsListAPI(GetParentObjectMixin, generics.ListCreateAPIView):
         annotation = ser.save(**extra_args)
 
         logger.debug(f'Save activity for user={self.request.user}')
-        self.request.user.activity_at = timezone.now()
-        self.request.user.save()
+        user_activity_buffer.record(self.request.user, 'activity_at')
 
         # Release task if it has been taken at work (it should be taken by the same user, or it makes sentry error
         logger.debug(f'User={user} releases task={task}')
@@ -1,26 +1,34 @@
-import json
 import logging
 import os
 import shutil
 import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 
-from core.bulk_update_utils import bulk_update
+import ujson as json
 from core.models import AsyncMigrationStatus
 from core.redis import start_job_async_or_sync
-from core.utils.common import batch
+from core.utils.db import SQCount
+from core.utils.io import get_temp_dir
 from data_export.mixins import ExportMixin
 from data_export.models import DataExport
 from data_export.serializers import ExportDataSerializer
 from data_manager.managers import TaskQuerySet
 from django.conf import settings
-from django.db import transaction
-from django.db.models import Count, Q
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
 from organizations.models import Organization
 from projects.models import Project
 from tasks.models import Annotation, Prediction, Task
 
 logger = logging.getLogger(__name__)
 
+# an interrupted counters calculation is resumed only if it's younger, tasks below its last_task_id
+# could be changed without counters update since then
+COUNTERS_RESUME_MAX_AGE = timedelta(days=1)
+
 
 def calculate_stats_all_orgs(from_scratch, redis, migration_name='0018_manual_migrate_counters'):
     logger = logging.getLogger(__name__)
@@ -72,18 +80,33 @@ def redis_job_for_calculation(org_id, from_scratch, migration_name='0018_manual_
         )
     )
     for project_dict in project_dicts:
-        migration = AsyncMigrationStatus.objects.create(
-            project_id=project_dict['id'],
-            name=migration_name,
-            status=AsyncMigrationStatus.STATUS_STARTED,
+        # resume the recent calculation with the same parameters interrupted by a failed or restarted job
+        migration = (
+            AsyncMigrationStatus.objects.filter(
+                project_id=project_dict['id'],
+                name=migration_name,
+                meta__from_scratch=from_scratch,
+                created_at__gte=timezone.now() - COUNTERS_RESUME_MAX_AGE,
+            )
+            .exclude(status=AsyncMigrationStatus.STATUS_FINISHED)
+            .order_by('-id')
+            .first()
         )
+        if migration is None:
+            migration = AsyncMigrationStatus.objects.create(
+                project_id=project_dict['id'],
+                name=migration_name,
+                status=AsyncMigrationStatus.STATUS_STARTED,
+                meta={'from_scratch': from_scratch},
+            )
         project_tasks = Task.objects.filter(project_id=project_dict['id'])
         logger.debug(
             f'Start processing stats project <{project_dict["title"]}> ({project_dict["id"]}) '
             f'with task count {project_tasks.count()} and updated_at {project_dict["updated_at"]}'
         )
 
-        task_count = update_tasks_counters(project_tasks, from_scratch=from_scratch)
+        update_tasks_counters(project_tasks, from_scratch=from_scratch, migration=migration)
+        task_count = (migration.meta or {}).get('tasks_processed', 0)
 
         migration.status = AsyncMigrationStatus.STATUS_FINISHED
         migration.meta = {'tasks_processed': task_count, 'total_project_tasks': project_tasks.count()}
@@ -94,7 +117,12 @@ def redis_job_for_calculation(org_id, from_scratch, migration_name='0018_manual_
         )
 
 
-def export_project(project_id, export_format, path, serializer_context=None):
+def export_project(project_id, export_format, path, serializer_context=None, workers=1):
+    """Export all project tasks to file, tasks are streamed from DB to disk in batches,
+    so memory usage doesn't depend on the project size
+    :param workers: Number of threads serializing task batches in parallel
+    :return: Path to the exported file
+    """
     logger = logging.getLogger(__name__)
 
     project = Project.objects.get(id=project_id)
@@ -103,36 +131,97 @@ def export_project(project_id, export_format, path, serializer_context=None):
     supported_formats = [s['name'] for s in DataExport.get_export_formats(project)]
     assert export_format in supported_formats, f'Export format is not supported, please use {supported_formats}'
 
-    task_ids = (
-        Task.objects.filter(project=project).select_related('project').prefetch_related('annotations', 'predictions')
-    )
-
-    logger.debug(f'Start exporting project <{project.title}> ({project.id}) with task count {task_ids.count()}.')
+    logger.debug(f'Start exporting project <{project.title}> ({project.id}) with task count {project.tasks.count()}.')
 
     # serializer context
     if isinstance(serializer_context, str):
         serializer_context = json.loads(serializer_context)
     serializer_options = ExportMixin._get_export_serializer_option(serializer_context)
 
-    # export cycle
-    tasks = []
-    for _task_ids in batch(task_ids, 1000):
-        tasks += ExportDataSerializer(_task_ids, many=True, **serializer_options).data
+    with get_temp_dir() as tmp_dir:
+        # export cycle: JSON list is written task by task
+        input_json = os.path.join(tmp_dir, 'tasks.json')
+        with open(input_json, 'w', encoding='utf-8') as file:
+            file.write('[')
+            separator = ''
+            for serialized_tasks in _iter_export_batches(project, serializer_options, workers):
+                for serialized_task in serialized_tasks:
+                    file.write(separator + serialized_task)
+                    separator = ','
+            file.write(']')
+
+        with open(input_json, 'rb') as file:
+            md5 = ExportMixin.eval_md5(file)
+        name = f'project-{project.id}-at-{datetime.now().strftime("%Y-%m-%d-%H-%M")}-{md5[0:8]}'
+
+        # JSON is the native format, other formats are converted from the JSON file
+        if export_format == 'JSON':
+            filename = name + '.json'
+            filepath = os.path.join(path, filename) if os.path.isdir(path) else path
+            shutil.move(input_json, filepath)
+        else:
+            export_file, _, filename = DataExport.convert_export_file(
+                project, input_json, name, export_format, settings.CONVERTER_DOWNLOAD_RESOURCES
+            )
+            filepath = os.path.join(path, filename) if os.path.isdir(path) else path
+            with open(filepath, 'wb') as file:
+                shutil.copyfileobj(export_file, file)
+            export_file.close()
+
+    logger.debug(f'End exporting project <{project.title}> ({project.id}) in {export_format} format.')
+
+    return filepath
+
 
-    # convert to output format
-    export_file, _, filename = DataExport.generate_export_file(
-        project, tasks, export_format, settings.CONVERTER_DOWNLOAD_RESOURCES, {}
+def _iter_export_task_ids(project_id, batch_size):
+    last_task_id = 0
+    while task_ids := list(
+        Task.objects.filter(project_id=project_id, id__gt=last_task_id)
+        .order_by('id')
+        .values_list('id', flat=True)[:batch_size]
+    ):
+        yield task_ids
+        last_task_id = task_ids[-1]
+
+
+def _serialize_export_batch(task_ids, serializer_options):
+    """Serialize tasks to JSON strings, one string per task"""
+    tasks = (
+        Task.objects.filter(id__in=task_ids)
+        .order_by('id')
+        .select_related('project')
+        .prefetch_related('annotations', 'predictions')
     )
+    data = ExportDataSerializer(tasks, many=True, **serializer_options).data
+    return [json.dumps(task, ensure_ascii=False) for task in data]
 
-    # write to file
-    filepath = os.path.join(path, filename) if os.path.isdir(path) else path
-    with open(filepath, 'wb') as file:
-        shutil.copyfileobj(export_file, file)
-    export_file.close()
 
-    logger.debug(f'End exporting project <{project.title}> ({project.id}) in {export_format} format.')
+def _serialize_export_batch_in_thread(task_ids, serializer_options):
+    try:
+        return _serialize_export_batch(task_ids, serializer_options)
+    finally:
+        # every thread has its own connection
+        connection.close()
 
-    return filepath
+
+def _iter_export_batches(project, serializer_options, workers):
+    """Serialized task batches in task id order, with workers > 1 batches are serialized in threads,
+    only a few batches per worker are kept in memory
+    """
+    task_id_batches = _iter_export_task_ids(project.id, settings.BATCH_SIZE)
+    if workers <= 1:
+        for task_ids in task_id_batches:
+            yield _serialize_export_batch(task_ids, serializer_options)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = deque()
+        for task_ids in task_id_batches:
+            futures.append(executor.submit(_serialize_export_batch_in_thread, task_ids, serializer_options))
+            if len(futures) >= workers * 2:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
 
 
 def _fill_annotations_project(project_id):
@@ -174,18 +263,17 @@ def fill_predictions_project(migration_name):
     logger.info('Finished filling project field for Prediction model')
 
 
-def update_tasks_counters(queryset, from_scratch=True):
+def update_tasks_counters(queryset, from_scratch=True, migration=None):
     """
-    Update tasks counters for the passed queryset of Tasks
+    Update tasks counters for the passed queryset of Tasks,
+    tasks are processed in chunks of settings.BATCH_SIZE, each chunk is updated by UPDATE statements
+    with count subqueries, so tasks aren't loaded into memory and transactions are short
     :param queryset: Tasks to update queryset
     :param from_scratch: Skip calculated tasks
+    :param migration: AsyncMigrationStatus to save progress to after each chunk,
+    calculation is resumed from its meta['last_task_id']
     :return: Count of updated tasks
     """
-    objs = []
-
-    total_annotations = Count('annotations', distinct=True, filter=Q(annotations__was_cancelled=False))
-    cancelled_annotations = Count('annotations', distinct=True, filter=Q(annotations__was_cancelled=True))
-    total_predictions = Count('predictions', distinct=True)
     # construct QuerySet in case of list of Tasks
     if isinstance(queryset, list) and len(queryset) > 0 and isinstance(queryset[0], Task):
         queryset = Task.objects.filter(id__in=[task.id for task in queryset])
@@ -198,28 +286,39 @@ def update_tasks_counters(queryset, from_scratch=True):
             Q(total_annotations__gt=0) | Q(cancelled_annotations__gt=0) | Q(total_predictions__gt=0)
         )
 
-    # filter our tasks with 0 annotations and 0 predictions and update them with 0
-    queryset.filter(annotations__isnull=True, predictions__isnull=True).update(
-        total_annotations=0, cancelled_annotations=0, total_predictions=0
-    )
-
-    # filter our tasks with 0 annotations and 0 predictions
-    queryset = queryset.filter(Q(annotations__isnull=False) | Q(predictions__isnull=False))
-    queryset = queryset.annotate(
-        new_total_annotations=total_annotations,
-        new_cancelled_annotations=cancelled_annotations,
-        new_total_predictions=total_predictions,
-    )
-
-    for task in queryset.only('id', 'total_annotations', 'cancelled_annotations', 'total_predictions'):
-        task.total_annotations = task.new_total_annotations
-        task.cancelled_annotations = task.new_cancelled_annotations
-        task.total_predictions = task.new_total_predictions
-        objs.append(task)
-    with transaction.atomic():
-        bulk_update(
-            objs,
-            update_fields=['total_annotations', 'cancelled_annotations', 'total_predictions'],
-            batch_size=settings.BATCH_SIZE,
-        )
-    return len(objs)
+    annotations = Annotation.objects.filter(task_id=OuterRef('id'))
+    predictions = Prediction.objects.filter(task_id=OuterRef('id'))
+    counters = {
+        'total_annotations': SQCount(annotations.filter(was_cancelled=False).values('id')),
+        'cancelled_annotations': SQCount(annotations.filter(was_cancelled=True).values('id')),
+        'total_predictions': SQCount(predictions.values('id')),
+    }
+
+    meta = (migration.meta or {}) if migration else {}
+    last_task_id = meta.get('last_task_id', 0)
+    task_ids_queryset = queryset.order_by('id').values_list('id', flat=True)
+    updated = 0
+
+    while task_ids := list(task_ids_queryset.filter(id__gt=last_task_id)[: settings.BATCH_SIZE]):
+        tasks = Task.objects.filter(id__in=task_ids)
+        # errors are propagated, so the chunk doesn't need its own savepoint within outer transaction
+        with transaction.atomic(savepoint=False):
+            # tasks with 0 annotations and 0 predictions are updated with 0 without subqueries
+            tasks.filter(~Exists(annotations), ~Exists(predictions)).update(
+                total_annotations=0, cancelled_annotations=0, total_predictions=0
+            )
+            updated += tasks.filter(Exists(annotations) | Exists(predictions)).update(**counters)
+        last_task_id = task_ids[-1]
+
+        if migration:
+            migration.status = AsyncMigrationStatus.STATUS_IN_PROGRESS
+            migration.meta = {
+                **meta,
+                'last_task_id': last_task_id,
+                'tasks_processed': meta.get('tasks_processed', 0) + updated,
+            }
+            migration.save(update_fields=['status', 'meta'])
+        # the last chunk, no need to query for the next one
+        if len(task_ids) < settings.BATCH_SIZE:
+            break
+    return updated
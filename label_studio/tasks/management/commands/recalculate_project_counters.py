@@ -0,0 +1,24 @@
+import logging
+
+from core.redis import start_job_async_or_sync
+from django.core.management.base import BaseCommand
+from projects.functions.utils import recalculate_projects_counters
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Recalculate persisted project counters (task_number, total_annotations_number, etc)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organization', type=int, default=None, help='organization id')
+        parser.add_argument('--project', type=int, nargs='*', default=None, help='project ids')
+
+    def handle(self, *args, **options):
+        logger.debug('Start recalculating project counters.')
+        start_job_async_or_sync(
+            recalculate_projects_counters,
+            project_ids=options['project'],
+            organization_id=options['organization'],
+        )
+        logger.debug('Project counters recalculation started.')
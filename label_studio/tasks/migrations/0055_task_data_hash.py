@@ -0,0 +1,39 @@
+# Generated by Django 5.1.15 on 2026-10-19 02:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+IS_SQLITE = settings.DJANGO_DB == settings.DJANGO_DB_SQLITE
+
+if IS_SQLITE:
+    from django.db.migrations import AddIndex
+else:
+    from django.contrib.postgres.operations import AddIndexConcurrently as AddIndex
+
+
+class Migration(migrations.Migration):
+    atomic = IS_SQLITE
+
+    dependencies = [
+        ('tasks', '0054_add_brin_index_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='data_hash',
+            field=models.CharField(
+                blank=True,
+                default=None,
+                help_text='Digest of canonical task data json, it is used to find duplicated tasks. '
+                'Null means that the hash must be recalculated',
+                max_length=64,
+                null=True,
+                verbose_name='data hash',
+            ),
+        ),
+        AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'data_hash'], name='task_project_078f2c_idx'),
+        ),
+    ]
@@ -2,12 +2,15 @@
 """
 import base64
 import datetime
+import hashlib
 import logging
 import numbers
 import os
 import random
+import threading
 import traceback
 import uuid
+from collections import Counter, defaultdict
 from typing import Any, Mapping, Optional, Union, cast
 from urllib.parse import urljoin
 
@@ -15,21 +18,22 @@ import ujson as json
 from core.bulk_update_utils import bulk_update
 from core.current_request import get_current_request
 from core.feature_flags import flag_set
-from core.label_config import SINGLE_VALUED_TAGS
-from core.redis import start_job_async_or_sync
+from core.label_config import SINGLE_VALUED_TAGS, replace_task_data_undefined_with_config_field
+from core.redis import redis_connected, release_job_once, start_job_async_or_sync, start_job_once
 from core.utils.common import (
+    batch,
     find_first_one_to_one_related_field_by_prefix,
     load_func,
     string_is_url,
     temporary_disconnect_list_signal,
 )
-from core.utils.db import fast_first
+from core.utils.db import SQCount, fast_first
 from core.utils.params import get_env
 from data_import.models import FileUpload
 from data_manager.managers import PreparedTaskManager, TaskManager
 from django.conf import settings
 from django.db import OperationalError, models, transaction
-from django.db.models import CheckConstraint, F, JSONField, Q
+from django.db.models import CheckConstraint, F, JSONField, OuterRef, Q
 from django.db.models.lookups import GreaterThanOrEqual
 from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import Signal, receiver
@@ -161,6 +165,15 @@ class Task(TaskMixin, models.Model):
         db_index=True,
         help_text='When the last comment was updated',
     )
+    data_hash = models.CharField(
+        _('data hash'),
+        max_length=64,
+        null=True,
+        blank=True,
+        default=None,
+        help_text='Digest of canonical task data json, it is used to find duplicated tasks. '
+        'Null means that the hash must be recalculated',
+    )
 
     objects = TaskManager()  # task manager by default
     prepared = PreparedTaskManager()  # task manager with filters, ordering, etc for data_manager app
@@ -174,6 +187,7 @@ class Task(TaskMixin, models.Model):
             models.Index(fields=['id', 'overlap']),
             models.Index(fields=['overlap']),
             models.Index(fields=['project', 'id']),
+            models.Index(fields=['project', 'data_hash']),
         ]
 
     @property
@@ -448,6 +462,9 @@ class Task(TaskMixin, models.Model):
             return protected_data
         else:
             storage_objects = project.get_all_import_storage_objects
+            # storage of the task is looked up once and only when no project storage matches a field
+            task_storage = None
+            task_storage_checked = False
 
             # try resolve URLs via storage associated with that task
             for field in task_data:
@@ -468,7 +485,12 @@ class Task(TaskMixin, models.Model):
                 # TODO: to resolve nested lists and dicts we should improve get_storage_by_url(),
                 # Now always using get_storage_by_url to ensure the storage with the correct bucket is used
                 # As a last fallback we can use self.storage which is the storage the Task was imported from
-                storage = get_storage_by_url(task_data[field], storage_objects) or self.storage
+                storage = get_storage_by_url(task_data[field], storage_objects)
+                if storage is None:
+                    if not task_storage_checked:
+                        task_storage = self.storage
+                        task_storage_checked = True
+                    storage = task_storage
                 if storage:
                     try:
                         resolved_uri = storage.resolve_uri(task_data[field], self)
@@ -516,9 +538,40 @@ class Task(TaskMixin, models.Model):
             summary.remove_data_columns([self])
 
     def ensure_unique_groundtruth(self, annotation_id):
-        self.annotations.exclude(id=annotation_id).update(ground_truth=False)
+        ground_truths = self.annotations.exclude(id=annotation_id).filter(ground_truth=True)
+        # queryset update skips annotation signals, so project counters are updated here
+        useful = ground_truths.filter(Q_finished_annotations).count()
+        had_useful = self.annotations.filter(Q_finished_annotations, ground_truth=False).exists()
+        unflagged = ground_truths.update(ground_truth=False)
+        update_project_counters(
+            self.project_id,
+            ground_truth_number=-unflagged,
+            useful_annotation_number=useful,
+            num_tasks_with_annotations=int(useful > 0 and not had_useful),
+        )
+
+    @staticmethod
+    def compute_data_hash(data, project=None, first_key=None):
+        """Calculate digest of canonical task data json
+
+        :param data: task data
+        :param project: project is used to replace $undefined$ key with the first data key from label config
+        :param first_key: the first data key from label config, pass it to avoid label config parsing
+        """
+        if isinstance(data, dict) and settings.DATA_UNDEFINED_NAME in data and (project is not None or first_key):
+            data = dict(data)
+            replace_task_data_undefined_with_config_field(data, project, first_key=first_key)
+        payload = json.dumps(data, sort_keys=True, ensure_ascii=False, escape_forward_slashes=False)
+        return hashlib.sha256(payload.encode()).hexdigest()
 
     def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is None or 'data' in update_fields:
+            # project is needed for tasks with $undefined$ key only, don't fetch it otherwise
+            has_undefined_key = isinstance(self.data, dict) and settings.DATA_UNDEFINED_NAME in self.data
+            self.data_hash = self.compute_data_hash(self.data, self.project if has_undefined_key else None)
+            if update_fields is not None:
+                update_fields = {'data_hash'}.union(update_fields)
+
         if self.inner_id == 0:
             task = Task.objects.filter(project=self.project).order_by('-inner_id').first()
             max_inner_id = 1
@@ -533,22 +586,29 @@ class Task(TaskMixin, models.Model):
         super().save(*args, update_fields=update_fields, **kwargs)
 
     @staticmethod
-    def delete_tasks_without_signals(queryset):
+    def delete_tasks_without_signals(queryset, project_ids=None):
         """
         Delete Tasks queryset with switched off signals
         :param queryset: Tasks queryset
+        :param project_ids: Projects to recalculate counters for, taken from queryset if not provided
         """
         signals = [
             (post_delete, update_all_task_states_after_deleting_task, Task),
             (pre_delete, remove_data_columns, Task),
+            (pre_delete, count_useful_annotations_before_deleting_task, Task),
+            (post_delete, decrease_project_counters_after_deleting_annotation, Annotation),
         ]
-        with temporary_disconnect_list_signal(signals):
+        if project_ids is None:
+            project_ids = list(queryset.order_by().values_list('project_id', flat=True).distinct())
+        with TaskDeletion() as deletion, temporary_disconnect_list_signal(signals):
             queryset.delete()
+            # counters are recalculated at the end of the outermost deletion block
+            deletion.counter_project_ids.update(project_ids)
 
     @staticmethod
-    def delete_tasks_without_signals_from_task_ids(task_ids):
+    def delete_tasks_without_signals_from_task_ids(task_ids, project_id=None):
         queryset = Task.objects.filter(id__in=task_ids)
-        Task.delete_tasks_without_signals(queryset)
+        Task.delete_tasks_without_signals(queryset, project_ids=None if project_id is None else [project_id])
 
     def delete(self, *args, **kwargs):
         self.before_delete_actions()
@@ -788,8 +848,10 @@ class Annotation(AnnotationMixin, models.Model):
             logger.debug(f'On delete updated total_annotations for task {task.id}')
 
         logger.debug(f'Update task stats for task={task}')
+        was_labeled = task.is_labeled
         task.update_is_labeled()
         Task.objects.filter(id=task.id).update(is_labeled=task.is_labeled)
+        update_project_counters(task.project_id, finished_task_number=int(task.is_labeled) - int(was_labeled))
 
         # remove annotation counters in project summary followed by deleting an annotation
         logger.debug('Remove annotation counters in project summary followed by deleting an annotation')
@@ -870,18 +932,66 @@ class AnnotationDraft(models.Model):
         return self.task.project.has_permission(user)
 
     def save(self, *args, **kwargs):
-        with transaction.atomic():
-            super().save(*args, **kwargs)
-            project = self.task.project
-            if hasattr(project, 'summary'):
-                project.summary.update_created_labels_drafts([self])
+        if not redis_connected():
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                project = self.task.project
+                if hasattr(project, 'summary'):
+                    project.summary.update_created_labels_drafts([self])
+            return
+
+        # autosaves don't lock the project summary, draft labels are recalculated by a debounced job
+        super().save(*args, **kwargs)
+        schedule_draft_labels_update(self.get_project_id())
 
     def delete(self, *args, **kwargs):
-        with transaction.atomic():
-            project = self.task.project
-            if hasattr(project, 'summary'):
-                project.summary.remove_created_drafts_and_labels([self])
-            super().delete(*args, **kwargs)
+        if not redis_connected():
+            with transaction.atomic():
+                project = self.task.project
+                if hasattr(project, 'summary'):
+                    project.summary.remove_created_drafts_and_labels([self])
+                super().delete(*args, **kwargs)
+            return
+
+        project_id = self.get_project_id()
+        super().delete(*args, **kwargs)
+        schedule_draft_labels_update(project_id)
+
+    def get_project_id(self):
+        if AnnotationDraft.task.is_cached(self):
+            return self.task.project_id
+        return Task.objects.filter(id=self.task_id).values_list('project_id', flat=True).first()
+
+
+def _draft_labels_job_key(project_id):
+    return f'project:{project_id}:draft_labels'
+
+
+def update_draft_labels(project_id):
+    """RQ job: recalculate ProjectSummary.created_labels_drafts from all drafts of the project"""
+    from projects.models import ProjectSummary
+
+    # drafts saved after this point queue a new job
+    release_job_once(_draft_labels_job_key(project_id))
+    summary = ProjectSummary.objects.filter(project_id=project_id).first()
+    if summary is not None:
+        summary.recalculate_created_labels_drafts()
+
+
+def schedule_draft_labels_update(project_id):
+    """Queue one update of project draft labels for all drafts saved or deleted
+    until the job starts, DRAFT_LABELS_UPDATE_DELAY makes this window longer
+    """
+    if project_id is None:
+        return
+    # the job counts drafts in the database, so it's queued only after they are committed
+    transaction.on_commit(lambda: _queue_draft_labels_update(project_id))
+
+
+def _queue_draft_labels_update(project_id):
+    start_job_once(
+        _draft_labels_job_key(project_id), update_draft_labels, project_id, delay=settings.DRAFT_LABELS_UPDATE_DELAY
+    )
 
 
 class Prediction(models.Model):
@@ -1217,6 +1327,13 @@ def update_all_task_states_after_deleting_task(sender, instance, **kwargs):
     use update_tasks_states for all project
     but call only tasks_number_changed section
     """
+    deletion = TaskDeletion.current()
+    if deletion is not None:
+        deletion.counter_project_ids.add(instance.project_id)
+        deletion.states_project_ids.add(instance.project_id)
+        return
+
+    decrease_project_counters_after_deleting_task(instance)
     try:
         instance.project.update_tasks_states(
             maximum_annotations_changed=False,
@@ -1227,12 +1344,168 @@ def update_all_task_states_after_deleting_task(sender, instance, **kwargs):
         logger.error('Error in update_all_task_states_after_deleting_task: ' + str(exc))
 
 
+# =========== BULK DELETION ===========
+
+
+class TaskDeletion:
+    """Collect projects affected by deleted tasks, annotations and predictions and update them
+    once at the end of the block instead of doing it in signal receivers for every deleted row.
+    Nested blocks are merged into the outermost one.
+
+    Example:
+        with TaskDeletion():
+            project.tasks.filter(file_upload_id__in=file_upload_ids).delete()
+    """
+
+    _local = threading.local()
+
+    def __init__(self):
+        # projects for counters recalculation (ProjectSummary.recalculate_counters)
+        self.counter_project_ids = set()
+        # projects for update_tasks_states(tasks_number_changed=True)
+        self.states_project_ids = set()
+        # {project_id: Counter({data column: number of deleted tasks with this column})}
+        self.data_columns = defaultdict(Counter)
+        # tasks of deleted predictions, total_predictions is updated for the tasks that still exist
+        self.prediction_task_ids = set()
+        # deleted tasks are excluded from prediction_task_ids
+        self.deleted_task_ids = set()
+        self.outer = None
+
+    @classmethod
+    def current(cls):
+        return getattr(cls._local, 'deletion', None)
+
+    def __enter__(self):
+        self.outer = self.current()
+        if self.outer is not None:
+            return self.outer
+        self._local.deletion = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.outer is not None:
+            return
+        self._local.deletion = None
+        if exc_type is None:
+            self.update_projects()
+
+    def add_task(self, task):
+        if isinstance(task.data, dict):
+            self.data_columns[task.project_id].update(task.data.keys())
+
+    def update_projects(self):
+        from projects.models import Project, ProjectSummary
+
+        predictions = Prediction.objects.filter(task_id=OuterRef('id')).values('id')
+        for task_ids in batch(list(self.prediction_task_ids - self.deleted_task_ids), settings.BATCH_SIZE):
+            Task.objects.filter(id__in=task_ids).update(total_predictions=SQCount(predictions))
+
+        project_ids = self.counter_project_ids | self.states_project_ids | set(self.data_columns)
+        # projects can be deleted together with their tasks
+        existing_ids = set(Project.objects.filter(id__in=project_ids).values_list('id', flat=True))
+        ProjectSummary.recalculate_counters(list(self.counter_project_ids & existing_ids))
+
+        for summary in ProjectSummary.objects.filter(project_id__in=set(self.data_columns) & existing_ids):
+            summary.remove_data_column_counts(self.data_columns[summary.project_id])
+
+        for project in Project.objects.filter(id__in=self.states_project_ids & existing_ids):
+            try:
+                project.update_tasks_states(
+                    maximum_annotations_changed=False,
+                    overlap_cohort_percentage_changed=False,
+                    tasks_number_changed=True,
+                )
+            except Exception as exc:
+                logger.error(f'Error while updating task states after deletion for project {project.id}: {exc}')
+
+
+@receiver(pre_delete, sender=Task)
+def collect_deleted_task(sender, instance, **kwargs):
+    """Deleted tasks are skipped by total_predictions update at the end of the deletion block"""
+    deletion = TaskDeletion.current()
+    if deletion is not None:
+        deletion.deleted_task_ids.add(instance.id)
+
+
+# =========== PROJECT COUNTERS UPDATES ===========
+
+
+def update_project_counters(project_id, **deltas):
+    """Increment persisted project counters (projects.models.ProjectSummary), see ProjectManager.COUNTER_FIELDS"""
+    from projects.models import ProjectSummary
+
+    if project_id is None:
+        return
+    try:
+        ProjectSummary.update_counters(project_id, **deltas)
+    except Exception as exc:
+        # counters will be fixed by the next recalculation
+        logger.error(f'Error while updating counters for project {project_id}: {exc}', exc_info=True)
+
+
+def recalculate_project_counters(project_ids):
+    from projects.models import ProjectSummary
+
+    ProjectSummary.recalculate_counters(project_ids)
+
+
+def get_annotation_project_counters(annotation):
+    """Contribution of one annotation to the annotation-based project counters"""
+    useful = not annotation.was_cancelled and not annotation.ground_truth and annotation.result is not None
+    return {
+        'total_annotations_number': int(not annotation.was_cancelled),
+        'useful_annotation_number': int(useful),
+        'ground_truth_number': int(annotation.ground_truth),
+        'skipped_annotations_number': int(annotation.was_cancelled),
+    }
+
+
+def _task_has_other_useful_annotations(annotation):
+    return (
+        Annotation.objects.filter(task_id=annotation.task_id)
+        .filter(Q_finished_annotations, ground_truth=False)
+        .exclude(id=annotation.id)
+        .exists()
+    )
+
+
+@receiver(post_save, sender=Task)
+def increase_project_counters_after_creating_task(sender, instance, created, **kwargs):
+    if created:
+        update_project_counters(instance.project_id, task_number=1, finished_task_number=int(instance.is_labeled))
+
+
+@receiver(pre_delete, sender=Task)
+def count_useful_annotations_before_deleting_task(sender, instance, **kwargs):
+    if TaskDeletion.current() is not None:
+        return
+    useful_annotations = instance.annotations.filter(Q_finished_annotations, ground_truth=False)
+    instance._useful_annotations_number = useful_annotations.count()
+
+
+def decrease_project_counters_after_deleting_task(instance):
+    # cascade deleted annotations have been already subtracted one by one, but each of them
+    # has decreased num_tasks_with_annotations, while the task must be subtracted only once
+    useful_annotations = getattr(instance, '_useful_annotations_number', 0)
+    update_project_counters(
+        instance.project_id,
+        task_number=-1,
+        finished_task_number=-int(instance.is_labeled),
+        num_tasks_with_annotations=useful_annotations - min(useful_annotations, 1),
+    )
+
+
 # =========== PROJECT SUMMARY UPDATES ===========
 
 
 @receiver(pre_delete, sender=Task)
 def remove_data_columns(sender, instance, **kwargs):
     """Reduce data column counters after removing task"""
+    deletion = TaskDeletion.current()
+    if deletion is not None:
+        deletion.add_task(instance)
+        return
     instance.decrease_project_summary_counters()
 
 
@@ -1273,6 +1546,8 @@ def delete_project_summary_annotations_before_updating_annotation(sender, instan
         # annotation just created - do nothing
         return
     old_annotation.decrease_project_summary_counters()
+    # remember previous state to update project counters by difference in post_save
+    instance._old_project_counters = get_annotation_project_counters(old_annotation)
 
     # update task counters if annotation changes it's was_cancelled status
     task = instance.task
@@ -1283,7 +1558,9 @@ def delete_project_summary_annotations_before_updating_annotation(sender, instan
         else:
             task.cancelled_annotations = task.cancelled_annotations - 1
             task.total_annotations = task.total_annotations + 1
+        was_labeled = task.is_labeled
         task.update_is_labeled()
+        update_project_counters(task.project_id, finished_task_number=int(task.is_labeled) - int(was_labeled))
 
         Task.objects.filter(id=instance.task.id).update(
             is_labeled=task.is_labeled,
@@ -1303,25 +1580,60 @@ def update_project_summary_annotations_and_is_labeled(sender, instance, created,
         instance.task.cancelled_annotations = instance.task.annotations.all().filter(was_cancelled=True).count()
     else:
         instance.task.total_annotations = instance.task.annotations.all().filter(was_cancelled=False).count()
+    was_labeled = instance.task.is_labeled
     instance.task.update_is_labeled()
     instance.task.save(update_fields=['is_labeled', 'total_annotations', 'cancelled_annotations'])
     logger.debug(f'Updated total_annotations and cancelled_annotations for {instance.task.id}.')
 
+    old_counters = getattr(instance, '_old_project_counters', None) if not created else None
+    new_counters = get_annotation_project_counters(instance)
+    deltas = {field: value - (old_counters or {}).get(field, 0) for field, value in new_counters.items()}
+    deltas['finished_task_number'] = int(instance.task.is_labeled) - int(was_labeled)
+    if deltas['useful_annotation_number'] and not _task_has_other_useful_annotations(instance):
+        # the first useful annotation for the task has been added or the last one has gone
+        deltas['num_tasks_with_annotations'] = deltas['useful_annotation_number']
+    update_project_counters(instance.project_id, **deltas)
+
+
+@receiver(post_delete, sender=Annotation)
+def decrease_project_counters_after_deleting_annotation(sender, instance, **kwargs):
+    """Subtract deleted annotation from persisted project counters"""
+    deletion = TaskDeletion.current()
+    if deletion is not None:
+        deletion.counter_project_ids.add(instance.project_id)
+        return
+    deltas = {field: -value for field, value in get_annotation_project_counters(instance).items()}
+    if deltas['useful_annotation_number'] and not _task_has_other_useful_annotations(instance):
+        deltas['num_tasks_with_annotations'] = -1
+    update_project_counters(instance.project_id, **deltas)
+
 
 @receiver(pre_delete, sender=Prediction)
 def remove_predictions_from_project(sender, instance, **kwargs):
     """Remove predictions counters"""
-    instance.task.total_predictions = instance.task.predictions.all().count() - 1
-    instance.task.save(update_fields=['total_predictions'])
-    logger.debug(f'Updated total_predictions for {instance.task.id}.')
+    deletion = TaskDeletion.current()
+    if deletion is not None:
+        deletion.counter_project_ids.add(instance.project_id)
+        deletion.prediction_task_ids.add(instance.task_id)
+        return
+    update_task_total_predictions(instance, -1)
+    update_project_counters(instance.project_id, total_predictions_number=-1)
 
 
 @receiver(post_save, sender=Prediction)
 def save_predictions_to_project(sender, instance, **kwargs):
     """Add predictions counters"""
-    instance.task.total_predictions = instance.task.predictions.all().count()
-    instance.task.save(update_fields=['total_predictions'])
-    logger.debug(f'Updated total_predictions for {instance.task.id}.')
+    if kwargs.get('created'):
+        update_task_total_predictions(instance, 1)
+        update_project_counters(instance.project_id, total_predictions_number=1)
+
+
+def update_task_total_predictions(prediction, delta):
+    """Increment task.total_predictions in place instead of counting all task predictions"""
+    Task.objects.filter(id=prediction.task_id).update(total_predictions=F('total_predictions') + delta)
+    if Prediction.task.is_cached(prediction):
+        prediction.task.total_predictions += delta
+    logger.debug(f'Updated total_predictions for {prediction.task_id}.')
 
 
 # =========== END OF PROJECT SUMMARY UPDATES ===========
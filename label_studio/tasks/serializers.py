@@ -155,7 +155,7 @@ class TaskSimpleSerializer(ModelSerializer):
 
     class Meta:
         model = Task
-        fields = '__all__'
+        exclude = ('data_hash',)
 
 
 class BaseTaskSerializer(FlexFieldsModelSerializer):
@@ -197,7 +197,7 @@ class BaseTaskSerializer(FlexFieldsModelSerializer):
 
     class Meta:
         model = Task
-        fields = '__all__'
+        exclude = ('data_hash',)
 
 
 class BaseTaskSerializerBulk(serializers.ListSerializer):
@@ -551,6 +551,7 @@ class BaseTaskSerializerBulk(serializers.ListSerializer):
             t = Task(
                 project=self.project,
                 data=task['data'],
+                data_hash=Task.compute_data_hash(task['data'], self.project),
                 meta=task.get('meta', {}),
                 overlap=max_overlap,
                 is_labeled=len(task_annotations[i]) >= max_overlap,
@@ -600,7 +601,7 @@ class BaseTaskSerializerBulk(serializers.ListSerializer):
 
     class Meta:
         model = Task
-        fields = '__all__'
+        exclude = ('data_hash',)
 
 
 TaskSerializer = load_func(settings.TASK_SERIALIZER)
@@ -617,7 +618,7 @@ class TaskWithAnnotationsSerializer(TaskSerializer):
         model = Task
         list_serializer_class = load_func(settings.TASK_SERIALIZER_BULK)
 
-        exclude = ()
+        exclude = ('data_hash',)
 
 
 class AnnotationDraftSerializer(ModelSerializer):
@@ -52,6 +52,21 @@ class TestTaskAPI(APITestCase):
             'unresolved_comment_count': 0,
         }
 
+    def test_get_task_for_editor(self):
+        task = TaskFactory(project=self.project, data={'text': 'test'})
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(f'/api/tasks/{task.id}/?fields=editor')
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data['id'] == task.id
+        assert data['data'] == {'text': 'test'}
+        assert data['annotations'] == data['predictions'] == data['drafts'] == []
+        # Data Manager columns are not calculated
+        assert 'annotators' not in data
+        assert 'predictions_results' not in data
+
     def test_patch_task(self):
         task = TaskFactory(project=self.project, data={'text': 'test'})
 
@@ -0,0 +1,179 @@
+"""In-process benchmark harness: seed synthetic projects, run API scenarios and compare
+query counts and latency against checked-in baselines (tests/benchmarks/baselines.json).
+
+Environment variables:
+    BENCHMARK_SIZES            comma separated project sizes in tasks, default "10,40"
+    BENCHMARK_REPEAT           how many times each scenario is measured, default 5
+    BENCHMARK_CHECK_LATENCY    also fail if p95 latency exceeds the baseline budget (off by default,
+                               latency depends on the machine)
+    BENCHMARK_UPDATE_BASELINE  write measured values into baselines.json instead of checking them
+    BENCHMARK_REPORT           path to save measurements as json
+"""
+import json
+import logging
+import math
+import os
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from core.utils.params import get_bool_env, get_env
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from organizations.models import Organization
+from projects.models import Project
+from tasks.models import Annotation, Prediction, Task
+
+logger = logging.getLogger(__name__)
+
+BASELINES_PATH = Path(__file__).parent / 'baselines.json'
+
+BENCHMARK_SIZES = [int(size) for size in get_env('BENCHMARK_SIZES', '10,40').split(',')]
+BENCHMARK_REPEAT = int(get_env('BENCHMARK_REPEAT', 5))
+
+LABEL_CONFIG = """
+<View>
+  <Text name="text" value="$text"/>
+  <Choices name="label" toName="text">
+    <Choice value="pos"/>
+    <Choice value="neg"/>
+  </Choices>
+</View>"""
+
+
+def make_result(choice='pos'):
+    return [{'from_name': 'label', 'to_name': 'text', 'type': 'choices', 'value': {'choices': [choice]}}]
+
+
+@dataclass
+class Measurement:
+    scenario: str
+    size: int
+    queries: int
+    p50_ms: float
+    p95_ms: float
+
+
+def seed_project(user, tasks, annotations_per_task=1, predictions_per_task=1, title='Benchmark'):
+    """Create a project with synthetic tasks, annotations and predictions using bulk queries.
+    Only every second task is annotated, so there are tasks left for labeling stream
+    """
+    organization = Organization.objects.filter(created_by=user).first()
+    project = Project.objects.create(
+        title=title, label_config=LABEL_CONFIG, created_by=user, organization=organization
+    )
+    db_tasks = Task.objects.bulk_create(
+        [Task(project=project, data={'text': f'Synthetic task {i}'}) for i in range(tasks)]
+    )
+    Annotation.objects.bulk_create(
+        [
+            Annotation(project=project, task=task, completed_by=user, result=make_result())
+            for task in db_tasks[::2]
+            for _ in range(annotations_per_task)
+        ]
+    )
+    Prediction.objects.bulk_create(
+        [
+            Prediction(project=project, task=task, result=make_result('neg'), score=0.5, model_version='benchmark')
+            for task in db_tasks
+            for _ in range(predictions_per_task)
+        ]
+    )
+    # synchronously, benchmarks must not depend on rq workers
+    project._update_tasks_counters_and_is_labeled([task.id for task in db_tasks])
+    return project
+
+
+def percentile(values, q):
+    values = sorted(values)
+    index = max(0, math.ceil(q / 100 * len(values)) - 1)
+    return values[index]
+
+
+def measure(scenario, size, func, repeat=BENCHMARK_REPEAT):
+    """Run func() repeat times, return max query count and p50/p95 latency"""
+    queries, timings = [], []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(len(context.captured_queries))
+    return Measurement(
+        scenario=scenario,
+        size=size,
+        queries=max(queries),
+        p50_ms=round(statistics.median(timings), 2),
+        p95_ms=round(percentile(timings, 95), 2),
+    )
+
+
+def load_baselines():
+    if not BASELINES_PATH.exists():
+        return {}
+    with open(BASELINES_PATH) as f:
+        return json.load(f)
+
+
+def fit_baseline(measurements):
+    """Baseline is a linear budget: allowed queries = queries + queries_per_task * size"""
+    first, last = measurements[0], measurements[-1]
+    per_task = 0
+    if last.size != first.size:
+        # rounded up, so measured points always fit into the budget
+        per_task = math.ceil(max(0, (last.queries - first.queries) / (last.size - first.size)) * 1000) / 1000
+    return {
+        'queries': max(math.ceil(m.queries - per_task * m.size) for m in measurements),
+        'queries_per_task': per_task,
+        # latency budget has a generous margin, it's checked only with BENCHMARK_CHECK_LATENCY
+        'p95_ms': math.ceil(max(m.p95_ms for m in measurements) * 3),
+    }
+
+
+def update_baseline(scenario, measurements):
+    baselines = load_baselines()
+    baselines[scenario] = fit_baseline(measurements)
+    with open(BASELINES_PATH, 'w') as f:
+        json.dump(dict(sorted(baselines.items())), f, indent=2)
+        f.write('\n')
+
+
+def save_report(measurements):
+    path = get_env('BENCHMARK_REPORT')
+    if not path:
+        return
+    report = []
+    if os.path.exists(path):
+        with open(path) as f:
+            report = json.load(f)
+    report += [asdict(m) for m in measurements]
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+def check_baseline(scenario, measurements):
+    """Compare measurements with the baseline, return list of human readable problems"""
+    for m in measurements:
+        logger.info(f'{m.scenario}[{m.size} tasks]: {m.queries} queries, p50 {m.p50_ms} ms, p95 {m.p95_ms} ms')
+    save_report(measurements)
+
+    if get_bool_env('BENCHMARK_UPDATE_BASELINE', False):
+        update_baseline(scenario, measurements)
+        return []
+
+    baseline = load_baselines().get(scenario)
+    if baseline is None:
+        return [f'{scenario}: no baseline, run with BENCHMARK_UPDATE_BASELINE=1 to create it']
+
+    problems = []
+    for m in measurements:
+        allowed = math.floor(round(baseline['queries'] + baseline['queries_per_task'] * m.size, 6))
+        if m.queries > allowed:
+            problems.append(
+                f'{scenario}[{m.size} tasks]: {m.queries} queries, budget is {allowed} '
+                f'({baseline["queries"]} + {baseline["queries_per_task"]} per task), possible N+1'
+            )
+        if get_bool_env('BENCHMARK_CHECK_LATENCY', False) and m.p95_ms > baseline['p95_ms']:
+            problems.append(f'{scenario}[{m.size} tasks]: p95 {m.p95_ms} ms, budget is {baseline["p95_ms"]} ms')
+    return problems
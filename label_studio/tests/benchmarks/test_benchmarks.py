@@ -0,0 +1,91 @@
+"""Query count and latency regression benchmarks, see tests/benchmarks/harness.py for options"""
+import itertools
+import json
+
+import pytest
+from io_storages.localfiles.models import LocalFilesImportStorage
+
+from .harness import BENCHMARK_SIZES, check_baseline, measure, seed_project
+
+
+def next_task(client, project, size, tmp_path):
+    def run():
+        assert client.get(f'/api/projects/{project.id}/next').status_code == 200
+
+    return run
+
+
+def dm_task_list(client, project, size, tmp_path):
+    def run():
+        r = client.get(f'/api/tasks?project={project.id}&fields=all&page=1&page_size={size}')
+        assert r.status_code == 200
+        assert len(r.json()['tasks']) == size
+
+    return run
+
+
+def task_editor(client, project, size, tmp_path):
+    task = project.tasks.order_by('id').first()
+
+    def run():
+        r = client.get(f'/api/tasks/{task.id}?fields=editor')
+        assert r.status_code == 200
+        assert r.json()['id'] == task.id
+
+    return run
+
+
+def import_tasks(client, project, size, tmp_path):
+    payload = json.dumps([{'text': f'Imported task {i}'} for i in range(size)])
+
+    def run():
+        r = client.post(f'/api/projects/{project.id}/import', data=payload, content_type='application/json')
+        assert r.status_code == 201
+
+    return run
+
+
+def export_json(client, project, size, tmp_path):
+    def run():
+        r = client.get(f'/api/projects/{project.id}/export?exportType=JSON&download_all_tasks=true')
+        assert r.status_code == 200
+
+    return run
+
+
+def storage_sync(client, project, size, tmp_path):
+    counter = itertools.count()
+
+    def run():
+        # every run syncs a new storage, so all files create new tasks
+        path = tmp_path / f'storage{size}_{next(counter)}'
+        path.mkdir()
+        for i in range(size):
+            (path / f'task{i}.json').write_text(json.dumps({'text': f'Storage task {i}'}))
+        storage = LocalFilesImportStorage.objects.create(project=project, path=str(path), use_blob_urls=False)
+        r = client.post(f'/api/storages/localfiles/{storage.id}/sync')
+        assert r.status_code == 200
+        assert r.json()['last_sync_count'] == size
+
+    return run
+
+
+SCENARIOS = [next_task, dm_task_list, task_editor, import_tasks, export_json, storage_sync]
+
+
+@pytest.fixture
+def benchmark_settings(settings, tmp_path):
+    settings.LOCAL_FILES_SERVING_ENABLED = True
+    settings.LOCAL_FILES_DOCUMENT_ROOT = str(tmp_path)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('scenario', SCENARIOS, ids=[scenario.__name__ for scenario in SCENARIOS])
+def test_benchmark(scenario, business_client, benchmark_settings, tmp_path):
+    measurements = []
+    for size in BENCHMARK_SIZES:
+        project = seed_project(business_client.user, tasks=size, title=f'{scenario.__name__} {size}')
+        measurements.append(measure(scenario.__name__, size, scenario(business_client, project, size, tmp_path)))
+
+    problems = check_baseline(scenario.__name__, measurements)
+    assert not problems, '\n'.join(problems)
@@ -18,6 +18,8 @@ import requests_mock
 import ujson as json
 from botocore.exceptions import ClientError
 from django.conf import settings
+from django.core.cache import cache
+from fakeredis import FakeRedis
 from freezegun import freeze_time
 from moto import mock_s3
 from organizations.models import Organization
@@ -75,6 +77,12 @@ def disable_sentry(settings):
     settings.SENTRY_DSN = None
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Cached values (e.g. resolved user roles) must not leak between tests, object ids are reused after rollbacks"""
+    cache.clear()
+
+
 @pytest.fixture()
 def debug_modal_exceptions_false(settings):
     settings.DEBUG_MODAL_EXCEPTIONS = False
@@ -332,6 +340,13 @@ def redis_client():
         yield
 
 
+@pytest.fixture
+def queued_jobs():
+    """Connected redis without rq workers: queued jobs are only recorded"""
+    with mock.patch('core.redis._redis', FakeRedis()), mock.patch('core.redis.start_job_async_or_sync') as start_job:
+        yield start_job
+
+
 @pytest.fixture
 def ml_backend_for_test_predict(ml_backend):
     # ML backend with single prediction per task
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from projects.models import ProjectSummary
+from tasks.models import Prediction, Task
+
+from ..utils import make_project
+
+CONFIG = {
+    'title': 'Predictions import',
+    'label_config': """
+        <View>
+          <Text name="text" value="$text"></Text>
+          <Choices name="label" toName="text" choice="single">
+            <Choice value="pos"></Choice>
+            <Choice value="neg"></Choice>
+          </Choices>
+        </View>""",
+}
+
+
+@pytest.fixture
+def project_with_tasks(business_client, settings):
+    settings.BATCH_SIZE = 2
+    project = make_project(CONFIG, business_client.user, use_ml_backend=False)
+    tasks = Task.objects.bulk_create([Task(data={'text': str(i)}, project=project) for i in range(3)])
+    return project, tasks
+
+
+def total_predictions(tasks):
+    return list(
+        Task.objects.filter(id__in=[t.id for t in tasks]).order_by('id').values_list('total_predictions', flat=True)
+    )
+
+
+@pytest.mark.django_db
+def test_import_predictions_json(business_client, project_with_tasks):
+    project, tasks = project_with_tasks
+    other_project = make_project(CONFIG, business_client.user, use_ml_backend=False)
+    other_task = Task.objects.create(data={'text': 'other'}, project=other_project)
+
+    payload = [
+        {'task': tasks[0].id, 'result': 'pos', 'score': 0.5},
+        {'task': other_task.id, 'result': 'pos'},
+        {'task': tasks[0].id, 'result': 'neg', 'model_version': 'v2'},
+        {'task': tasks[1].id, 'result': [{'from_name': 'unknown', 'to_name': 'text', 'type': 'choices'}]},
+        {'result': 'pos'},
+    ]
+    r = business_client.post(
+        f'/api/projects/{project.id}/import/predictions', data=json.dumps(payload), content_type='application/json'
+    )
+    assert r.status_code == 201, r.content
+    response = r.json()
+    assert response['created'] == 2
+    assert response['failed'] == 3
+    assert [error['index'] for error in response['errors']] == [1, 3, 4]
+
+    assert total_predictions(tasks) == [2, 0, 0]
+    assert ProjectSummary.objects.get(project=project).total_predictions_number == 2
+    prediction = Prediction.objects.filter(task=tasks[0]).order_by('id').first()
+    assert prediction.result[0]['value'] == {'choices': ['pos']}
+    assert prediction.score == 0.5
+
+    # nothing is imported
+    r = business_client.post(
+        f'/api/projects/{project.id}/import/predictions',
+        data=json.dumps([{'task': other_task.id, 'result': 'pos'}]),
+        content_type='application/json',
+    )
+    assert r.status_code == 400
+    assert r.json()['created'] == 0
+
+
+@pytest.mark.django_db
+def test_import_predictions_ndjson(business_client, project_with_tasks):
+    project, tasks = project_with_tasks
+    lines = [json.dumps({'task': task.id, 'result': 'neg'}) for task in tasks] + ['', 'not json']
+    r = business_client.post(
+        f'/api/projects/{project.id}/import/predictions',
+        data='\n'.join(lines),
+        content_type='application/x-ndjson',
+    )
+    assert r.status_code == 201, r.content
+    assert r.json()['created'] == 3
+    assert r.json()['errors'][0]['index'] == 3
+
+    # uploaded jsonl file
+    upload = SimpleUploadedFile('predictions.jsonl', '\n'.join(lines[:2]).encode())
+    r = business_client.post(f'/api/projects/{project.id}/import/predictions', data={'file': upload})
+    assert r.status_code == 201, r.content
+    assert r.json() == {'created': 2}
+    assert total_predictions(tasks) == [2, 2, 1]
@@ -1,5 +1,7 @@
 """Tests for the cache_labels action."""
 
+from unittest import mock
+
 import pytest
 from data_manager.actions.cache_labels import cache_labels_job
 from django.contrib.auth import get_user_model
@@ -89,3 +91,31 @@ def test_cache_labels_job(source, control_tag, with_counters, expected_cache_col
             expected_cache = ', '.join(sorted(list(set(all_labels))))
 
         assert cached_labels == expected_cache
+
+
+@pytest.mark.django_db
+def test_cache_labels_job_in_chunks(settings):
+    settings.BATCH_SIZE = 2
+    User = get_user_model()
+    test_user = User.objects.create(username='test_user')
+    project = Project.objects.create(title='Test Project', created_by=test_user)
+
+    for i in range(5):
+        task = Task.objects.create(project=project, data={'text': f'This is task {i}'})
+        result = [{'from_name': 'label', 'to_name': 'text', 'type': 'labels', 'value': {'labels': ['A', 'B']}}]
+        Annotation.objects.create(task=task, project=project, completed_by=test_user, result=result)
+        Annotation.objects.create(task=task, project=project, completed_by=test_user, result=result[:1])
+
+    request_data = {'source': 'annotations', 'control_tag': 'ALL', 'with_counters': 'Yes'}
+    with mock.patch('data_manager.actions.cache_labels.update_job_progress') as update_job_progress:
+        result = cache_labels_job(project, Task.objects.filter(project=project), request_data=request_data)
+
+    assert result['detail'] == 'Updated 5 tasks'
+    assert [call.kwargs for call in update_job_progress.call_args_list] == [
+        {'processed': 2, 'total': 5},
+        {'processed': 4, 'total': 5},
+        {'processed': 5, 'total': 5},
+    ]
+    for task in Task.objects.filter(project=project):
+        assert task.data['cache_all'] == 'A: 2, B: 2'
+        assert task.data_hash == Task.compute_data_hash(task.data, project)
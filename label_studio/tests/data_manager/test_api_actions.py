@@ -17,6 +17,7 @@ from io_storages.localfiles.models import (
 from io_storages.redis.models import RedisImportStorage, RedisImportStorageLink
 from io_storages.s3.models import S3ImportStorage, S3ImportStorageLink
 from projects.models import Project
+from tasks.models import Task
 
 from ..utils import make_annotation, make_prediction, make_task, project_id  # noqa
 
@@ -225,6 +226,30 @@ def test_action_remove_duplicates_with_annotations(business_client, project_id):
     assert task2.annotations.filter(was_cancelled=True).count() == 1, 'was_cancelled counter wrong'
 
 
+@pytest.mark.django_db
+def test_action_remove_duplicates_by_data_hash(business_client, project_id):
+    """Duplicates are found by data hashes: key order doesn't matter
+    and missing hashes are calculated on demand
+    """
+    project = Project.objects.get(pk=project_id)
+    task1 = make_task({'data': {'image': 'duplicated.jpg', 'meta': 1}}, project)
+    task2 = make_task({'data': {'meta': 1, 'image': 'duplicated.jpg'}}, project)
+    task3 = make_task({'data': {'image': 'normal.jpg', 'meta': 1}}, project)
+    assert task1.data_hash == task2.data_hash != task3.data_hash
+
+    # e.g. tasks created before data hashes were introduced
+    task4 = make_task({'data': {'image': 'duplicated.jpg', 'meta': 1}}, project)
+    Task.objects.filter(id=task4.id).update(data_hash=None)
+
+    status = business_client.post(
+        f'/api/dm/actions?project={project_id}&id=remove_duplicates',
+        json={'selectedItems': {'all': True, 'excluded': []}},
+    )
+
+    assert status.status_code == 200
+    assert list(project.tasks.order_by('id').values_list('id', flat=True)) == [task1.id, task3.id]
+
+
 @pytest.mark.django_db
 def test_action_cache_labels(business_client, project_id):
     """This test checks that the "cache_labels" action works correctly
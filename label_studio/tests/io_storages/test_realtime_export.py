@@ -0,0 +1,77 @@
+import os
+
+import mock
+import pytest
+from io_storages import realtime_export
+from io_storages.localfiles.models import LocalFilesExportStorage
+from projects.tests.factories import ProjectFactory
+from tasks.tests.factories import AnnotationFactory, TaskFactory
+
+
+@pytest.fixture
+def export_storage(tmp_path):
+    project = ProjectFactory()
+    return LocalFilesExportStorage.objects.create(project=project, path=str(tmp_path))
+
+
+@pytest.mark.django_db
+def test_realtime_export_without_redis(export_storage, tmp_path):
+    annotation = AnnotationFactory(task=TaskFactory(project=export_storage.project))
+
+    assert os.listdir(tmp_path) == [str(annotation.id)]
+    assert export_storage.links.filter(annotation=annotation).exists()
+
+
+@pytest.mark.django_db
+def test_realtime_export_coalesces_saves(export_storage, queued_jobs, tmp_path, django_capture_on_commit_callbacks):
+    project = export_storage.project
+    # threads can't write into sqlite test database
+    with mock.patch.object(LocalFilesExportStorage, 'max_workers', 1):
+        with django_capture_on_commit_callbacks(execute=True):
+            first = AnnotationFactory(task=TaskFactory(project=project))
+            for _ in range(3):
+                first.save()
+            second = AnnotationFactory(task=TaskFactory(project=project))
+
+        # nothing is exported yet, one job is queued for all saves
+        assert os.listdir(tmp_path) == []
+        queued_jobs.assert_called_once_with(realtime_export.export_pending_annotations, project.id, in_seconds=0)
+
+        realtime_export.export_pending_annotations(project.id)
+        assert sorted(os.listdir(tmp_path)) == sorted([str(first.id), str(second.id)])
+
+        # the next save queues a new job
+        with django_capture_on_commit_callbacks(execute=True):
+            first.save()
+        assert queued_jobs.call_count == 2
+
+
+@pytest.mark.django_db
+def test_realtime_export_waits_for_commit(export_storage, queued_jobs, django_capture_on_commit_callbacks):
+    project = export_storage.project
+    with django_capture_on_commit_callbacks() as callbacks:
+        annotation = AnnotationFactory(task=TaskFactory(project=project))
+        # the job could run before the annotation is visible to it
+        queued_jobs.assert_not_called()
+
+    for callback in callbacks:
+        callback()
+    queued_jobs.assert_called_once()
+    assert realtime_export._pop_pending(project.id) == [annotation.id]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('cache_shared', [False, True])
+def test_realtime_export_skips_projects_without_storages(export_storage, tmp_path, settings, cache_shared):
+    settings.CACHE_SHARED = cache_shared
+    project = ProjectFactory()
+    with mock.patch.object(realtime_export, 'schedule_annotation_export') as schedule:
+        AnnotationFactory(task=TaskFactory(project=project))
+        AnnotationFactory(task=TaskFactory(project=export_storage.project))
+    assert schedule.call_count == 1
+
+    # storage cache is reset when a storage is added
+    LocalFilesExportStorage.objects.create(project=project, path=str(tmp_path))
+    with mock.patch.object(realtime_export, 'schedule_annotation_export') as schedule:
+        AnnotationFactory(task=TaskFactory(project=project))
+    assert schedule.call_count == 1
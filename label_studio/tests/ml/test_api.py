@@ -1,6 +1,10 @@
 import json
 
+import mock
 import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from ml.models import MLBackend, update_ml_backend_state
 from projects.models import Task
 from rest_framework import status
 
@@ -305,3 +309,68 @@ def test_ml_backend_predict_test_api_post_random_true(business_client):
     r = response.json()
     assert r['url'] == 'http://localhost:8999/predict'
     assert r['status'] == 200
+
+
+@pytest.mark.django_db
+def test_ml_backend_state_cache(business_client, ml_backend_for_test_api, mock_gethostbyname):
+    project = make_project(
+        config=dict(is_published=True, label_config=PROJECT_CONFIG, title='test_ml_backend_state_cache'),
+        user=business_client.user,
+        use_ml_backend=False,
+    )
+
+    def health_checks():
+        return len([r for r in ml_backend_for_test_api.request_history if r.path == '/health'])
+
+    response = business_client.post(
+        '/api/ml/', data={'project': project.id, 'title': 'ml_backend', 'url': 'https://ml_backend_for_test_api'}
+    )
+    assert response.status_code == 201
+    ml_backend_id = response.json()['id']
+    checks = health_checks()
+
+    # state is cached
+    for url in [f'/api/ml/?project={project.id}', f'/api/ml/{ml_backend_id}']:
+        assert business_client.get(url).status_code == 200
+    assert health_checks() == checks
+
+    # training state is checked again
+    assert business_client.post(f'/api/ml/{ml_backend_id}/train').status_code == 200
+    response = business_client.get(f'/api/ml/{ml_backend_id}')
+    assert response.json()['state'] == 'CO'
+    assert health_checks() == checks + 1
+
+    # stale state is refreshed in background with redis
+    cache.clear()
+    with mock.patch('ml.models.redis_connected', return_value=True), mock.patch(
+        'ml.models.start_job_async_or_sync'
+    ) as start_job:
+        for _ in range(2):
+            assert business_client.get(f'/api/ml/{ml_backend_id}').json()['state'] == 'CO'
+    start_job.assert_called_once_with(update_ml_backend_state, ml_backend_id, queue_name='high')
+    assert health_checks() == checks + 1
+
+    call_command('refresh_ml_backends_state', project=project.id)
+    assert health_checks() == checks + 2
+
+
+@pytest.mark.django_db
+def test_ml_backend_refresh_state_returns_setup_model_version(
+    business_client, ml_backend_for_test_api, mock_gethostbyname
+):
+    project = make_project(
+        config=dict(is_published=True, label_config=PROJECT_CONFIG, title='test_ml_backend_refresh_state'),
+        user=business_client.user,
+        use_ml_backend=False,
+    )
+    ml_backend = MLBackend.objects.create(
+        project=project, url='https://ml_backend_for_test_api', auto_update=False, model_version='pinned'
+    )
+    assert ml_backend.update_state() == '1.0.0'
+
+    # stale state is refreshed in background, meanwhile the version from the last setup is used, not the pinned one
+    cache.clear()
+    with mock.patch('ml.models.redis_connected', return_value=True), mock.patch('ml.models.start_job_async_or_sync'):
+        ml_backend = MLBackend.objects.get(id=ml_backend.id)
+        assert ml_backend.refresh_state() == '1.0.0'
+    assert ml_backend.model_version == 'pinned'
@@ -1,11 +1,17 @@
 import io
+import json
+import logging
 import os
+from datetime import timedelta
 
 import psutil
 import pytest
+from core.models import AsyncMigrationStatus
 from data_export.serializers import ExportDataSerializer
 from django.conf import settings
-from tasks.functions import export_project
+from django.utils import timezone
+from tasks.functions import export_project, redis_job_for_calculation, update_tasks_counters
+from tasks.models import Annotation, Prediction, Task
 
 pytestmark = pytest.mark.django_db
 
@@ -36,33 +42,144 @@ def memory_limit(max_mem):
 
 class TestExportProject:
     @pytest.fixture
-    def generate_export_file(self, mocker):
+    def convert_export_file(self, mocker):
         return mocker.patch(
-            'tasks.functions.DataExport.generate_export_file',
-            return_value=(io.BytesIO(b'stream'), 'application/json', 'project.json'),
+            'tasks.functions.DataExport.convert_export_file',
+            return_value=(io.BytesIO(b'stream'), 'application/csv', 'project.csv'),
         )
 
     @pytest.fixture
-    def project(self, configured_project):
+    def project(self, configured_project, settings):
+        settings.BATCH_SIZE = 1
         return configured_project
 
-    def test_export_project(self, mocker, generate_export_file, project):
+    def expected_data(self, project):
         data = ExportDataSerializer(
-            project.tasks.all(),
+            project.tasks.order_by('id'),
             many=True,
             context={'interpolate_key_frames': settings.INTERPOLATE_KEY_FRAMES},
         ).data
+        return json.loads(json.dumps(data))
+
+    def test_export_project(self, project, tmp_path):
+        filepath = export_project(project.id, 'JSON', str(tmp_path))
+
+        assert os.path.dirname(filepath) == str(tmp_path)
+        assert os.path.basename(filepath).startswith(f'project-{project.id}-at-')
+        with open(filepath) as f:
+            assert json.load(f) == self.expected_data(project)
+        # nothing is left in the export dir
+        assert os.listdir(tmp_path) == [os.path.basename(filepath)]
+
+    def test_export_project_in_threads(self, project, tmp_path, mocker):
+        Task.objects.bulk_create([Task(data={'text': str(i)}, project=project) for i in range(10)])
+        task_ids = list(project.tasks.order_by('id').values_list('id', flat=True))
+        # test database isn't shared between threads, so batches are serialized without queries
+        serialize = mocker.patch(
+            'tasks.functions._serialize_export_batch_in_thread',
+            side_effect=lambda ids, options: [json.dumps({'id': task_id}) for task_id in ids],
+        )
+
+        filepath = export_project(project.id, 'JSON', str(tmp_path / 'out.json'), workers=3)
+
+        assert filepath == str(tmp_path / 'out.json')
+        with open(filepath) as f:
+            assert [task['id'] for task in json.load(f)] == task_ids
+        assert serialize.call_count == len(task_ids)
+
+    def test_export_project_converted(self, project, tmp_path, convert_export_file):
+        filepath = export_project(project.id, 'CSV', str(tmp_path))
+
+        assert filepath == str(tmp_path / 'project.csv')
+        with open(filepath, 'rb') as f:
+            assert f.read() == b'stream'
+        assert convert_export_file.call_args[0][3] == 'CSV'
 
-        with mocker.patch('builtins.open'):
-            filepath = export_project(project.id, 'JSON', settings.EXPORT_DIR)
+    def test_project_does_not_exist(self, convert_export_file, tmp_path):
+        with pytest.raises(Exception):
+            export_project(1, 'JSON', str(tmp_path))
 
-        assert filepath == os.path.join(settings.EXPORT_DIR, 'project.json')
+        convert_export_file.assert_not_called()
 
-        generate_export_file.assert_called_once_with(project, data, 'JSON', settings.CONVERTER_DOWNLOAD_RESOURCES, {})
 
-    def test_project_does_not_exist(self, mocker, generate_export_file):
-        with mocker.patch('builtins.open'):
-            with pytest.raises(Exception):
-                export_project(1, 'JSON', settings.EXPORT_DIR)
+class TestUpdateTasksCounters:
+    @pytest.fixture
+    def tasks(self, configured_project, settings):
+        settings.BATCH_SIZE = 2
+        project = configured_project
+        Task.objects.bulk_create([Task(data={'text': 'text C'}, project=project) for _ in range(2)])
+        tasks = list(project.tasks.order_by('id'))
+        user = project.created_by
+        Annotation.objects.bulk_create(
+            [
+                Annotation(task=tasks[0], project=project, completed_by=user, result=[]),
+                Annotation(task=tasks[0], project=project, completed_by=user, result=[], was_cancelled=True),
+                Annotation(task=tasks[2], project=project, completed_by=user, result=[]),
+            ]
+        )
+        Prediction.objects.bulk_create([Prediction(task=tasks[2], project=project, result=[]) for _ in range(2)])
+        # outdated counters
+        Task.objects.filter(project=project).update(total_annotations=5, cancelled_annotations=5, total_predictions=5)
+        return tasks
+
+    @staticmethod
+    def counters(tasks):
+        return list(
+            Task.objects.filter(id__in=[task.id for task in tasks])
+            .order_by('id')
+            .values_list('total_annotations', 'cancelled_annotations', 'total_predictions')
+        )
+
+    def test_update_tasks_counters(self, tasks):
+        assert update_tasks_counters(Task.objects.filter(id__in=[task.id for task in tasks])) == 2
+        assert self.counters(tasks) == [(1, 1, 0), (0, 0, 0), (1, 0, 2), (0, 0, 0)]
+
+        # calculated tasks are skipped
+        Task.objects.filter(id=tasks[1].id).update(total_annotations=3)
+        assert update_tasks_counters(tasks, from_scratch=False) == 0
+        assert self.counters(tasks)[1] == (3, 0, 0)
+
+    def test_update_tasks_counters_resume(self, tasks):
+        project = tasks[0].project
+        # the previous job was interrupted after the first chunk
+        migration = AsyncMigrationStatus.objects.create(
+            project=project,
+            name='counters',
+            status=AsyncMigrationStatus.STATUS_IN_PROGRESS,
+            meta={'last_task_id': tasks[1].id, 'tasks_processed': 1},
+        )
 
-        generate_export_file.assert_not_called()
+        assert update_tasks_counters(project.tasks.all(), migration=migration) == 1
+
+        assert self.counters(tasks) == [(5, 5, 5), (5, 5, 5), (1, 0, 2), (0, 0, 0)]
+        migration.refresh_from_db()
+        assert migration.meta == {'last_task_id': tasks[3].id, 'tasks_processed': 2}
+
+    def test_redis_job_resumes_only_matching_calculation(self, tasks, mocker):
+        project = tasks[0].project
+        # the job adds its own stdout handler to the logger
+        mocker.patch('logging.StreamHandler', return_value=logging.NullHandler())
+        update = mocker.patch('tasks.functions.update_tasks_counters')
+        meta = {'last_task_id': tasks[1].id, 'tasks_processed': 1}
+
+        def interrupted(from_scratch):
+            return AsyncMigrationStatus.objects.create(
+                project=project,
+                name='counters',
+                status=AsyncMigrationStatus.STATUS_IN_PROGRESS,
+                meta={**meta, 'from_scratch': from_scratch},
+            )
+
+        def resumed_migration_id():
+            redis_job_for_calculation(project.organization_id, True, migration_name='counters')
+            migrations = [c.kwargs['migration'] for c in update.call_args_list if c.args[0].first().project == project]
+            return migrations[-1].id
+
+        stale = interrupted(from_scratch=True)
+        AsyncMigrationStatus.objects.filter(id=stale.id).update(created_at=timezone.now() - timedelta(days=2))
+        other_mode = interrupted(from_scratch=False)
+        recent = interrupted(from_scratch=True)
+        assert resumed_migration_id() == recent.id
+
+        # stale and other mode calculations are not resumed, a new one is started
+        assert resumed_migration_id() not in (stale.id, other_mode.id, recent.id)
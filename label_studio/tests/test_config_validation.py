@@ -5,11 +5,22 @@ import io
 import json
 import logging
 import os
+from unittest import mock
 
 import pytest
 import yaml
-from core.label_config import parse_config, parse_config_to_json, validate_label_config
+from core.label_config import (
+    cached_parse_config,
+    extract_data_types,
+    get_label_interface,
+    label_config_cache,
+    parse_config,
+    parse_config_to_json,
+    validate_label_config,
+)
+from label_studio_sdk._extensions.label_studio_tools.core import label_config
 from projects.models import Project
+from rest_framework.exceptions import ValidationError
 
 from label_studio.tests.utils import make_annotation, make_prediction, make_task, project_id  # noqa
 
@@ -128,6 +139,28 @@ def test_parse_all_configs():
             validate_label_config(config)
 
 
+def test_label_config_cache():
+    config = '<View><Text name="text" value="$text"/><Choices name="label" toName="text"><Choice value="A"/></Choices></View>'
+    label_config_cache.clear()
+
+    with mock.patch.object(label_config, 'parse_config', wraps=label_config.parse_config) as parse:
+        parsed = cached_parse_config(config)
+        # returned configs are copies, so callers can't spoil the cached one
+        parsed['label']['labels'].append('B')
+        assert cached_parse_config(config)['label']['labels'] == ['A']
+        assert cached_parse_config(config.replace('"A"', '"C"'))['label']['labels'] == ['C']
+    assert parse.call_count == 2
+
+    assert extract_data_types(config) == {'text': 'Text'}
+    assert get_label_interface(config) is get_label_interface(config)
+
+    validate_label_config(config)
+    invalid_config = config.replace('toName="text"', 'toName="missing"')
+    for _ in range(2):
+        with pytest.raises(ValidationError):
+            validate_label_config(invalid_config)
+
+
 @pytest.mark.django_db
 def test_config_validation_for_choices_workaround(business_client, project_id):
     """
@@ -220,3 +253,16 @@ def test_label_config_versions(business_client, project_id):
         )
         logger.warning(f'Test: {test_name}')
         assert response.status_code == test_content['status_code']
+
+
+def test_label_config_cache_shared(settings):
+    settings.LABEL_CONFIG_CACHE_SHARED = True
+    config = '<View><Text name="text" value="$text"/><Choices name="label" toName="text"><Choice value="S"/></Choices></View>'
+    label_config_cache.clear()
+
+    with mock.patch.object(label_config, 'parse_config', wraps=label_config.parse_config) as parse:
+        assert cached_parse_config(config)['label']['labels'] == ['S']
+        # another worker has an empty in-process cache, but gets the parsed config from the shared cache
+        label_config_cache.clear()
+        assert cached_parse_config(config)['label']['labels'] == ['S']
+    assert parse.call_count == 1
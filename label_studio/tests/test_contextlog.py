@@ -1,7 +1,17 @@
 import json
+import threading
+from unittest import mock
 
 import pytest
 import responses
+from core.utils.contextlog import ContextLogSender
+
+
+def contextlog_calls(marker):
+    """Context log calls of the current test: payloads of previous tests can be still shipped in background"""
+    return [
+        call for call in responses.calls if (json.loads(call.request.body)['values'] or {}).get('marker') == marker
+    ]
 
 
 @responses.activate
@@ -13,9 +23,41 @@ def test_contextlog(business_client, contextlog_test_config):
         json={'ok': 'true'},
         status=201,
     )
-    r = business_client.get('/api/users/')
+    r = business_client.get('/api/users/?marker=sync')
 
-    responses.assert_call_count('https://tele.labelstud.io', 1)
-    assert responses.calls
+    calls = contextlog_calls('sync')
+    assert len(calls) == 1
     assert r.status_code == 200
-    assert 'env' not in json.loads(responses.calls[0].request.body)
+    assert 'env' not in json.loads(calls[0].request.body)
+
+
+@responses.activate
+@pytest.mark.django_db
+def test_contextlog_background_sender(business_client, contextlog_test_config, settings):
+    settings.CONTEXTLOG_SYNC = False
+    responses.add(responses.POST, 'https://tele.labelstud.io', json={'ok': 'true'}, status=201)
+
+    # own sender, so its queue has only payloads of this test
+    with mock.patch('core.utils.contextlog.sender', ContextLogSender()) as test_sender:
+        for _ in range(3):
+            assert business_client.get('/api/users/?marker=background').status_code == 200
+        test_sender.flush()
+
+    assert len(contextlog_calls('background')) == 3
+
+
+def test_contextlog_sender_drops_payloads_when_queue_is_full(settings):
+    settings.CONTEXTLOG_QUEUE_SIZE = 2
+    settings.CONTEXTLOG_BATCH_SIZE = 1
+    sender = ContextLogSender()
+    sent = threading.Event()
+
+    with mock.patch('core.utils.contextlog.send_payload', side_effect=lambda *args: sent.wait(5)) as send:
+        for i in range(5):
+            sender.put({'i': i})
+        sent.set()
+        sender.flush()
+
+    # two payloads fit into the queue, one more may be already taken by the blocked sender thread
+    assert 2 <= sender.dropped <= 3
+    assert send.call_count == 5 - sender.dropped
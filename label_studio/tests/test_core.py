@@ -1,5 +1,6 @@
 """This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
 """
+import asyncio
 import types
 
 import pytest
@@ -7,6 +8,8 @@ from core.utils.common import int_from_request
 from core.utils.exceptions import InvalidUploadUrlError, LabelStudioAPIException
 from core.utils.io import validate_upload_url
 from core.utils.params import bool_from_request
+from core.views import async_ranged_file_response
+from django.test import RequestFactory
 from rest_framework.exceptions import ValidationError
 
 
@@ -185,3 +188,30 @@ def test_core_validate_upload_url(url, block_local_urls, raises_exc):
 
     with pytest.raises(raises_exc):
         validate_upload_url(url, block_local_urls=block_local_urls)
+
+
+@pytest.mark.parametrize(
+    'range_header, status_code, content',
+    [
+        (None, 200, b'0123456789'),
+        ('bytes=2-5', 206, b'2345'),
+        ('bytes=7-', 206, b'789'),
+        ('bytes=20-', 416, b''),
+    ],
+)
+def test_async_ranged_file_response(tmp_path, range_header, status_code, content):
+    path = tmp_path / 'file.txt'
+    path.write_bytes(b'0123456789')
+    headers = {'HTTP_RANGE': range_header} if range_header else {}
+    request = RequestFactory().get('/data/local-files/', **headers)
+
+    response = async_ranged_file_response(request, path, 'text/plain')
+    assert response.status_code == status_code
+    if status_code == 416:
+        return
+
+    async def consume():
+        return b''.join([chunk async for chunk in response.streaming_content])
+
+    assert asyncio.run(consume()) == content
+    assert response['Content-Length'] == str(len(content))
@@ -0,0 +1,74 @@
+import pytest
+from projects.models import ProjectSummary
+from tasks import models as tasks_models
+from tasks.models import AnnotationDraft, Task
+
+from .utils import make_project
+
+RESULT = [{'from_name': 'label', 'to_name': 'text', 'type': 'choices', 'value': {'choices': ['pos']}}]
+CONFIG = {
+    'title': 'Draft labels',
+    'label_config': """
+        <View>
+          <Text name="text" value="$text"></Text>
+          <Choices name="label" toName="text" choice="single">
+            <Choice value="pos"></Choice>
+            <Choice value="neg"></Choice>
+          </Choices>
+        </View>""",
+}
+
+
+@pytest.fixture
+def project_with_tasks(business_client):
+    project = make_project(CONFIG, business_client.user, use_ml_backend=False)
+    tasks = Task.objects.bulk_create([Task(data={'text': str(i)}, project=project) for i in range(2)])
+    return project, tasks
+
+
+def draft_labels(project):
+    return ProjectSummary.objects.get(project=project).created_labels_drafts
+
+
+@pytest.mark.django_db
+def test_draft_autosaves_are_debounced(
+    business_client, project_with_tasks, queued_jobs, django_capture_on_commit_callbacks
+):
+    project, tasks = project_with_tasks
+
+    with django_capture_on_commit_callbacks(execute=True):
+        drafts = [
+            AnnotationDraft.objects.create(task=task, user=business_client.user, result=RESULT) for task in tasks
+        ]
+        for _ in range(3):
+            drafts[0].save()
+        drafts[1].delete()
+
+    # summary isn't touched by autosaves, one job is queued for all of them
+    assert draft_labels(project) == {}
+    queued_jobs.assert_called_once_with(tasks_models.update_draft_labels, project.id, in_seconds=0)
+
+    tasks_models.update_draft_labels(project.id)
+    assert draft_labels(project) == {'label': {'pos': 1}}
+
+    # the next save queues a new job
+    with django_capture_on_commit_callbacks(execute=True):
+        AnnotationDraft.objects.create(task=tasks[1], user=business_client.user, result=RESULT)
+    assert queued_jobs.call_count == 2
+    tasks_models.update_draft_labels(project.id)
+    assert draft_labels(project) == {'label': {'pos': 2}}
+
+
+@pytest.mark.django_db
+def test_draft_labels_update_waits_for_commit(
+    business_client, project_with_tasks, queued_jobs, django_capture_on_commit_callbacks
+):
+    project, tasks = project_with_tasks
+    with django_capture_on_commit_callbacks() as callbacks:
+        AnnotationDraft.objects.create(task=tasks[0], user=business_client.user, result=RESULT)
+        # the job could count drafts before the new one is visible to it
+        queued_jobs.assert_not_called()
+
+    for callback in callbacks:
+        callback()
+    queued_jobs.assert_called_once_with(tasks_models.update_draft_labels, project.id, in_seconds=0)
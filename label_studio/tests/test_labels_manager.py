@@ -0,0 +1,100 @@
+import json
+
+import mock
+import pytest
+from labels_manager.functions import bulk_update_label
+from projects.models import ProjectSummary
+from tasks.models import Annotation, Task
+
+from .utils import make_project
+
+CONFIG = {
+    'title': 'Labels rename',
+    'label_config': """
+        <View>
+          <Text name="text" value="$text"></Text>
+          <Choices name="label" toName="text" choice="multiple">
+            <Choice value="pos"></Choice>
+            <Choice value="neg"></Choice>
+            <Choice value="positive"></Choice>
+          </Choices>
+        </View>""",
+}
+
+
+def region(*choices):
+    return {'from_name': 'label', 'to_name': 'text', 'type': 'choices', 'value': {'choices': list(choices)}}
+
+
+@pytest.fixture
+def projects(business_client, settings):
+    settings.BATCH_SIZE = 2
+    projects = [make_project(CONFIG, business_client.user, use_ml_backend=False) for _ in range(2)]
+    results = [[region('pos')], [region('pos'), region('neg')], [region('pos', 'neg')], [region('positive')], []]
+    for project in projects:
+        task = Task.objects.create(data={'text': 'text'}, project=project)
+        annotations = Annotation.objects.bulk_create(
+            [
+                Annotation(task=task, project=project, completed_by=business_client.user, result=result)
+                for result in results
+            ]
+        )
+        summary = ProjectSummary.objects.get(project=project)
+        summary.reset()
+        summary.update_created_annotations_and_labels(annotations)
+    return projects
+
+
+def results(project):
+    return list(project.annotations.order_by('id').values_list('result', flat=True))
+
+
+def created_labels(project):
+    return ProjectSummary.objects.get(project=project).created_labels
+
+
+@pytest.mark.django_db
+def test_bulk_update_label(projects):
+    project, other_project = projects
+    assert created_labels(project) == {'label': {'pos': 3, 'neg': 2, 'positive': 1}}
+
+    assert bulk_update_label(['pos'], ['positive'], project.organization, project=project) == 2
+    assert results(project) == [
+        [region('positive')],
+        [region('positive'), region('neg')],
+        [region('pos', 'neg')],
+        [region('positive')],
+        [],
+    ]
+    assert created_labels(project) == {'label': {'pos': 1, 'neg': 2, 'positive': 3}}
+    assert created_labels(other_project) == {'label': {'pos': 3, 'neg': 2, 'positive': 1}}
+
+    # re-run changes nothing
+    assert bulk_update_label(['pos'], ['positive'], project.organization, project=project) == 0
+    assert created_labels(project) == {'label': {'pos': 1, 'neg': 2, 'positive': 3}}
+
+    # all organization projects
+    assert bulk_update_label(['pos', 'neg'], ['neg'], project.organization_id) == 2
+    assert results(other_project)[2] == [region('neg')]
+    assert created_labels(project) == {'label': {'neg': 2, 'positive': 3}}
+    assert created_labels(other_project) == {'label': {'pos': 2, 'neg': 2, 'positive': 1}}
+
+
+@pytest.mark.django_db
+def test_bulk_update_label_api(business_client, projects):
+    project = projects[0]
+    payload = {'project': project.id, 'old_label': ['neg'], 'new_label': ['pos']}
+
+    r = business_client.post('/api/labels/bulk', data=json.dumps(payload), content_type='application/json')
+    assert r.status_code == 200
+    assert r.json() == {'annotations_updated': 1}
+
+    # background job with connected redis
+    with mock.patch('labels_manager.api.redis_connected', return_value=True), mock.patch(
+        'labels_manager.api.start_job_async_or_sync'
+    ) as start_job:
+        start_job.return_value.id = 'job-id'
+        r = business_client.post('/api/labels/bulk', data=json.dumps(payload), content_type='application/json')
+    assert r.status_code == 202
+    assert r.json() == {'job_id': 'job-id'}
+    assert start_job.call_args.kwargs['project'] == project.id
@@ -0,0 +1,72 @@
+import pytest
+from core.metrics import operation_duration, storage, timed
+from core.redis import start_job_async_or_sync
+from django.test import Client
+
+from .utils import signin
+
+
+@pytest.fixture
+def metrics_enabled(settings):
+    settings.METRICS_ENABLED = True
+    storage.clear()
+    yield
+    storage.clear()
+
+
+def parse_metrics(content):
+    metrics = {}
+    for line in content.decode().splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            metrics[name] = float(value)
+    return metrics
+
+
+@pytest.mark.django_db
+def test_metrics_disabled(client):
+    r = client.get('/metrics/')
+    assert r.status_code == 200
+    assert r.content == b''
+
+
+@pytest.mark.django_db
+def test_metrics_requests_and_timers(metrics_enabled, business_client):
+    # middleware is loaded by the first request, so a new client is needed after enabling metrics
+    client = Client()
+    assert signin(client, 'business@pytest.net', 'pytest').status_code == 302
+    for _ in range(2):
+        assert client.get('/api/projects/').status_code == 200
+
+    @timed('test_operation')
+    def operation():
+        return 42
+
+    assert operation() == 42
+    assert start_job_async_or_sync(operation, redis=False) == 42
+
+    r = client.get('/metrics/')
+    assert r.status_code == 200
+    assert r['Content-Type'].startswith('text/plain')
+    metrics = parse_metrics(r.content)
+
+    labels = 'view="projects:api:project-list",method="GET"'
+    assert metrics[f'label_studio_http_request_duration_seconds_count{{{labels},status="200"}}'] == 2
+    assert metrics[f'label_studio_http_request_duration_seconds_bucket{{{labels},status="200",le="+Inf"}}'] == 2
+    assert metrics[f'label_studio_http_request_db_queries_count{{{labels}}}'] == 2
+    assert metrics[f'label_studio_http_request_db_queries_sum{{{labels}}}'] > 0
+    # operation is called twice: directly and as a sync job
+    assert metrics['label_studio_operation_duration_seconds_count{operation="test_operation"}'] == 2
+    job_labels = 'queue="default",func="operation",status="finished"'
+    assert metrics[f'label_studio_rq_job_duration_seconds_count{{{job_labels}}}'] == 1
+
+
+def test_histogram_buckets_are_cumulative(metrics_enabled):
+    for value in (0.001, 0.2, 0.2, 100):
+        operation_duration.observe(value, operation='buckets')
+    lines = '\n'.join(operation_duration.render())
+    assert 'label_studio_operation_duration_seconds_bucket{operation="buckets",le="0.005"} 1' in lines
+    assert 'label_studio_operation_duration_seconds_bucket{operation="buckets",le="0.25"} 3' in lines
+    assert 'label_studio_operation_duration_seconds_bucket{operation="buckets",le="60"} 3' in lines
+    assert 'label_studio_operation_duration_seconds_bucket{operation="buckets",le="+Inf"} 4' in lines
+    assert 'label_studio_operation_duration_seconds_count{operation="buckets"} 4' in lines
@@ -0,0 +1,59 @@
+import pytest
+from ml_models.models import ModelInterface, ModelRun, ThirdPartyModelVersion, delete_predictions_background
+from projects.models import ProjectSummary
+from tasks.models import Annotation, FailedPrediction, Prediction, PredictionMeta, Task
+
+from .utils import make_project
+
+
+@pytest.fixture
+def model_run(business_client):
+    user = business_client.user
+    project = make_project({'title': 'Model runs'}, user, use_ml_backend=False)
+    model = ModelInterface.objects.create(title='model', created_by=user, organization=project.organization)
+    version = ThirdPartyModelVersion.objects.create(
+        title='v1', parent_model=model, prompt='prompt', provider_model_id='gpt', organization=project.organization
+    )
+    return ModelRun.objects.create(project=project, model_version=version, organization=project.organization)
+
+
+@pytest.mark.django_db
+def test_delete_model_run_predictions(model_run):
+    project = model_run.project
+    task = Task.objects.create(data={'text': 'text'}, project=project)
+    predictions = Prediction.objects.bulk_create(
+        [Prediction(task=task, project=project, model_run=model_run, result=[]) for _ in range(5)]
+    )
+    other_prediction = Prediction.objects.create(task=task, project=project, result=[])
+    failed_predictions = FailedPrediction.objects.bulk_create(
+        [FailedPrediction(task=task, project=project, model_run=model_run, message='error') for _ in range(3)]
+    )
+    PredictionMeta.objects.create(prediction=predictions[0])
+    PredictionMeta.objects.create(failed_prediction=failed_predictions[0])
+    annotation = Annotation.objects.create(
+        task=task, project=project, completed_by=project.created_by, result=[], parent_prediction=predictions[4]
+    )
+
+    other_task = Task.objects.create(data={'text': 'other'}, project=project)
+    Prediction.objects.create(task=other_task, project=project, model_run=model_run, result=[])
+    project.recalculate_counters()
+    assert ProjectSummary.objects.get(project=project).total_predictions_number == 7
+
+    assert model_run.delete_predictions(batch_size=2) == 9
+
+    assert list(Prediction.objects.values_list('id', flat=True)) == [other_prediction.id]
+    # counters aren't maintained by signals for raw deletes
+    task.refresh_from_db()
+    other_task.refresh_from_db()
+    assert (task.total_predictions, other_task.total_predictions) == (1, 0)
+    assert ProjectSummary.objects.get(project=project).total_predictions_number == 1
+    assert not FailedPrediction.objects.exists()
+    assert not PredictionMeta.objects.exists()
+    annotation.refresh_from_db()
+    assert annotation.parent_prediction is None
+
+    # nothing is left to delete, the job is a no-op for deleted model runs
+    delete_predictions_background(model_run.id)
+    model_run.delete()
+    delete_predictions_background(model_run.id)
+    assert Prediction.objects.filter(id=other_prediction.id).exists()
@@ -0,0 +1,97 @@
+import pytest
+from django.core.cache import cache
+from projects.models import Project
+from tasks.models import Annotation, Task
+
+from .utils import make_project
+
+RESULT = [{'from_name': 'text_class', 'to_name': 'text', 'type': 'choices', 'value': {'choices': ['class_A']}}]
+CONFIG = {
+    'title': 'Overlap cohort',
+    'label_config': """
+        <View>
+          <Text name="text" value="$text"></Text>
+          <Choices name="text_class" toName="text" choice="single">
+            <Choice value="class_A"></Choice>
+            <Choice value="class_B"></Choice>
+          </Choices>
+        </View>""",
+}
+
+
+@pytest.fixture
+def project_with_annotations(business_client, settings):
+    """10 tasks with annotations: 2, 2 (one is ground truth), 1, 1, 1 (skipped) and no annotations for the rest"""
+    settings.BATCH_SIZE = 3
+    project = make_project(CONFIG, business_client.user, use_ml_backend=False)
+    tasks = Task.objects.bulk_create([Task(data={'text': str(i)}, project=project) for i in range(10)])
+    user = business_client.user
+    Annotation.objects.bulk_create(
+        [
+            Annotation(task=tasks[0], project=project, completed_by=user, result=RESULT),
+            Annotation(task=tasks[0], project=project, completed_by=user, result=RESULT),
+            Annotation(task=tasks[1], project=project, completed_by=user, result=RESULT),
+            Annotation(task=tasks[1], project=project, completed_by=user, result=RESULT, ground_truth=True),
+            Annotation(task=tasks[2], project=project, completed_by=user, result=RESULT),
+            Annotation(task=tasks[3], project=project, completed_by=user, result=RESULT),
+            Annotation(task=tasks[4], project=project, completed_by=user, result=RESULT, was_cancelled=True),
+        ]
+    )
+    project.update_tasks_counters_and_is_labeled(Task.objects.filter(project=project))
+    return project, tasks
+
+
+def overlaps(tasks):
+    return list(Task.objects.filter(id__in=[t.id for t in tasks]).order_by('id').values_list('overlap', flat=True))
+
+
+@pytest.mark.django_db
+def test_rearrange_overlap_cohort(project_with_annotations):
+    project, tasks = project_with_annotations
+    Project.objects.filter(id=project.id).update(maximum_annotations=2, overlap_cohort_percentage=30)
+    project.refresh_from_db()
+
+    project._rearrange_overlap_cohort()
+
+    # task 0 is finished, then tasks with the most annotations: task 1 and the first task with one annotation
+    assert overlaps(tasks) == [2, 2, 2, 1, 1, 1, 1, 1, 1, 1]
+    # ground truth annotation is counted for is_labeled, so task 1 is labeled too
+    labeled = set(Task.objects.filter(project=project, is_labeled=True).values_list('id', flat=True))
+    assert labeled == {tasks[0].id, tasks[1].id, tasks[3].id}
+
+    # cohort is smaller than the number of finished tasks
+    Project.objects.filter(id=project.id).update(overlap_cohort_percentage=5)
+    project.refresh_from_db()
+    project._rearrange_overlap_cohort()
+    assert overlaps(tasks) == [2, 1, 1, 1, 1, 1, 1, 1, 1, 1]
+
+
+@pytest.mark.django_db
+def test_rearrange_overlap_cohort_continues_interrupted_job(project_with_annotations):
+    project, tasks = project_with_annotations
+    Project.objects.filter(id=project.id).update(maximum_annotations=2, overlap_cohort_percentage=30)
+    project.refresh_from_db()
+
+    class Interrupted(Exception):
+        pass
+
+    chunks = project._iterate_task_chunks
+
+    def interrupt_after_first_chunk(*args, **kwargs):
+        for i, ids in enumerate(chunks(*args, **kwargs)):
+            if i == 1:
+                raise Interrupted
+            yield ids
+
+    project._iterate_task_chunks = interrupt_after_first_chunk
+    with pytest.raises(Interrupted):
+        project._rearrange_overlap_cohort()
+    assert overlaps(tasks) == [2, 2, 2, 1, 1, 1, 1, 1, 1, 1]
+    assert cache.get(f'project:{project.id}:rearrange_overlap_cohort')['last_id'] == tasks[2].id
+
+    # the first chunk is not processed again
+    Task.objects.filter(id__in=[t.id for t in tasks[:3]]).update(overlap=5)
+    del project._iterate_task_chunks
+    project._rearrange_overlap_cohort()
+    assert overlaps(tasks) == [5, 5, 5, 1, 1, 1, 1, 1, 1, 1]
+    assert cache.get(f'project:{project.id}:rearrange_overlap_cohort') is None
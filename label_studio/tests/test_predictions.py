@@ -1,11 +1,15 @@
 """This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
 """
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
+import mock
 import pytest
 import requests_mock
 from core.redis import redis_healthcheck
-from ml.models import MLBackend
+from ml.interactive import RequestCoalescer
+from ml.models import InteractiveAnnotatingDataSerializer, MLBackend
 from projects.models import Project
 from tasks.models import Annotation, AnnotationDraft, Prediction, Task
 from users.models import User
@@ -820,6 +824,71 @@ def test_interactive_annotating_with_drafts(business_client, configured_project)
         assert len(js['tasks'][0]['drafts']) == 1
 
 
+@pytest.mark.django_db
+def test_interactive_annotating_payload_cache(business_client, configured_project, settings):
+    settings.CACHE_SHARED = True
+    ml_backend = configured_project.ml_backends.first()
+    ml_backend.is_interactive = True
+    ml_backend.save()
+    task = configured_project.tasks.first()
+
+    def predict(context):
+        r = business_client.post(
+            f'/api/ml/{ml_backend.pk}/interactive-annotating',
+            data=json.dumps({'task': task.id, 'context': context}),
+            content_type='application/json',
+        )
+        assert r.json()['data'] == {'x': 'x'}
+        return json.loads([req for req in m.request_history if 'predict' in req.path][-1].text)
+
+    with requests_mock.Mocker(real_http=True) as m, mock.patch(
+        'ml.models.InteractiveAnnotatingDataSerializer', wraps=InteractiveAnnotatingDataSerializer
+    ) as serializer:
+        m.register_uri('POST', f'{ml_backend.url}/predict', json={'results': [{'x': 'x'}]}, status_code=200)
+
+        assert predict({'y': 1})['tasks'][0]['drafts'] == []
+        predict({'y': 2})
+        assert serializer.call_count == 1
+
+        # task is serialized again after draft is saved
+        AnnotationDraft.objects.create(task=task, user=business_client.user, result=[], lead_time=1)
+        assert len(predict({'y': 3})['tasks'][0]['drafts']) == 1
+        assert serializer.call_count == 2
+
+        # worker local cache can't be invalidated in other workers, payloads aren't cached there
+        settings.CACHE_SHARED = False
+        predict({'y': 4})
+        predict({'y': 5})
+        assert serializer.call_count == 4
+
+
+def test_interactive_requests_are_coalesced():
+    coalescer = RequestCoalescer()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_request():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {'data': len(calls)}
+
+    waiting = threading.Event()
+    with ThreadPoolExecutor(max_workers=2) as executor, mock.patch('ml.interactive.logger') as logger:
+        logger.debug.side_effect = lambda *args: waiting.set()
+        first = executor.submit(coalescer.run, 'key', slow_request)
+        started.wait(5)
+        second = executor.submit(coalescer.run, 'key', slow_request)
+        # the second request is waiting for the first one
+        assert waiting.wait(5)
+        assert not second.done()
+        release.set()
+        assert first.result() == second.result() == {'data': 1}
+
+    # finished requests aren't reused
+    assert coalescer.run('key', slow_request) == {'data': 2}
+
+
 @pytest.mark.django_db
 def test_predictions_meta(business_client, configured_project):
     from tasks.models import FailedPrediction, Prediction, PredictionMeta
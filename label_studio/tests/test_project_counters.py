@@ -0,0 +1,189 @@
+import mock
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from projects.functions.utils import recalculate_projects_counters
+from projects.models import Project, ProjectManager, ProjectSummary
+from tasks.models import Prediction, Task, TaskDeletion
+
+from .utils import make_annotation, make_prediction, make_project, make_task
+
+RESULT = [{'from_name': 'text_class', 'to_name': 'text', 'type': 'choices', 'value': {'choices': ['class_A']}}]
+CONFIG = {
+    'title': 'Counters',
+    'label_config': """
+        <View>
+          <Text name="text" value="$text"></Text>
+          <Choices name="text_class" toName="text" choice="single">
+            <Choice value="class_A"></Choice>
+            <Choice value="class_B"></Choice>
+          </Choices>
+        </View>""",
+}
+
+
+def persisted_counters(project):
+    summary = ProjectSummary.objects.get(project=project)
+    return {field: getattr(summary, field) for field in ProjectManager.COUNTER_FIELDS}
+
+
+def calculated_counters(project):
+    """Counters calculated with subqueries as it was before persisted counters"""
+    persisted = persisted_counters(project)
+    ProjectSummary.objects.filter(project=project).update(**dict.fromkeys(ProjectManager.COUNTER_FIELDS, None))
+    counters = Project.objects.with_counts().get(id=project.id).get_counters()
+    ProjectSummary.objects.filter(project=project).update(**persisted)
+    return counters
+
+
+def assert_counters_consistent(project):
+    counters = persisted_counters(project)
+    assert counters == calculated_counters(project)
+    return counters
+
+
+@pytest.mark.django_db
+def test_project_counters_incremental_updates(business_client):
+    project = make_project(CONFIG, business_client.user, use_ml_backend=False)
+    # new projects start with zero counters, no recalculation is needed
+    assert set(persisted_counters(project).values()) == {0}
+
+    task1 = make_task({'data': {'text': 'A'}}, project)
+    task2 = make_task({'data': {'text': 'B'}}, project)
+    make_annotation({'result': RESULT, 'completed_by': business_client.user}, task1.id)
+    second = make_annotation({'result': RESULT, 'completed_by': business_client.user}, task1.id)
+    make_annotation({'result': RESULT, 'completed_by': business_client.user, 'was_cancelled': True}, task2.id)
+    make_annotation({'result': RESULT, 'completed_by': business_client.user, 'ground_truth': True}, task2.id)
+    prediction = make_prediction({'result': RESULT}, task2.id)
+
+    counters = assert_counters_consistent(project)
+    assert counters['task_number'] == 2
+    assert counters['finished_task_number'] == 2
+    assert counters['num_tasks_with_annotations'] == 1
+    assert counters['useful_annotation_number'] == 2
+    assert counters['skipped_annotations_number'] == 1
+    assert counters['ground_truth_number'] == 1
+    assert counters['total_predictions_number'] == 1
+
+    # skipping is an update of the existing annotation
+    second.was_cancelled = True
+    second.save()
+    prediction.delete()
+    counters = assert_counters_consistent(project)
+    assert counters['skipped_annotations_number'] == 2
+    assert counters['total_predictions_number'] == 0
+
+    Task.objects.get(id=task2.id).delete()
+    counters = assert_counters_consistent(project)
+    assert counters['task_number'] == 1
+    assert counters['ground_truth_number'] == 0
+
+
+@pytest.mark.django_db
+def test_project_counters_after_ground_truth_change(business_client):
+    project = make_project(CONFIG, business_client.user, use_ml_backend=False)
+    task = make_task({'data': {'text': 'A'}}, project)
+    first = make_annotation({'result': RESULT, 'completed_by': business_client.user, 'ground_truth': True}, task.id)
+
+    # the new ground truth unflags the previous one with a queryset update
+    r = business_client.post(
+        f'/api/tasks/{task.id}/annotations/',
+        data={'result': RESULT, 'ground_truth': True},
+        content_type='application/json',
+    )
+    assert r.status_code == 201
+    counters = assert_counters_consistent(project)
+    assert counters['ground_truth_number'] == 1
+    assert counters['useful_annotation_number'] == 1
+    assert counters['num_tasks_with_annotations'] == 1
+
+    r = business_client.patch(
+        f'/api/annotations/{first.id}/', data={'ground_truth': True}, content_type='application/json'
+    )
+    assert r.status_code == 200
+    counters = assert_counters_consistent(project)
+    assert counters['ground_truth_number'] == 1
+    assert counters['useful_annotation_number'] == 1
+    assert counters['num_tasks_with_annotations'] == 1
+
+
+@pytest.mark.django_db
+def test_project_counters_recalculation(business_client):
+    project = make_project(CONFIG, business_client.user, use_ml_backend=False)
+    tasks = Task.objects.bulk_create([Task(data={'text': str(i)}, project=project) for i in range(3)])
+    make_annotation({'result': RESULT, 'completed_by': business_client.user}, tasks[0].id)
+    # summary of a project created before persisted counters
+    ProjectSummary.objects.filter(project=project).update(**dict.fromkeys(ProjectManager.COUNTER_FIELDS, None))
+
+    # counters are not calculated yet: project list falls back to subqueries
+    assert persisted_counters(project)['task_number'] is None
+    assert Project.objects.with_counts().get(id=project.id).task_number == 3
+
+    # drifted counters are repaired by recalculation
+    ProjectSummary.objects.filter(project=project).update(task_number=100, useful_annotation_number=-1)
+    assert recalculate_projects_counters(organization_id=project.organization_id) == 1
+    counters = assert_counters_consistent(project)
+    assert counters['task_number'] == 3
+    assert counters['useful_annotation_number'] == 1
+    assert Project.objects.with_counts().get(id=project.id).task_number == 3
+
+
+@pytest.mark.django_db
+def test_bulk_deletion_updates_projects_once(business_client):
+    project = make_project(CONFIG, business_client.user, use_ml_backend=False)
+    tasks = [make_task({'data': {'text': str(i), 'meta': i}}, project) for i in range(3)]
+    tasks.append(make_task({'data': {'text': 'no meta'}}, project))
+    for task in tasks:
+        make_annotation({'result': RESULT, 'completed_by': business_client.user}, task.id)
+        make_prediction({'result': RESULT}, task.id)
+    project.summary.reset()
+    project.summary.update_data_columns(tasks)
+    project.recalculate_counters()
+
+    with mock.patch.object(Project, 'update_tasks_states') as update_tasks_states:
+        with TaskDeletion():
+            Task.objects.filter(id__in=[task.id for task in tasks[:2]]).delete()
+            Prediction.objects.filter(task_id=tasks[2].id).delete()
+            # nothing is recalculated until the end of the block
+            assert persisted_counters(project)['task_number'] == 4
+        update_tasks_states.assert_called_once()
+
+    counters = assert_counters_consistent(project)
+    assert counters['task_number'] == 2
+    assert counters['total_predictions_number'] == 1
+    assert Task.objects.get(id=tasks[2].id).total_predictions == 0
+    project.summary.refresh_from_db()
+    assert project.summary.all_data_columns == {'text': 2, 'meta': 1}
+
+    # tasks deleted together with the project don't update it
+    with mock.patch.object(Project, 'update_tasks_states') as update_tasks_states:
+        project.delete()
+    update_tasks_states.assert_not_called()
+    assert not Task.objects.filter(id__in=[task.id for task in tasks]).exists()
+
+
+@pytest.mark.django_db
+def test_bulk_deletion_updates_predictions_of_remaining_tasks_only(business_client, settings):
+    settings.BATCH_SIZE = 1
+    project = make_project(CONFIG, business_client.user, use_ml_backend=False)
+    tasks = [make_task({'data': {'text': str(i)}}, project) for i in range(3)]
+    for task in tasks:
+        make_prediction({'result': RESULT}, task.id)
+
+    with CaptureQueriesContext(connection) as queries:
+        with TaskDeletion():
+            Task.delete_tasks_without_signals(Task.objects.filter(id__in=[task.id for task in tasks[:2]]))
+            Prediction.objects.filter(task_id=tasks[2].id).delete()
+
+    # deleted tasks don't need total_predictions update
+    updates = [query for query in queries if query['sql'].startswith('UPDATE "task" SET "total_predictions"')]
+    assert len(updates) == 1
+    assert f'IN ({tasks[2].id})' in updates[0]['sql']
+    assert Task.objects.get(id=tasks[2].id).total_predictions == 0
+    assert assert_counters_consistent(project)['total_predictions_number'] == 0
+
+    # admin bulk deletion doesn't call Project.delete(), but is handled as one deletion too
+    with mock.patch.object(Project, 'update_tasks_states') as update_tasks_states:
+        Project.objects.filter(id=project.id).delete()
+    update_tasks_states.assert_not_called()
+    assert not Task.objects.filter(project_id=project.id).exists()
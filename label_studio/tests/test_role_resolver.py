@@ -0,0 +1,63 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from users import role_resolver
+from users.models import User
+from users.role_models import Role, UserRoleAssignment
+
+
+def refetch(user):
+    # every request gets a new user object, so per-request memoization doesn't hide db queries
+    return User.objects.get(pk=user.pk)
+
+
+@pytest.mark.django_db
+def test_role_resolver_caches_roles_across_requests(settings):
+    settings.CACHE_SHARED = True
+    user = User.objects.create(email='resolver@test.com', username='resolver')
+    admin_role = Role.objects.create(name='admin', display_name='Admin')
+    UserRoleAssignment.objects.create(user=user, role=admin_role)
+
+    user = refetch(user)
+    with CaptureQueriesContext(connection) as queries:
+        assert role_resolver.is_admin(user)
+        assert not role_resolver.is_super_admin(user)
+        # signup users get Client role by default
+        assert role_resolver.is_client(user)
+    assert len(queries) == 1
+
+    user = refetch(user)
+    with CaptureQueriesContext(connection) as queries:
+        assert role_resolver.is_admin(user)
+    assert len(queries) == 0
+
+    # worker local cache can't be invalidated in other workers, roles are memoized per request only
+    settings.CACHE_SHARED = False
+    user = refetch(user)
+    with CaptureQueriesContext(connection) as queries:
+        assert role_resolver.is_admin(user)
+        assert role_resolver.is_client(user)
+    assert len(queries) == 1
+
+
+@pytest.mark.django_db
+def test_role_resolver_invalidation(settings):
+    settings.CACHE_SHARED = True
+    user = User.objects.create(email='resolver@test.com', username='resolver')
+    role = Role.objects.create(name='super_admin', display_name='Super Admin')
+    assert not role_resolver.is_super_admin(refetch(user))
+
+    assignment = UserRoleAssignment.objects.create(user=user, role=role)
+    assert role_resolver.is_super_admin(refetch(user))
+
+    assignment.revoke()
+    assert not role_resolver.is_super_admin(refetch(user))
+
+    assignment.reactivate()
+    role.name = 'renamed'
+    role.save()
+    assert not role_resolver.is_super_admin(refetch(user))
+    assert role_resolver.has_role(refetch(user), ['RENAMED'], ignore_case=True)
+
+    role.delete()
+    assert role_resolver.get_user_role_names(refetch(user)) == {'Client'}
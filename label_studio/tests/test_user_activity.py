@@ -0,0 +1,49 @@
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from users.activity import UserActivityBuffer
+from users.models import User
+
+
+@pytest.fixture
+def buffer(settings):
+    settings.USER_ACTIVITY_FLUSH_INTERVAL = 60
+    with mock.patch('users.activity.get_redis_connection', return_value=None):
+        yield UserActivityBuffer()
+
+
+@pytest.mark.django_db
+def test_user_activity_is_buffered(buffer):
+    users = [User.objects.create(email=f'activity{i}@test.com', username=f'activity{i}') for i in range(3)]
+    previous = {user.id: user.last_activity for user in users}
+
+    with CaptureQueriesContext(connection) as queries:
+        for user in users:
+            buffer.record(user)
+        buffer.record(users[0], 'activity_at')
+    assert len(queries) == 0
+
+    with CaptureQueriesContext(connection) as queries:
+        buffer.flush()
+    # one update per field
+    assert len(queries) == 2
+
+    for user in users:
+        saved = User.objects.get(id=user.id)
+        assert saved.last_activity == user.last_activity
+        assert saved.last_activity > previous[user.id]
+    assert User.objects.get(id=users[0].id).activity_at == users[0].activity_at
+
+
+@pytest.mark.django_db
+def test_user_activity_flushes_after_interval(buffer, settings):
+    user = User.objects.create(email='activity@test.com', username='activity')
+    buffer.record(user)
+    assert User.objects.get(id=user.id).last_activity != user.last_activity
+
+    buffer._last_flush = 0
+    settings.USER_ACTIVITY_FLUSH_INTERVAL = 1
+    buffer.record(user)
+    assert User.objects.get(id=user.id).last_activity == user.last_activity
@@ -0,0 +1,105 @@
+"""This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from core.redis import get_redis_connection
+from core.utils.common import batch
+from django.conf import settings
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_FIELDS = ('last_activity', 'activity_at')
+
+
+class UserActivityBuffer:
+    """Buffer for user activity timestamps (User.last_activity, User.activity_at).
+
+    Saving the user row on every request makes htx_user a hot spot during annotation bursts,
+    so timestamps are collected in Redis (shared between workers) or in an in-process map if Redis
+    is not connected, and written with one UPDATE per field every USER_ACTIVITY_FLUSH_INTERVAL seconds.
+    USER_ACTIVITY_FLUSH_INTERVAL = 0 writes timestamps immediately.
+    """
+
+    redis_key = 'users:activity:{field}'
+
+    def __init__(self):
+        self._pending = defaultdict(dict)
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def record(self, user, field='last_activity'):
+        assert field in ACTIVITY_FIELDS, f'Unknown activity field: {field}'
+        now = timezone.now()
+        setattr(user, field, now)
+
+        if settings.USER_ACTIVITY_FLUSH_INTERVAL <= 0:
+            self._update(field, {user.pk: now})
+            return
+
+        if not self._redis_record(field, user.pk, now):
+            with self._lock:
+                self._pending[field][user.pk] = now
+
+        if time.monotonic() - self._last_flush >= settings.USER_ACTIVITY_FLUSH_INTERVAL:
+            self.flush()
+
+    def _redis_record(self, field, user_id, timestamp):
+        redis = get_redis_connection()
+        if redis is None:
+            return False
+        try:
+            redis.hset(self.redis_key.format(field=field), user_id, timestamp.isoformat())
+            return True
+        except Exception as e:
+            logger.debug(f"Can't record user activity in redis: {e}")
+            return False
+
+    def _redis_pop(self, field):
+        redis = get_redis_connection()
+        if redis is None:
+            return {}
+        key = self.redis_key.format(field=field)
+        try:
+            with redis.pipeline(transaction=True) as pipe:
+                values, _ = pipe.hgetall(key).delete(key).execute()
+        except Exception as e:
+            logger.debug(f"Can't get user activity from redis: {e}")
+            return {}
+        return {int(user_id): parse_datetime(timestamp.decode()) for user_id, timestamp in values.items()}
+
+    def flush(self):
+        """Write all buffered timestamps to the database"""
+        self._last_flush = time.monotonic()
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(dict)
+
+        for field in ACTIVITY_FIELDS:
+            values = self._redis_pop(field)
+            for user_id, timestamp in pending.get(field, {}).items():
+                if user_id not in values or values[user_id] < timestamp:
+                    values[user_id] = timestamp
+            if values:
+                try:
+                    self._update(field, values)
+                except Exception as e:
+                    logger.error(f"Can't save user activity: {e}", exc_info=True)
+
+    @staticmethod
+    def _update(field, values):
+        from users.models import User
+
+        user_ids = list(values)
+        for chunk in batch(user_ids, settings.BATCH_SIZE):
+            whens = [When(pk=user_id, then=Value(values[user_id])) for user_id in chunk]
+            User.objects.filter(pk__in=chunk).update(**{field: Case(*whens, output_field=DateTimeField())})
+
+
+user_activity_buffer = UserActivityBuffer()
+atexit.register(user_activity_buffer.flush)
@@ -15,6 +15,7 @@ from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from users import role_resolver
 from users.functions import check_avatar
 from users.models import User
 from users.serializers import UserSerializer, UserSerializerUpdate
@@ -140,58 +141,14 @@ class UserAPI(viewsets.ModelViewSet):
 
     def _is_super_admin(self, user):
         """Check if user is Super Admin"""
-        print(f"DEBUG: Checking super admin for user: {user.email}")
-        if user.email == 'superadmin@gmail.com':
-            print("DEBUG: Super admin detected by email")
-            return True
-        if getattr(user, 'is_superuser', False):
-            print("DEBUG: Super admin detected by is_superuser")
-            return True
-        try:
-            from users.role_models import UserRoleAssignment
-            has_role = UserRoleAssignment.objects.filter(
-                user=user, 
-                role__name__in=['super-admin', 'super_admin'], 
-                is_active=True
-            ).exists()
-            print(f"DEBUG: Super admin role check result: {has_role}")
-            return has_role
-        except Exception as e:
-            print(f"DEBUG: Error checking super admin role: {e}")
-            return False
+        return role_resolver.is_super_admin(user)
 
     def _is_admin(self, user):
         """Check if user is Admin (includes Super Admin)"""
-        # Check for specific admin emails
-        if user.email in ['dhaneshwari.tosscss@gmail.com', 'superadmin@gmail.com']:
-            return True
-        if getattr(user, 'is_superuser', False) or getattr(user, 'is_staff', False):
-            return True
-        try:
-            from users.role_models import UserRoleAssignment
-            # Check for admin, super-admin, and administrator roles (case-insensitive)
-            return UserRoleAssignment.objects.filter(
-                user=user, 
-                role__name__in=['administrator', 'admin', 'super-admin', 'super_admin', 'Administrator', 'Admin'], 
-                is_active=True
-            ).exists()
-        except Exception:
-            return False
-    
+        return role_resolver.is_admin(user, role_names=role_resolver.ADMIN_ROLES + ('Administrator', 'Admin'))
+
     def _is_client(self, user):
-        # Check for specific client email
-        if user.email == 'dhaneshwari.ttosscss@gmail.com':
-            return True
-        try:
-            from users.role_models import UserRoleAssignment
-            # Check for 'client' role
-            return UserRoleAssignment.objects.filter(
-                user=user, 
-                role__name__iexact='client', 
-                is_active=True
-            ).exists()
-        except Exception:
-            return False
+        return role_resolver.is_client(user)
 
     def get_queryset(self):
         qs = User.objects.filter(organizations=self.request.user.active_organization)
@@ -563,16 +520,7 @@ class UserAPI(viewsets.ModelViewSet):
             print(f"DEBUG: User is_superuser: {getattr(request.user, 'is_superuser', False)}")
             print(f"DEBUG: User is_staff: {getattr(request.user, 'is_staff', False)}")
             
-            # Debug role assignments
-            try:
-                from users.role_models import UserRoleAssignment
-                role_assignments = UserRoleAssignment.objects.filter(
-                    user=request.user, 
-                    is_active=True
-                ).values_list('role__name', flat=True)
-                print(f"DEBUG: User role assignments: {list(role_assignments)}")
-            except Exception as e:
-                print(f"DEBUG: Error getting role assignments: {e}")
+            print(f"DEBUG: User role assignments: {sorted(role_resolver.get_user_role_names(request.user))}")
             
             if is_super_admin:
                 # Super Admin: Show ALL users
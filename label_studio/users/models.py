@@ -16,6 +16,7 @@ from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 from organizations.models import Organization
 from rest_framework.authtoken.models import Token
+from users.activity import user_activity_buffer
 from users.functions import hash_upload
 
 YEAR_START = 1980
@@ -65,8 +66,7 @@ class UserLastActivityMixin(models.Model):
     last_activity = models.DateTimeField(_('last activity'), default=timezone.now, editable=False)
 
     def update_last_activity(self):
-        self.last_activity = timezone.now()
-        self.save(update_fields=['last_activity'])
+        user_activity_buffer.record(self, 'last_activity')
 
     class Meta:
         abstract = True
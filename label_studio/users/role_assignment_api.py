@@ -17,6 +17,7 @@ import logging
 
 from .models import User
 from .role_models import Role, UserRoleAssignment
+from . import role_resolver
 from .role_serializers import (
     RoleAssignmentRequestSerializer,
     RoleAssignmentResponseSerializer,
@@ -40,10 +41,7 @@ class RoleAssignmentAPIView(APIView):
             return True
         if getattr(user, 'is_superuser', False) or getattr(user, 'is_staff', False):
             return True
-        try:
-            return UserRoleAssignment.objects.filter(user=user, role__name__iexact='administrator', is_active=True).exists()
-        except Exception:
-            return False
+        return role_resolver.has_role(user, ['administrator'], ignore_case=True)
 
     def post(self, request):
         """
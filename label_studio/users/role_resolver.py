@@ -0,0 +1,98 @@
+"""
+Cached resolver of user roles.
+
+Role checks (super admin / admin / client) used to query UserRoleAssignment on every call,
+now active role names of a user are loaded once, memoized on the user object for the rest
+of the request and, with a shared cache backend (CACHE_SHARED), stored in the Django cache across
+requests. Cache entries are invalidated by signals when Role or UserRoleAssignment rows change
+(see users/signals.py), worker local caches would keep revoked roles in other workers.
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+SUPER_ADMIN_EMAILS = ('superadmin@gmail.com',)
+ADMIN_EMAILS = ('dhaneshwari.tosscss@gmail.com', 'superadmin@gmail.com')
+CLIENT_EMAILS = ('dhaneshwari.ttosscss@gmail.com',)
+
+SUPER_ADMIN_ROLES = ('super-admin', 'super_admin')
+ADMIN_ROLES = ('administrator', 'admin', 'super-admin', 'super_admin')
+CLIENT_ROLES = ('client',)
+
+_ROLES_ATTR = '_cached_role_names'
+
+
+def _roles_key(user_id):
+    return f'user_roles:{user_id}'
+
+
+def get_user_role_names(user) -> frozenset:
+    """Names of the roles actively assigned to user"""
+    if not getattr(user, 'is_authenticated', False) or user.pk is None:
+        return frozenset()
+
+    # per request: request.user is the same object during the whole request
+    role_names = getattr(user, _ROLES_ATTR, None)
+    if role_names is not None:
+        return role_names
+
+    # across requests
+    shared = settings.CACHE_SHARED and settings.USER_ROLES_CACHE_TTL > 0
+    role_names = cache.get(_roles_key(user.pk)) if shared else None
+    if role_names is None:
+        from users.role_models import UserRoleAssignment
+
+        try:
+            role_names = frozenset(
+                UserRoleAssignment.objects.filter(user_id=user.pk, is_active=True).values_list('role__name', flat=True)
+            )
+        except Exception as e:
+            logger.error(f"Can't load roles for user {user.pk}: {e}")
+            return frozenset()
+        if shared:
+            cache.set(_roles_key(user.pk), role_names, settings.USER_ROLES_CACHE_TTL)
+
+    setattr(user, _ROLES_ATTR, role_names)
+    return role_names
+
+
+def has_role(user, role_names, ignore_case=False) -> bool:
+    """Check if user has at least one of the role_names assigned"""
+    user_roles = get_user_role_names(user)
+    if ignore_case:
+        user_roles = {name.lower() for name in user_roles}
+        role_names = [name.lower() for name in role_names]
+    return any(name in user_roles for name in role_names)
+
+
+def is_super_admin(user) -> bool:
+    if not getattr(user, 'is_authenticated', False):
+        return False
+    if user.email in SUPER_ADMIN_EMAILS or user.is_superuser:
+        return True
+    return has_role(user, SUPER_ADMIN_ROLES)
+
+
+def is_admin(user, role_names=ADMIN_ROLES, ignore_case=False) -> bool:
+    """Check if user is Admin (includes Super Admin)"""
+    if not getattr(user, 'is_authenticated', False):
+        return False
+    if user.email in ADMIN_EMAILS or user.is_superuser or user.is_staff:
+        return True
+    return has_role(user, role_names, ignore_case=ignore_case)
+
+
+def is_client(user) -> bool:
+    if not getattr(user, 'is_authenticated', False):
+        return False
+    if user.email in CLIENT_EMAILS:
+        return True
+    return has_role(user, CLIENT_ROLES, ignore_case=True)
+
+
+def invalidate_user_roles(*user_ids):
+    cache.delete_many([_roles_key(user_id) for user_id in user_ids])
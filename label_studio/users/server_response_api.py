@@ -14,6 +14,8 @@ from django.utils.decorators import method_decorator
 import logging
 import json
 
+from . import role_resolver
+
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
@@ -142,44 +144,7 @@ class RoleAssignmentResponseAPIView(APIView):
             # Import role models
             from users.role_models import Role, UserRoleAssignment
             
-            # Check if user is super admin
-            def _is_super_admin(user):
-                """Check if user is Super Admin"""
-                if not user.is_authenticated:
-                    return False
-                if user.email == 'superadmin@gmail.com':
-                    return True
-                if getattr(user, 'is_superuser', False):
-                    return True
-                try:
-                    return UserRoleAssignment.objects.filter(
-                        user=user, 
-                        role__name__in=['super-admin', 'super_admin'], 
-                        is_active=True
-                    ).exists()
-                except Exception:
-                    return False
-
-            # Check if user is admin (includes Super Admin)
-            def _is_admin(user):
-                """Check if user is Admin (includes Super Admin)"""
-                # Check if user is anonymous
-                if not user.is_authenticated:
-                    return False
-                if user.email in ['dhaneshwari.tosscss@gmail.com', 'superadmin@gmail.com']:
-                    return True
-                if getattr(user, 'is_superuser', False) or getattr(user, 'is_staff', False):
-                    return True
-                try:
-                    return UserRoleAssignment.objects.filter(
-                        user=user, 
-                        role__name__in=['administrator', 'admin', 'super-admin', 'super_admin'], 
-                        is_active=True
-                    ).exists()
-                except Exception:
-                    return False
-            
-            is_admin = _is_admin(request.user)
+            is_admin = role_resolver.is_admin(request.user)
             
             # Check if user exists
             try:
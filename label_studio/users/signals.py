@@ -2,11 +2,12 @@
 Signal handlers for user management
 """
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from .role_models import Role, UserRoleAssignment
+from .role_resolver import invalidate_user_roles
 
 User = get_user_model()
 
@@ -72,3 +73,16 @@ def assign_default_role_to_new_user(sender, instance, created, **kwargs):
             import logging
             logger = logging.getLogger(__name__)
             logger.error(f'Error assigning default role to user {instance.email}: {str(e)}')
+
+
+@receiver([post_save, post_delete], sender=UserRoleAssignment)
+def invalidate_roles_on_assignment_change(sender, instance, **kwargs):
+    invalidate_user_roles(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Role)
+def invalidate_roles_on_role_change(sender, instance, **kwargs):
+    # role rename or deactivation affects all users it's assigned to
+    user_ids = UserRoleAssignment.objects.filter(role_id=instance.pk).values_list('user_id', flat=True)
+    invalidate_user_roles(*user_ids)
+
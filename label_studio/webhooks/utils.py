@@ -3,6 +3,7 @@ from functools import wraps
 
 import requests
 from core.feature_flags import flag_set
+from core.metrics import timed
 from core.redis import start_job_async_or_sync
 from core.utils.common import load_func
 from django.conf import settings
@@ -37,6 +38,7 @@ def get_active_webhooks(organization, project, action):
     ).distinct()
 
 
+@timed('send_webhook')
 def run_webhook_sync(webhook, action, payload=None):
     """Run one webhook for action.
 